@@ -6,6 +6,15 @@
 -- Create UUID extension
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 
+-- Accent-insensitive full-text search (movie catalog)
+CREATE EXTENSION IF NOT EXISTS unaccent;
+
+-- unaccent() is only STABLE; pinning the dictionary makes it usable in a
+-- generated column and an index
+CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$;
+
 -- =====================================================
 -- USERS TABLE
 -- =====================================================
@@ -43,11 +52,20 @@ CREATE TABLE movies (
     cast TEXT,
     is_active BOOLEAN DEFAULT true,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    -- Title ranks above director/cast, which rank above description
+    search_vector TSVECTOR GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', f_unaccent(coalesce(title, ''))), 'A') ||
+        setweight(to_tsvector('simple', f_unaccent(coalesce(director, '') || ' ' || coalesce("cast", ''))), 'B') ||
+        setweight(to_tsvector('simple', f_unaccent(coalesce(description, ''))), 'C')
+    ) STORED
 );
 
 CREATE INDEX idx_movies_title ON movies(title);
 CREATE INDEX idx_movies_release_date ON movies(release_date);
+CREATE INDEX idx_movies_search ON movies USING GIN (search_vector);
+-- Keyset pagination: listing order of active movies
+CREATE INDEX idx_movies_active_title ON movies(title, id) WHERE is_active IS TRUE;
 
 -- =====================================================
 -- THEATERS TABLE
@@ -62,6 +80,8 @@ CREATE TABLE theaters (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+CREATE INDEX idx_theaters_name ON theaters(name, id);
+
 -- =====================================================
 -- SHOWTIMES TABLE
 -- =====================================================
@@ -82,6 +102,10 @@ CREATE TABLE showtimes (
 CREATE INDEX idx_showtimes_movie ON showtimes(movie_id);
 CREATE INDEX idx_showtimes_theater ON showtimes(theater_id);
 CREATE INDEX idx_showtimes_date ON showtimes(show_date);
+CREATE INDEX idx_showtimes_schedule ON showtimes(show_date, show_time, id);
+CREATE INDEX idx_showtimes_movie_schedule ON showtimes(movie_id, show_date, show_time, id);
+CREATE INDEX idx_showtimes_theater_schedule ON showtimes(theater_id, show_date, show_time, id);
+CREATE INDEX idx_showtimes_updated_at ON showtimes(updated_at);
 
 -- =====================================================
 -- SEATS TABLE
@@ -116,6 +140,7 @@ CREATE TABLE bookings (
 );
 
 CREATE INDEX idx_bookings_user ON bookings(user_id);
+CREATE INDEX idx_bookings_user_created ON bookings(user_id, created_at, id);
 CREATE INDEX idx_bookings_showtime ON bookings(showtime_id);
 CREATE INDEX idx_bookings_code ON bookings(booking_code);
 CREATE INDEX idx_bookings_status ON bookings(status);
@@ -171,6 +196,7 @@ CREATE TABLE notifications (
 );
 
 CREATE INDEX idx_notifications_user ON notifications(user_id);
+CREATE INDEX idx_notifications_user_created ON notifications(user_id, created_at, id);
 CREATE INDEX idx_notifications_status ON notifications(status);
 
 -- =====================================================
@@ -148,7 +148,7 @@ function Build-Images {
     $services = @("auth-service", "movie-service", "booking-service", "payment-service", "notification-service")
     foreach ($service in $services) {
         Write-Host "Building $service..." -ForegroundColor Cyan
-        docker build -t "movie-booking/$service`:latest" "$SCRIPT_DIR\services\$service"
+        docker build -t "movie-booking/$service`:latest" -f "$SCRIPT_DIR\services\$service\Dockerfile" "$SCRIPT_DIR\services"
     }
     
     Write-Host "✓ All images built" -ForegroundColor Green
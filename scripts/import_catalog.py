@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Catalog Import CLI for Movie Service
+Streams an NDJSON or CSV file to POST /import/{kind}
+
+The file is sent as it is read, so its size does not matter; movie-service
+validates and inserts it in batches and replies with a summary. Import
+theaters before the showtimes that reference them. Exits non-zero when any
+record was rejected.
+
+Usage:
+    python scripts/import_catalog.py theaters theaters.ndjson
+    python scripts/import_catalog.py showtimes week-19.csv \\
+        --url http://localhost:8080/api/movies --token "$ADMIN_TOKEN"
+"""
+
+import argparse
+import os
+import sys
+
+import httpx
+
+MOVIE_SERVICE_URL = os.getenv("MOVIE_SERVICE_URL", "http://localhost:8002")
+CHUNK_SIZE = 256 * 1024
+
+
+def read_chunks(path):
+    stream = sys.stdin.buffer if path == "-" else open(path, "rb")
+    try:
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("kind", choices=["movies", "theaters", "showtimes"])
+    parser.add_argument("path", help="NDJSON or CSV file, or - for stdin")
+    parser.add_argument("--url", default=MOVIE_SERVICE_URL, help="Movie service URL")
+    parser.add_argument(
+        "--format",
+        choices=["ndjson", "csv"],
+        help="Defaults to csv for .csv files, else ndjson",
+    )
+    parser.add_argument(
+        "--token", default=os.getenv("IMPORT_TOKEN"), help="Bearer token"
+    )
+    args = parser.parse_args()
+
+    format = args.format or ("csv" if args.path.endswith(".csv") else "ndjson")
+    headers = {
+        "Content-Type": "text/csv" if format == "csv" else "application/x-ndjson"
+    }
+    if args.token:
+        headers["Authorization"] = f"Bearer {args.token}"
+
+    response = httpx.post(
+        f"{args.url.rstrip('/')}/import/{args.kind}",
+        params={"format": format},
+        content=read_chunks(args.path),
+        headers=headers,
+        timeout=httpx.Timeout(30, read=None),
+    )
+    response.raise_for_status()
+    result = response.json()
+
+    print(
+        f"{result['kind']}: {result['received']} received, "
+        f"{result['imported']} imported, {result['rejected']} rejected"
+        + (f", {result['seats']} seats" if result["seats"] else "")
+    )
+    for error in result["errors"]:
+        print(f"  line {error['line']}: {error['error']}", file=sys.stderr)
+    return 1 if result["rejected"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
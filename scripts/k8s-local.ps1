@@ -220,7 +220,7 @@ function Build-Images {
         $imageName = "movie-booking/$($svc.Name):local"
         
         if (Test-Path "$($svc.Path)/Dockerfile") {
-            docker build -t $imageName -f "$($svc.Path)/Dockerfile" $svc.Path
+            docker build -t $imageName -f "$($svc.Path)/Dockerfile" services
             
             # Load image to kind if using kind
             if ($Driver -eq "kind") {
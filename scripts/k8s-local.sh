@@ -204,7 +204,7 @@ build_images() {
         image_name="movie-booking/${name}:local"
         
         if [ -f "$path/Dockerfile" ]; then
-            docker build -t "$image_name" -f "$path/Dockerfile" "$path"
+            docker build -t "$image_name" -f "$path/Dockerfile" services
             
             # Load image to kind if using kind
             if [ "$DRIVER" = "kind" ]; then
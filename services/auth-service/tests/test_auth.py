@@ -4,12 +4,33 @@
 # =====================================================
 import os
 import sys
-from unittest.mock import MagicMock, patch
+from unittest.mock import ANY, MagicMock, patch
 
 import pytest
 from httpx import AsyncClient
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# services/ holds the shared package
+sys.path.insert(
+    0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
+
+
+def generate_signing_key() -> str:
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+
+
+# Exercise the JWKS path: RS256 with a configured key
+os.environ.setdefault("ALGORITHM", "RS256")
+os.environ.setdefault("JWT_PRIVATE_KEY", generate_signing_key())
 
 from app.main import app, create_access_token, get_password_hash, verify_password
 
@@ -56,6 +77,39 @@ class TestJWTToken:
         token = create_access_token(data, expires_delta=timedelta(minutes=60))
         assert token is not None
 
+    def test_token_is_signed_with_published_key(self):
+        """Test tokens carry the kid of a key published in the JWKS."""
+        from jose import jwt
+
+        from app.main import JWKS, decode_token
+
+        token = create_access_token({"sub": "testuser", "user_id": "u1"})
+        header = jwt.get_unverified_header(token)
+        assert header["alg"] == "RS256"
+        assert header["kid"] in {key["kid"] for key in JWKS["keys"]}
+        assert decode_token(token)["user_id"] == "u1"
+
+    def test_tampered_token_is_rejected(self):
+        """Test a token with a modified payload fails verification."""
+        from jose import JWTError
+
+        from app.main import decode_token
+
+        header, payload, signature = create_access_token({"sub": "a"}).split(".")
+        forged = create_access_token({"sub": "admin"}).split(".")[1]
+        with pytest.raises(JWTError):
+            decode_token(f"{header}.{forged}.{signature}")
+
+    def test_asymmetric_signing_requires_a_key(self):
+        """Test startup fails instead of generating a key no replica shares."""
+        from app.main import load_signing_key
+
+        with patch("app.main.JWT_PRIVATE_KEY", ""), patch(
+            "app.main.JWT_PRIVATE_KEY_FILE", ""
+        ):
+            with pytest.raises(RuntimeError, match="JWT_PRIVATE_KEY"):
+                load_signing_key()
+
 
 class TestHealthEndpoint:
     """Test health check endpoint."""
@@ -70,6 +124,21 @@ class TestHealthEndpoint:
             assert data["status"] == "healthy"
 
 
+class TestJWKSEndpoint:
+    """Test the public key endpoint."""
+
+    @pytest.mark.asyncio
+    async def test_jwks_publishes_public_key_only(self):
+        """Test the JWKS lists the signing key without private material."""
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.get("/.well-known/jwks.json")
+            assert response.status_code == 200
+            assert "max-age" in response.headers["cache-control"]
+            keys = response.json()["keys"]
+            assert keys and keys[0]["kty"] == "RSA"
+            assert "d" not in keys[0]
+
+
 class TestRegisterEndpoint:
     """Test user registration endpoint."""
 
@@ -93,3 +162,545 @@ class TestLoginEndpoint:
             )
             # Should fail authentication
             assert response.status_code in [401, 500]  # 500 if DB not connected
+
+
+class TestPasswordPool:
+    """Test bcrypt runs on the bounded worker pool."""
+
+    @staticmethod
+    def override_user(password_hash):
+        import uuid
+        from types import SimpleNamespace
+        from unittest.mock import AsyncMock
+
+        from app.main import get_db
+
+        user = SimpleNamespace(
+            id=uuid.uuid4(),
+            username="alice",
+            email="alice@example.com",
+            full_name=None,
+            role="customer",
+            is_active=True,
+            password_hash=password_hash,
+        )
+        result = MagicMock()
+        result.scalar_one_or_none.return_value = user
+        session = MagicMock()
+        session.execute = AsyncMock(return_value=result)
+
+        async def override_db():
+            yield session
+
+        app.dependency_overrides[get_db] = override_db
+
+    @pytest.mark.asyncio
+    async def test_login_verifies_off_the_event_loop(self):
+        """Test the password check runs on a pool thread."""
+        import threading
+
+        threads = []
+
+        def verify(plain, hashed):
+            threads.append(threading.current_thread().name)
+            return True
+
+        self.override_user("hash")
+        try:
+            with patch("app.main.verify_password", verify), patch(
+                "app.main.redis_client", None
+            ):
+                async with AsyncClient(app=app, base_url="http://test") as client:
+                    response = await client.post(
+                        "/token", data={"username": "alice", "password": "secret"}
+                    )
+        finally:
+            app.dependency_overrides.clear()
+
+        assert response.status_code == 200
+        assert threads and threads[0].startswith("password_hash")
+
+    @pytest.mark.asyncio
+    async def test_full_pool_sheds_logins(self):
+        """Test logins get 503 with Retry-After when the queue is full."""
+        from shared.worker_pool import WorkerPool
+
+        self.override_user("hash")
+        try:
+            with patch(
+                "app.main.password_pool", WorkerPool("password_hash", max_pending=0)
+            ):
+                async with AsyncClient(app=app, base_url="http://test") as client:
+                    response = await client.post(
+                        "/token", data={"username": "alice", "password": "secret"}
+                    )
+        finally:
+            app.dependency_overrides.clear()
+
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "1"
+
+
+class FakeRedis:
+    """Just enough of redis.asyncio for the claims cache."""
+
+    def __init__(self):
+        self.data = {}
+        self.mget_calls = 0
+
+    async def mget(self, keys):
+        self.mget_calls += 1
+        return [self.data.get(key) for key in keys]
+
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    def pipeline(self, transaction=True):
+        redis_client = self
+        commands = []
+
+        class Pipeline:
+            def set(self, *args, **kwargs):
+                commands.append(redis_client.set(*args, **kwargs))
+
+            async def execute(self):
+                return [await command for command in commands]
+
+        return Pipeline()
+
+
+class TestClaimsCache:
+    """Test /verify serves user claims from the claims cache."""
+
+    CLAIMS = {
+        "user_id": "7d1c2f0e-0000-4000-8000-000000000001",
+        "username": "alice",
+        "email": "alice@example.com",
+        "full_name": "Alice",
+        "phone_number": None,
+        "role": "customer",
+        "is_active": True,
+    }
+
+    @staticmethod
+    def override_db(user):
+        from unittest.mock import AsyncMock
+
+        from app.main import get_db
+
+        result = MagicMock()
+        result.scalar_one_or_none.return_value = user
+        session = MagicMock()
+        session.execute = AsyncMock(return_value=result)
+        session.commit = AsyncMock()
+        session.refresh = AsyncMock()
+
+        async def override():
+            yield session
+
+        app.dependency_overrides[get_db] = override
+        return session
+
+    @pytest.mark.asyncio
+    async def test_invalidation_blocks_stale_reload(self):
+        """Test a load racing an invalidation cannot repopulate old claims."""
+        from shared.claims_cache import ClaimsCache
+
+        cache = ClaimsCache(FakeRedis())
+        await cache.set("alice", self.CLAIMS)
+        assert await cache.get("alice") == self.CLAIMS
+
+        await cache.invalidate("alice")
+        await cache.set("alice", self.CLAIMS)
+        assert await cache.get("alice") is None
+
+    @pytest.mark.asyncio
+    async def test_tombstoned_load_stays_out_of_l1(self):
+        """Test a load that loses to a tombstone is not kept in process either."""
+        from shared.claims_cache import ClaimsCache
+
+        redis_client = FakeRedis()
+        cache = ClaimsCache(redis_client, l1_ttl=60)
+        await cache.invalidate("alice")
+        await cache.invalidate("bob")
+
+        await cache.set("alice", self.CLAIMS)
+        await cache.set_many(
+            {"bob": {"username": "bob"}, "carol": {"username": "carol"}}
+        )
+
+        assert cache.l1.get("alice") is None
+        assert cache.l1.get("bob") is None
+        assert cache.l1.get("carol") == {"username": "carol"}
+        assert await cache.get_many(["alice", "bob"]) == {}
+
+    @pytest.mark.asyncio
+    async def test_get_many_reads_l1_then_one_mget(self):
+        """Test in-process hits skip Redis and the rest share one MGET."""
+        from shared.claims_cache import ClaimsCache
+
+        redis_client = FakeRedis()
+        cache = ClaimsCache(redis_client, l1_ttl=60)
+        await cache.set("alice", self.CLAIMS)
+        redis_client.data["auth:claims:bob"] = '{"username": "bob"}'
+
+        found = await cache.get_many(["alice", "bob", "carol", "bob"])
+
+        assert found == {"alice": self.CLAIMS, "bob": {"username": "bob"}}
+        assert redis_client.mget_calls == 1
+
+    @pytest.mark.asyncio
+    async def test_verify_hit_skips_database(self):
+        """Test a cached user is verified without a query."""
+        from shared.claims_cache import ClaimsCache
+
+        cache = ClaimsCache(FakeRedis())
+        await cache.set("alice", self.CLAIMS)
+        session = self.override_db(None)
+        token = create_access_token({"sub": "alice", "role": "customer"})
+        try:
+            with patch("app.main.claims_cache", cache):
+                async with AsyncClient(app=app, base_url="http://test") as client:
+                    response = await client.get(
+                        "/verify", headers={"Authorization": f"Bearer {token}"}
+                    )
+        finally:
+            app.dependency_overrides.clear()
+
+        assert response.status_code == 200
+        assert response.json() == self.CLAIMS
+        session.execute.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_deactivation_invalidates_claims(self):
+        """Test deactivating a user drops their cached claims."""
+        import uuid
+        from types import SimpleNamespace
+
+        from shared.claims_cache import ClaimsCache
+
+        cache = ClaimsCache(FakeRedis())
+        await cache.set("alice", self.CLAIMS)
+        user = SimpleNamespace(
+            id=uuid.UUID(self.CLAIMS["user_id"]),
+            username="alice",
+            email="alice@example.com",
+            full_name="Alice",
+            role="customer",
+            is_active=True,
+        )
+        self.override_db(user)
+        admin = create_access_token({"sub": "root", "role": "admin"})
+        customer = create_access_token({"sub": "bob", "role": "customer"})
+        try:
+            with patch("app.main.claims_cache", cache), patch(
+                "app.main.redis_client", None
+            ):
+                async with AsyncClient(app=app, base_url="http://test") as client:
+                    path = f"/users/{user.id}/deactivate"
+                    forbidden = await client.post(
+                        path, headers={"Authorization": f"Bearer {customer}"}
+                    )
+                    response = await client.post(
+                        path, headers={"Authorization": f"Bearer {admin}"}
+                    )
+        finally:
+            app.dependency_overrides.clear()
+
+        assert forbidden.status_code == 403
+        assert response.status_code == 200
+        assert await cache.get("alice") is None
+
+
+class TestVerifyBatch:
+    """Test POST /verify/batch."""
+
+    @pytest.mark.asyncio
+    async def test_results_follow_request_order(self):
+        """Test cached and loaded users are resolved with one query."""
+        import uuid
+        from types import SimpleNamespace
+        from unittest.mock import AsyncMock
+
+        from app.main import get_db
+        from shared.claims_cache import ClaimsCache
+
+        cache = ClaimsCache(FakeRedis())
+        await cache.set("alice", TestClaimsCache.CLAIMS)
+        bob = SimpleNamespace(
+            id=uuid.uuid4(),
+            username="bob",
+            email="bob@example.com",
+            full_name=None,
+            phone_number=None,
+            role="customer",
+            is_active=True,
+        )
+        result = MagicMock()
+        result.scalars.return_value = [bob]
+        session = MagicMock()
+        session.execute = AsyncMock(return_value=result)
+
+        async def override_db():
+            yield session
+
+        app.dependency_overrides[get_db] = override_db
+        tokens = [
+            create_access_token({"sub": "bob"}),
+            "not-a-token",
+            create_access_token({"sub": "alice"}),
+            create_access_token({"sub": "carol"}),
+        ]
+        try:
+            with patch("app.main.claims_cache", cache):
+                async with AsyncClient(app=app, base_url="http://test") as client:
+                    response = await client.post(
+                        "/verify/batch", json={"tokens": tokens}
+                    )
+        finally:
+            app.dependency_overrides.clear()
+
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert results[0]["claims"]["username"] == "bob"
+        assert results[1] == {"claims": None, "error": "invalid_token"}
+        assert results[2]["claims"] == TestClaimsCache.CLAIMS
+        assert results[3] == {"claims": None, "error": "unknown_user"}
+        assert session.execute.await_count == 1
+        assert await cache.get("bob") is not None
+
+    @pytest.mark.asyncio
+    async def test_oversized_batch_is_rejected(self):
+        """Test more than MAX_VERIFY_BATCH tokens is a validation error."""
+        from app.main import MAX_VERIFY_BATCH
+
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.post(
+                "/verify/batch", json={"tokens": ["t"] * (MAX_VERIFY_BATCH + 1)}
+            )
+        assert response.status_code == 422
+
+
+class TestTokenRefresh:
+    """Test rotating refresh tokens."""
+
+    @staticmethod
+    def make_store(rotate_result):
+        from unittest.mock import AsyncMock
+
+        from shared.refresh_tokens import RefreshTokenStore
+
+        redis_client = MagicMock()
+        redis_client.register_script.return_value = AsyncMock(
+            return_value=rotate_result
+        )
+        redis_client.delete = AsyncMock(return_value=1)
+        return RefreshTokenStore(redis_client, ttl=60)
+
+    @pytest.mark.asyncio
+    async def test_rotate_swaps_secret_in_one_script_call(self):
+        """Test rotation keeps the family and sends only digests."""
+        store = self.make_store(["u1", "alice"])
+
+        token, user_id, username = await store.rotate("fam.secret")
+
+        family, secret = token.split(".", 1)
+        assert (family, user_id, username) == ("fam", "u1", "alice")
+        assert secret != "secret"
+        store._rotate.assert_awaited_once_with(
+            keys=["refresh:fam"],
+            args=[store.digest("secret"), store.digest(secret), 60],
+        )
+
+    @pytest.mark.asyncio
+    async def test_reused_and_unknown_tokens_are_rejected(self):
+        """Test a replayed token and an expired family raise distinct errors."""
+        from shared.refresh_tokens import InvalidRefreshToken, RefreshTokenReused
+
+        with pytest.raises(RefreshTokenReused):
+            await self.make_store("reused").rotate("fam.old")
+        with pytest.raises(InvalidRefreshToken):
+            await self.make_store(None).rotate("fam.secret")
+        with pytest.raises(InvalidRefreshToken):
+            await self.make_store(None).rotate("no-separator")
+
+    @pytest.mark.asyncio
+    async def test_refresh_issues_tokens_without_password_check(self):
+        """Test a valid refresh returns new tokens from cached claims."""
+        from shared.claims_cache import ClaimsCache
+
+        cache = ClaimsCache(FakeRedis())
+        await cache.set("alice", TestClaimsCache.CLAIMS)
+        store = self.make_store([TestClaimsCache.CLAIMS["user_id"], "alice"])
+        verify = MagicMock()
+        with patch("app.main.refresh_store", store), patch(
+            "app.main.claims_cache", cache
+        ), patch("app.main.redis_client", None), patch(
+            "app.main.verify_password", verify
+        ):
+            async with AsyncClient(app=app, base_url="http://test") as client:
+                response = await client.post(
+                    "/token/refresh", json={"refresh_token": "fam.secret"}
+                )
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["refresh_token"].startswith("fam.")
+        assert body["user"]["username"] == "alice"
+        verify.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_reused_refresh_token_is_unauthorized(self):
+        """Test replaying a rotated token gets 401."""
+        with patch("app.main.refresh_store", self.make_store("reused")):
+            async with AsyncClient(app=app, base_url="http://test") as client:
+                response = await client.post(
+                    "/token/refresh", json={"refresh_token": "fam.old"}
+                )
+
+        assert response.status_code == 401
+
+
+class TestRevocation:
+    """Test access token revocation by jti."""
+
+    @staticmethod
+    def make_list(exists=0):
+        from unittest.mock import AsyncMock
+
+        from shared.revocation import RevocationList
+
+        pipe = MagicMock()
+        pipe.execute = AsyncMock(return_value=[])
+        redis_client = MagicMock()
+        redis_client.pipeline.return_value = pipe
+        redis_client.exists = AsyncMock(return_value=exists)
+        redis_client.zrangebyscore = AsyncMock(return_value=[])
+        redis_client.delete = AsyncMock()
+        revocations = RevocationList(redis_client)
+        revocations._filters = {}  # as after a sync that found nothing
+        return revocations
+
+    @pytest.mark.asyncio
+    async def test_clear_token_costs_no_redis_call(self):
+        """Test a token missing from the filter is cleared from memory."""
+        import time
+
+        revocations = self.make_list()
+
+        assert await revocations.is_revoked("jti-1", time.time() + 60) is False
+        revocations.redis.exists.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_filter_hit_is_confirmed_in_redis(self):
+        """Test a revoked jti is found and a false positive is cleared."""
+        import time
+
+        exp = time.time() + 60
+        revoked = self.make_list(exists=1)
+        await revoked.revoke("jti-1", exp)
+        assert await revoked.is_revoked("jti-1", exp) is True
+
+        false_positive = self.make_list(exists=0)
+        await false_positive.revoke("jti-1", exp)
+        assert await false_positive.is_revoked("jti-1", exp) is False
+        assert false_positive.redis.exists.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_unconfirmed_hit_fails_closed(self):
+        """Test a possible hit is rejected when Redis cannot be reached."""
+        import time
+        from unittest.mock import AsyncMock
+
+        exp = time.time() + 60
+        revocations = self.make_list()
+        await revocations.revoke("jti-1", exp)
+        revocations.redis.exists = AsyncMock(side_effect=ConnectionError("down"))
+
+        assert await revocations.is_revoked("jti-1", exp) is True
+
+    @pytest.mark.asyncio
+    async def test_sync_copies_only_changed_filters(self):
+        """Test a sync fetches a filter only when its version moved."""
+        from unittest.mock import AsyncMock
+
+        revocations = self.make_list()
+        revocations._filters = None
+        redis_client = revocations.redis
+        redis_client.zrangebyscore = AsyncMock(return_value=["100", "101"])
+        redis_client.mget = AsyncMock(side_effect=[["1", "3"], ["1", "3"], ["1", "4"]])
+        redis_client.pipeline.return_value.execute = AsyncMock(
+            side_effect=[[b"\x80", b"\x40"], [b"\xc0"]]
+        )
+
+        await revocations.sync()
+        await revocations.sync()
+        await revocations.sync()
+
+        fetched = [
+            call.args[1]
+            for call in redis_client.pipeline.return_value.execute_command.call_args_list
+        ]
+        assert fetched == [
+            "revoked-bloom:100",
+            "revoked-bloom:101",
+            "revoked-bloom:101",
+        ]
+        assert revocations._filters == {100: b"\x80", 101: b"\xc0"}
+
+    def test_filter_bits_follow_setbit_order(self):
+        """Test local checks read bits the way Redis SETBIT writes them."""
+        from shared.revocation import RevocationList
+
+        assert RevocationList._has_bits(b"\x80", [0])
+        assert RevocationList._has_bits(b"\x00\x01", [15])
+        assert not RevocationList._has_bits(b"\x01", [0])
+        assert not RevocationList._has_bits(b"", [3])
+
+    @pytest.mark.asyncio
+    async def test_ending_sessions_revokes_every_live_token(self):
+        """Test tokens from other devices and earlier refreshes are revoked too."""
+        import time
+        from unittest.mock import AsyncMock
+
+        from app.main import end_sessions
+
+        exp = time.time() + 600
+        revocations = self.make_list(exists=1)
+        revocations.redis.zrangebyscore = AsyncMock(
+            return_value=[("phone", exp), ("laptop", exp)]
+        )
+        with patch("app.main.revocation_list", revocations), patch(
+            "app.main.redis_client", None
+        ), patch("app.main.refresh_store", None):
+            await end_sessions("u1", {"jti": "presented", "exp": exp})
+
+        revocations.redis.zrangebyscore.assert_awaited_once_with(
+            "user-tokens:u1", ANY, "+inf", withscores=True
+        )
+        for jti in ("presented", "phone", "laptop"):
+            assert await revocations.is_revoked(jti, exp) is True
+        revocations.redis.delete.assert_awaited_once_with("user-tokens:u1")
+
+    @pytest.mark.asyncio
+    async def test_logged_out_token_fails_verification(self):
+        """Test /verify rejects a token after its owner logs out."""
+        from app.main import start_session
+
+        revocations = self.make_list(exists=1)
+        with patch("app.main.revocation_list", revocations), patch(
+            "app.main.redis_client", None
+        ), patch("app.main.refresh_store", None), patch("app.main.claims_cache", None):
+            token = await start_session(
+                TestClaimsCache.CLAIMS["user_id"], "alice", "customer"
+            )
+            headers = {"Authorization": f"Bearer {token}"}
+            async with AsyncClient(app=app, base_url="http://test") as client:
+                logout = await client.post("/logout", headers=headers)
+                verify = await client.get("/verify", headers=headers)
+
+        assert logout.status_code == 200
+        assert verify.status_code == 401
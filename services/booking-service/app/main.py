@@ -1,4 +1,5 @@
 import asyncio
+import json
 import logging
 import os
 import random
@@ -6,24 +7,38 @@ import string
 import time
 import uuid
 from contextvars import ContextVar
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 import httpx
 import redis.asyncio as redis
-from fastapi import Depends, FastAPI, HTTPException, Request, status
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordBearer
 from prometheus_client import Counter, Gauge, Histogram
 from prometheus_fastapi_instrumentator import Instrumentator
 from pydantic import BaseModel
-from sqlalchemy import DECIMAL, Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import DECIMAL, Column, DateTime, ForeignKey, Index, Integer, String
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base
 from starlette.middleware.base import BaseHTTPMiddleware
 
+from shared.auth import BatchVerifier, TokenVerificationCache, user_from_claims
+from shared.cache import TTLCache
+from shared.distributed_patterns import LeaderElection
+from shared.http_client import ServiceClientRegistry
+from shared.jwks import JWKSVerifier, TokenVerificationError
+from shared.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    InvalidPageRequest,
+    Pager,
+)
+from shared.revocation import RevocationList
+from shared.seat_map import SeatMap
+
 # Correlation ID context
 correlation_id_ctx: ContextVar[str] = ContextVar("correlation_id", default="")
 
@@ -45,13 +60,31 @@ logger.addFilter(CorrelationIdFilter())
 # Custom metrics
 booking_counter = Counter("bookings_total", "Total booking attempts", ["status"])
 lock_acquisition_histogram = Histogram(
-    "lock_acquisition_seconds", "Lock acquisition duration"
+    "lock_acquisition_seconds", "Atomic seat claim duration"
+)
+seat_conflict_counter = Counter(
+    "seat_conflicts_total", "Seat claims rejected because a seat was already held"
 )
-lock_wait_counter = Counter("lock_wait_total", "Total lock wait/retry attempts")
 active_bookings_gauge = Gauge("active_bookings", "Number of active pending bookings")
 seat_reservation_histogram = Histogram(
     "seat_reservation_seconds", "Seat reservation duration"
 )
+expiry_lag_histogram = Histogram(
+    "booking_expiry_lag_seconds",
+    "Delay between a booking's expires_at and its expiry being processed",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+expiry_claims_counter = Counter(
+    "booking_expiry_claims_total",
+    "Bookings claimed from the expiry timer",
+    ["result"],
+)
+expiry_leader_gauge = Gauge(
+    "booking_expiry_leader", "1 if this replica runs booking expiry, else 0"
+)
+showtime_cache_counter = Counter(
+    "showtime_cache_total", "Showtime lookup cache results", ["result"]
+)
 circuit_breaker_state = Gauge(
     "circuit_breaker_state",
     "Circuit breaker state (0=closed, 1=open, 2=half-open)",
@@ -126,6 +159,37 @@ REDIS_URL = os.getenv("REDIS_URL", "redis://:redis123@redis:6379/2")
 AUTH_SERVICE_URL = os.getenv("AUTH_SERVICE_URL", "http://auth-service:8000")
 MOVIE_SERVICE_URL = os.getenv("MOVIE_SERVICE_URL", "http://movie-service:8000")
 REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT", "10.0"))
+AUTH_REQUEST_TIMEOUT = float(os.getenv("AUTH_REQUEST_TIMEOUT", str(REQUEST_TIMEOUT)))
+MOVIE_REQUEST_TIMEOUT = float(os.getenv("MOVIE_REQUEST_TIMEOUT", str(REQUEST_TIMEOUT)))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "false").lower() == "true"
+SEAT_HOLD_TTL = int(os.getenv("SEAT_HOLD_TTL", "900"))  # 15 minutes
+# Seat changes kept per showtime for delta reads (count, seconds)
+SEAT_LOG_SIZE = int(os.getenv("SEAT_LOG_SIZE", "512"))
+SEAT_LOG_TTL = int(os.getenv("SEAT_LOG_TTL", "86400"))
+EXPIRY_BATCH_SIZE = int(os.getenv("EXPIRY_BATCH_SIZE", "500"))
+EXPIRY_MAX_SLEEP = float(os.getenv("EXPIRY_MAX_SLEEP", "5"))
+EXPIRY_RESEED_INTERVAL = float(os.getenv("EXPIRY_RESEED_INTERVAL", "300"))
+EXPIRY_LEADER_LEASE = float(os.getenv("EXPIRY_LEADER_LEASE", "15"))
+SHOWTIME_CACHE_TTL = float(os.getenv("SHOWTIME_CACHE_TTL", "30"))
+SHOWTIME_CACHE_SIZE = int(os.getenv("SHOWTIME_CACHE_SIZE", "1024"))
+# Where movie-service's catalog cache announces changed groups
+CATALOG_INVALIDATION_CHANNEL = os.getenv(
+    "CATALOG_INVALIDATION_CHANNEL", "catalog:invalidations"
+)
+TOKEN_CACHE_TTL = float(os.getenv("TOKEN_CACHE_TTL", "60"))
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+# Concurrent token cache misses share one /verify/batch call, sent when this
+# many are waiting or this many ms after the first
+AUTH_VERIFY_BATCH_SIZE = int(os.getenv("AUTH_VERIFY_BATCH_SIZE", "100"))
+AUTH_VERIFY_BATCH_WAIT_MS = float(os.getenv("AUTH_VERIFY_BATCH_WAIT_MS", "2"))
+# Auth-service's Redis, where revoked tokens are recorded
+REVOCATION_REDIS_URL = os.getenv(
+    "REVOCATION_REDIS_URL", "redis://:redis123@redis:6379/0"
+)
+REVOCATION_SYNC_INTERVAL = float(os.getenv("REVOCATION_SYNC_INTERVAL", "5"))
+JWKS_CACHE_TTL = float(os.getenv("JWKS_CACHE_TTL", "300"))
 CORS_ORIGINS = os.getenv(
     "CORS_ORIGINS", "http://localhost:8080,http://localhost:3000"
 ).split(",")
@@ -147,6 +211,10 @@ Base = declarative_base()
 # Models
 class Booking(Base):
     __tablename__ = "bookings"
+    # Serves a user's booking history, newest first
+    __table_args__ = (
+        Index("idx_bookings_user_created", "user_id", "created_at", "id"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), nullable=False)
@@ -197,6 +265,11 @@ class BookingResponse(BaseModel):
         from_attributes = True
 
 
+BOOKINGS_PAGE = Pager(
+    Booking, BookingResponse, (Booking.created_at, Booking.id), descending=True
+)
+
+
 class PaymentStatusUpdate(BaseModel):
     payment_status: str
     status: Optional[str] = None
@@ -205,21 +278,22 @@ class PaymentStatusUpdate(BaseModel):
 app = FastAPI(
     title="Booking Service",
     description="""
-## Ticket Booking Service with Distributed Locking
+## Ticket Booking Service with Atomic Seat Reservation
 
-This service handles ticket booking operations with **Redis-based distributed locking** to prevent race conditions.
+This service handles ticket booking operations with **atomic per-seat reservation in Redis** to prevent race conditions.
 
 ### Features:
-- 🎫 **Book Tickets** - Reserve seats with distributed lock protection
-- 🔒 **Distributed Locking** - Redis SET NX EX pattern prevents double-booking
+- 🎫 **Book Tickets** - Reserve seats with an all-or-nothing Redis claim
+- 🔒 **Per-Seat Holds** - One Lua script claims every `seat:{showtime}:{seat}` key or none
 - ❌ **Cancel Booking** - Release seats and refund
 - 📋 **View Bookings** - Get user's booking history
 
-### Distributed Locking Flow:
-1. Acquire lock on showtime: `SET lock:showtime:{id} locked NX EX 10`
-2. Check seat availability in Redis
-3. Reserve seats and create booking
-4. Release lock
+### Reservation Flow:
+1. Validate showtime price and capacity
+2. Atomically claim all requested `seat:{showtime}:{seat}` keys (fails if any is held)
+3. Create booking; on failure release only the seats owned by this booking
+
+Buyers for different seats of the same showtime proceed in parallel.
 
 ### Booking States:
 - `pending` - Awaiting payment (15 min expiry)
@@ -230,7 +304,7 @@ This service handles ticket booking operations with **Redis-based distributed lo
     openapi_tags=[
         {
             "name": "Booking",
-            "description": "Ticket booking operations with distributed locking",
+            "description": "Ticket booking operations with atomic seat reservation",
         },
         {"name": "Health", "description": "Service health checks"},
     ],
@@ -261,11 +335,68 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
     allow_headers=["Authorization", "Content-Type", "X-Correlation-ID"],
+    # Readable by cross-origin frontends: the cursor of the next page
+    expose_headers=["X-Next-Cursor"],
 )
 
 redis_client: Optional[redis.Redis] = None
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# Pooled clients for downstream services (opened at startup, closed at shutdown)
+service_clients = ServiceClientRegistry()
+auth_client = service_clients.register(
+    "auth-service",
+    AUTH_SERVICE_URL,
+    timeout=AUTH_REQUEST_TIMEOUT,
+    max_connections=HTTP_MAX_CONNECTIONS,
+    max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+    http2=HTTP2_ENABLED,
+)
+movie_client = service_clients.register(
+    "movie-service",
+    MOVIE_SERVICE_URL,
+    timeout=MOVIE_REQUEST_TIMEOUT,
+    max_connections=HTTP_MAX_CONNECTIONS,
+    max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+    http2=HTTP2_ENABLED,
+)
+
+
+token_cache = TokenVerificationCache(maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL)
+batch_verifier = BatchVerifier(
+    auth_client,
+    max_batch=AUTH_VERIFY_BATCH_SIZE,
+    max_wait=AUTH_VERIFY_BATCH_WAIT_MS / 1000,
+)
+jwks_verifier = JWKSVerifier(auth_client, cache_ttl=JWKS_CACHE_TTL)
+
+
+async def verify_token_locally(token: str) -> Optional[dict]:
+    """Verify an asymmetric token against auth-service's JWKS, None if not possible"""
+    if not jwks_verifier.can_verify(token):
+        return None
+    try:
+        claims = await jwks_verifier.verify(token)
+    except TokenVerificationError:
+        raise HTTPException(status_code=401, detail="Invalid authentication")
+    except Exception as e:
+        logger.warning(f"Local token verification unavailable: {e}")
+        return None
+    user = user_from_claims(claims)
+    if not user["user_id"]:
+        raise HTTPException(status_code=401, detail="Invalid authentication")
+    return user
+
+
+revocation_redis: Optional[redis.Redis] = None
+revocation_list: Optional[RevocationList] = None
+
+
+async def reject_revoked(token: str):
+    """401 for a verified token that has since been revoked (logout, password change)"""
+    if revocation_list and await revocation_list.is_token_revoked(token):
+        raise HTTPException(status_code=401, detail="Invalid authentication")
+
 
 async def get_db():
     async with async_session_maker() as session:
@@ -273,40 +404,41 @@ async def get_db():
 
 
 async def get_current_user(token: str = Depends(oauth2_scheme)):
-    """Verify token with auth service using Circuit Breaker"""
-    if not auth_circuit_breaker.can_execute():
-        circuit_breaker_state.labels(service="auth").set(1)
-        raise HTTPException(
-            status_code=503, detail="Auth service temporarily unavailable"
-        )
+    """Verify token locally via JWKS, else via the local cache or auth service with a Circuit Breaker"""
+    user = await verify_token_locally(token)
+    if user is not None:
+        await reject_revoked(token)
+        return user
 
     async def call_auth_service():
-        async with httpx.AsyncClient(timeout=REQUEST_TIMEOUT) as client:
-            response = await client.get(
-                f"{AUTH_SERVICE_URL}/verify",
-                headers={
-                    "Authorization": f"Bearer {token}",
-                    "X-Correlation-ID": correlation_id_ctx.get(""),
-                },
+        # Raises on transport errors and 5xx, which are worth retrying; a
+        # rejected token comes back as None and is final
+        return await batch_verifier.verify(token)
+
+    async def verify_with_auth_service():
+        if not auth_circuit_breaker.can_execute():
+            circuit_breaker_state.labels(service="auth").set(1)
+            raise HTTPException(
+                status_code=503, detail="Auth service temporarily unavailable"
             )
-            if response.status_code == 200:
-                return response.json()
-            raise HTTPException(status_code=401, detail="Invalid authentication")
-
-    try:
-        result = await retry_with_backoff(call_auth_service, max_retries=3)
+        try:
+            result = await retry_with_backoff(call_auth_service, max_retries=3)
+        except Exception as e:
+            auth_circuit_breaker.record_failure()
+            circuit_breaker_state.labels(service="auth").set(
+                1 if auth_circuit_breaker.state == "OPEN" else 2
+            )
+            logger.error(f"Auth service call failed: {str(e)}")
+            raise HTTPException(status_code=503, detail=f"Auth service error: {str(e)}")
         auth_circuit_breaker.record_success()
         circuit_breaker_state.labels(service="auth").set(0)
         return result
-    except HTTPException:
-        raise
-    except Exception as e:
-        auth_circuit_breaker.record_failure()
-        circuit_breaker_state.labels(service="auth").set(
-            1 if auth_circuit_breaker.state == "OPEN" else 2
-        )
-        logger.error(f"Auth service call failed: {str(e)}")
-        raise HTTPException(status_code=503, detail=f"Auth service error: {str(e)}")
+
+    user = await token_cache.get_or_verify(token, verify_with_auth_service)
+    if user is None:
+        raise HTTPException(status_code=401, detail="Invalid authentication")
+    await reject_revoked(token)
+    return user
 
 
 def generate_booking_code() -> str:
@@ -314,97 +446,363 @@ def generate_booking_code() -> str:
     return "".join(random.choices(string.ascii_uppercase + string.digits, k=10))
 
 
-async def acquire_lock(lock_name: str, expire_time: int = 10) -> bool:
-    """Acquire distributed lock using Redis"""
-    start_time = time.time()
-    lock_key = f"lock:{lock_name}"
-    acquired = await redis_client.set(lock_key, "locked", nx=True, ex=expire_time)
-    lock_acquisition_histogram.observe(time.time() - start_time)
-    return acquired is not None
+showtime_cache = TTLCache(maxsize=SHOWTIME_CACHE_SIZE, ttl=SHOWTIME_CACHE_TTL)
+# Bumped whenever the cache is dropped, so a fetch that was in flight then
+# does not store what it read
+showtime_cache_epoch = 0
+
+
+async def get_showtime(showtime_id: str) -> Optional[dict]:
+    """Fetch one showtime from movie service, served from the local cache when fresh"""
+    showtime = showtime_cache.get(showtime_id)
+    if showtime is not None:
+        showtime_cache_counter.labels(result="hit").inc()
+        return showtime
+
+    showtime_cache_counter.labels(result="miss").inc()
+    epoch = showtime_cache_epoch
+    try:
+        response = await movie_client.get(
+            f"/showtimes/{showtime_id}",
+            headers={"X-Correlation-ID": correlation_id_ctx.get("")},
+        )
+    except httpx.RequestError as e:
+        logger.error(f"Movie service request error: {e}")
+        raise HTTPException(status_code=503, detail="Movie service unavailable")
+
+    if response.status_code == 404:
+        return None
+    if response.status_code != 200:
+        raise HTTPException(status_code=502, detail="Movie service error")
+
+    showtime = response.json()
+    if epoch == showtime_cache_epoch:
+        showtime_cache.set(showtime_id, showtime)
+    return showtime
+
 
+def drop_cached_showtimes() -> None:
+    global showtime_cache_epoch
+    showtime_cache.clear()
+    showtime_cache_epoch += 1
 
-async def release_lock(lock_name: str):
-    """Release distributed lock"""
-    await redis_client.delete(f"lock:{lock_name}")
-    logger.info(f"Released lock: {lock_name}")
+
+async def watch_showtime_changes():
+    """
+    Drop the cached showtimes whenever movie-service invalidates its showtimes
+
+    Movie-service publishes the new generations of the catalog groups it
+    invalidates; pub/sub spans every database of a Redis server, so every
+    replica hears them on its own client. While the subscription is down,
+    entries still expire after SHOWTIME_CACHE_TTL.
+    """
+    while True:
+        pubsub = redis_client.pubsub()
+        try:
+            await pubsub.subscribe(CATALOG_INVALIDATION_CHANNEL)
+            # Changes announced while we were not listening are lost
+            drop_cached_showtimes()
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                try:
+                    groups = json.loads(message["data"])
+                except ValueError as e:
+                    logger.warning(f"Malformed catalog invalidation: {e}")
+                    continue
+                if isinstance(groups, dict) and "showtimes" in groups:
+                    drop_cached_showtimes()
+                    showtime_cache_counter.labels(result="invalidated").inc()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Showtime change subscription failed: {e}")
+            await asyncio.sleep(1)
+        finally:
+            try:
+                await pubsub.close()
+            except Exception:
+                pass
+
+
+# =====================================================
+# SEAT RESERVATION ENGINE
+# =====================================================
+class SeatReservationEngine(SeatMap):
+    """
+    All-or-nothing seat holds in the showtime's compact seat map.
+
+    Every requested seat of `seatmap:{showtime}` is checked and claimed inside
+    a single Lua script, so a booking either holds all of its seats or none of
+    them. Buyers competing for different seats of the same showtime never wait
+    on each other; only buyers asking for the same seat conflict.
+
+    Each hold records its holder (the booking id), which lets release only
+    free seats that still belong to that holder.
+    """
+
+    def __init__(self, redis_client: redis.Redis, hold_ttl: int = SEAT_HOLD_TTL):
+        super().__init__(
+            redis_client,
+            hold_ttl=hold_ttl,
+            log_size=SEAT_LOG_SIZE,
+            log_ttl=SEAT_LOG_TTL,
+        )
+
+    async def reserve(
+        self, showtime_id: str, seat_ids: List[str], holder: str
+    ) -> Optional[str]:
+        start_time = time.time()
+        conflict = await super().reserve(showtime_id, seat_ids, holder)
+        lock_acquisition_histogram.observe(time.time() - start_time)
+        if conflict:
+            seat_conflict_counter.inc()
+        return conflict
+
+
+seat_engine: Optional[SeatReservationEngine] = None
+
+
+# =====================================================
+# BOOKING EXPIRY SCHEDULER
+# =====================================================
+class BookingExpiryScheduler:
+    """
+    Redis sorted-set timer that expires pending bookings at `expires_at`.
+
+    Each pending booking is a member of `booking:expiry` scored by its expiry
+    time. Due members are claimed (read and removed) by one Lua script, so a
+    booking is handed to exactly one worker even with several replicas. The
+    worker sleeps until the earliest scheduled expiry instead of polling.
+    """
+
+    KEY = "booking:expiry"
+
+    CLAIM_SCRIPT = """
+    local due = redis.call(
+        "zrangebyscore", KEYS[1], "-inf", ARGV[1], "WITHSCORES", "LIMIT", 0, ARGV[2]
+    )
+    for i = 1, #due, 2 do
+        redis.call("zrem", KEYS[1], due[i])
+    end
+    return due
+    """
+
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        batch_size: int = EXPIRY_BATCH_SIZE,
+        max_sleep: float = EXPIRY_MAX_SLEEP,
+    ):
+        self.redis = redis_client
+        self.batch_size = batch_size
+        self.max_sleep = max_sleep
+        self._claim = redis_client.register_script(self.CLAIM_SCRIPT)
+        self._wakeup = asyncio.Event()
+
+    @staticmethod
+    def timestamp(expires_at: datetime) -> float:
+        return expires_at.replace(tzinfo=timezone.utc).timestamp()
+
+    async def schedule(self, booking_id: str, expires_at: datetime) -> None:
+        await self.redis.zadd(self.KEY, {booking_id: self.timestamp(expires_at)})
+        # Wake the worker in case this is now the earliest expiry
+        self._wakeup.set()
+
+    async def schedule_many(self, expiries: Dict[str, float]) -> int:
+        """Add {booking_id: expiry timestamp} entries that are not scheduled yet"""
+        if not expiries:
+            return 0
+        added = await self.redis.zadd(self.KEY, expiries, nx=True)
+        self._wakeup.set()
+        return added
+
+    async def cancel(self, booking_id: str) -> None:
+        await self.redis.zrem(self.KEY, booking_id)
+
+    async def claim_due(self, now: Optional[float] = None) -> Dict[str, float]:
+        """
+        Atomically take up to `batch_size` bookings whose expiry has passed.
+
+        Returns {booking_id: scheduled expiry timestamp}.
+        """
+        now = time.time() if now is None else now
+        due = await self._claim(keys=[self.KEY], args=[now, self.batch_size])
+        return {due[i]: float(due[i + 1]) for i in range(0, len(due), 2)}
+
+    async def seconds_until_next(self) -> float:
+        nxt = await self.redis.zrange(self.KEY, 0, 0, withscores=True)
+        if not nxt:
+            return self.max_sleep
+        return min(self.max_sleep, max(0.0, nxt[0][1] - time.time()))
+
+    async def wait_for_next(self) -> None:
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(
+                self._wakeup.wait(), timeout=await self.seconds_until_next()
+            )
+        except asyncio.TimeoutError:
+            pass
+
+
+expiry_scheduler: Optional[BookingExpiryScheduler] = None
+
+
+async def expire_bookings(booking_ids: List[str]) -> int:
+    """Expire still-pending bookings and release their seats in bulk"""
+    from sqlalchemy import update
+
+    ids = [uuid.UUID(bid) for bid in booking_ids]
+    async with async_session_maker() as db:
+        result = await db.execute(
+            update(Booking)
+            .where(Booking.id.in_(ids), Booking.status == "pending")
+            .values(status="expired", updated_at=datetime.utcnow())
+            .returning(Booking.id)
+        )
+        expired_ids = [row.id for row in result]
+        holds = []
+        if expired_ids:
+            seat_result = await db.execute(
+                update(BookingSeat)
+                .where(BookingSeat.booking_id.in_(expired_ids))
+                .values(status="expired")
+                .returning(
+                    BookingSeat.showtime_id, BookingSeat.seat_id, BookingSeat.booking_id
+                )
+            )
+            holds = [
+                (str(row.showtime_id), str(row.seat_id), str(row.booking_id))
+                for row in seat_result
+            ]
+        await db.commit()
+
+    await seat_engine.release_holds(holds)
+    # Claimed bookings that were already paid or cancelled are skipped
+    expiry_claims_counter.labels(result="expired").inc(len(expired_ids))
+    expiry_claims_counter.labels(result="skipped").inc(len(ids) - len(expired_ids))
+    if expired_ids:
+        active_bookings_gauge.dec(len(expired_ids))
+        booking_counter.labels(status="expired").inc(len(expired_ids))
+        logger.info(f"Expired {len(expired_ids)} bookings, released {len(holds)} seats")
+    return len(expired_ids)
+
+
+async def reseed_expiry_schedule() -> int:
+    """Schedule every pending booking from the database (safety net for lost timers)"""
+    from sqlalchemy import select
+
+    async with async_session_maker() as db:
+        result = await db.execute(
+            select(Booking.id, Booking.expires_at).filter(Booking.status == "pending")
+        )
+        pending = {
+            str(row.id): BookingExpiryScheduler.timestamp(row.expires_at)
+            for row in result
+            if row.expires_at
+        }
+    return await expiry_scheduler.schedule_many(pending)
 
 
 # =====================================================
 # BACKGROUND TASK: Expired Booking Cleanup
 # =====================================================
 async def cleanup_expired_bookings():
-    """Background task to clean up expired bookings and release seats"""
+    """Background task that expires bookings as their hold runs out (leader only)"""
+    last_reseed: Optional[float] = None
     while True:
         try:
-            await asyncio.sleep(60)  # Run every minute
-            async with async_session_maker() as db:
-                from sqlalchemy import select, update
-
-                # Find expired pending bookings
-                result = await db.execute(
-                    select(Booking).filter(
-                        Booking.status == "pending",
-                        Booking.expires_at < datetime.utcnow(),
-                    )
-                )
-                expired_bookings = result.scalars().all()
-
-                for booking in expired_bookings:
-                    logger.info(f"Cleaning up expired booking: {booking.booking_code}")
-
-                    # Release seats from Redis
-                    seat_result = await db.execute(
-                        select(BookingSeat).filter(BookingSeat.booking_id == booking.id)
-                    )
-                    booking_seats = seat_result.scalars().all()
-
-                    for bs in booking_seats:
-                        seat_key = f"seat:{bs.showtime_id}:{bs.seat_id}"
-                        await redis_client.delete(seat_key)
-                        await db.execute(
-                            update(BookingSeat)
-                            .where(BookingSeat.id == bs.id)
-                            .values(status="expired")
-                        )
-
-                    # Update booking status
-                    await db.execute(
-                        update(Booking)
-                        .where(Booking.id == booking.id)
-                        .values(status="expired")
-                    )
-                    active_bookings_gauge.dec()
-                    booking_counter.labels(status="expired").inc()
-
-                await db.commit()
-
-                if expired_bookings:
-                    logger.info(f"Cleaned up {len(expired_bookings)} expired bookings")
+            if not expiry_leader.is_leader:
+                await expiry_leader.wait_for_leadership()
+                # A new leader re-seeds the timer before processing
+                last_reseed = None
+                continue
+
+            if (
+                last_reseed is None
+                or time.monotonic() - last_reseed > EXPIRY_RESEED_INTERVAL
+            ):
+                added = await reseed_expiry_schedule()
+                if added:
+                    logger.info(f"Rescheduled {added} pending bookings for expiry")
+                last_reseed = time.monotonic()
+
+            now = time.time()
+            due = await expiry_scheduler.claim_due(now)
+            if not due:
+                await expiry_scheduler.wait_for_next()
+                continue
+
+            for expires_at in due.values():
+                expiry_lag_histogram.observe(max(0.0, now - expires_at))
+            try:
+                await expire_bookings(list(due))
+            except Exception:
+                # Put the claimed bookings back so another pass retries them
+                await expiry_scheduler.schedule_many(due)
+                raise
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
             logger.error(f"Error in cleanup task: {str(e)}")
+            await asyncio.sleep(EXPIRY_MAX_SLEEP)
 
 
 cleanup_task: Optional[asyncio.Task] = None
+showtime_watch_task: Optional[asyncio.Task] = None
+expiry_leader: Optional[LeaderElection] = None
 
 
 @app.on_event("startup")
 async def startup_event():
-    global redis_client, cleanup_task
+    global redis_client, cleanup_task, seat_engine, expiry_scheduler, expiry_leader
+    global showtime_watch_task
+    global revocation_redis, revocation_list
     redis_client = await redis.from_url(REDIS_URL, decode_responses=True)
+    revocation_redis = await redis.from_url(REVOCATION_REDIS_URL, decode_responses=True)
+    revocation_list = RevocationList(
+        revocation_redis, sync_interval=REVOCATION_SYNC_INTERVAL
+    )
+    await revocation_list.start()
+    seat_engine = SeatReservationEngine(redis_client)
+    expiry_scheduler = BookingExpiryScheduler(redis_client)
+    expiry_leader = LeaderElection(
+        redis_client,
+        "booking-expiry",
+        lease_seconds=EXPIRY_LEADER_LEASE,
+        on_change=lambda is_leader: expiry_leader_gauge.set(1 if is_leader else 0),
+    )
+    await service_clients.start_all()
+    try:
+        await jwks_verifier.refresh()
+    except Exception as e:
+        logger.warning(f"Could not prefetch JWKS, will retry on demand: {e}")
 
     # Create tables if not exist
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
-    # Start background cleanup task
+    # Start background cleanup task; only the elected replica processes expiries
+    await expiry_leader.start()
     cleanup_task = asyncio.create_task(cleanup_expired_bookings())
     logger.info("Started expired booking cleanup task")
+    showtime_watch_task = asyncio.create_task(watch_showtime_changes())
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     if cleanup_task:
         cleanup_task.cancel()
+    if showtime_watch_task:
+        showtime_watch_task.cancel()
+    if expiry_leader:
+        await expiry_leader.stop()
+    await service_clients.close_all()
+    if revocation_list:
+        await revocation_list.stop()
+    if revocation_redis:
+        await revocation_redis.close()
     if redis_client:
         await redis_client.close()
 
@@ -415,7 +813,7 @@ async def root():
         "service": "Booking Service",
         "status": "running",
         "version": "1.0.0",
-        "features": ["Distributed Locking", "Seat Reservation"],
+        "features": ["Per-Seat Locking", "Seat Reservation"],
     }
 
 
@@ -430,129 +828,117 @@ async def book_tickets(
     current_user: dict = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """Book tickets with Redis distributed lock"""
-    from sqlalchemy import select, update  # noqa: F401
-
+    """Book tickets with an atomic per-seat reservation"""
     start_time = time.time()
     showtime_id = str(booking_data.showtime_id)
-    seat_ids = [str(sid) for sid in booking_data.seat_ids]
+    # Preserve request order but ignore duplicated seat ids
+    seat_ids = list(dict.fromkeys(str(sid) for sid in booking_data.seat_ids))
+
+    if not seat_ids:
+        booking_counter.labels(status="invalid").inc()
+        raise HTTPException(status_code=400, detail="No seats selected")
 
     logger.info(
         f"Booking attempt: user={current_user['user_id']}, showtime={showtime_id}, seats={len(seat_ids)}"
     )
 
-    # Acquire lock for this showtime
-    lock_name = f"showtime:{showtime_id}"
-    max_retries = 5
-    retry_count = 0
+    # Get showtime details (price, capacity) from the local cache or movie service
+    showtime = await get_showtime(showtime_id)
+    if not showtime:
+        booking_counter.labels(status="showtime_not_found").inc()
+        raise HTTPException(status_code=404, detail="Showtime not found")
+
+    if showtime["available_seats"] < len(seat_ids):
+        booking_counter.labels(status="no_seats").inc()
+        raise HTTPException(status_code=400, detail="Not enough seats available")
+
+    # Claim all seats at once; the booking id doubles as the hold owner
+    booking_id = uuid.uuid4()
+    conflict = await seat_engine.reserve(showtime_id, seat_ids, str(booking_id))
+    if conflict:
+        booking_counter.labels(status="seat_taken").inc()
+        raise HTTPException(
+            status_code=400, detail=f"Seat {conflict} is already booked"
+        )
 
-    while retry_count < max_retries:
-        if await acquire_lock(lock_name, expire_time=10):
-            logger.info(f"Lock acquired for {lock_name} after {retry_count} retries")
-            try:
-                # Verify seats availability in Redis
-                for seat_id in seat_ids:
-                    seat_key = f"seat:{showtime_id}:{seat_id}"
-                    is_booked = await redis_client.get(seat_key)
-                    if is_booked:
-                        booking_counter.labels(status="seat_taken").inc()
-                        raise HTTPException(
-                            status_code=400, detail=f"Seat {seat_id} is already booked"
-                        )
-
-                # Get showtime details from movie service
-                async with httpx.AsyncClient() as client:
-                    response = await client.get(f"{MOVIE_SERVICE_URL}/showtimes")
-                    showtimes = response.json()
-                    showtime = next(
-                        (s for s in showtimes if s["id"] == showtime_id), None
-                    )
-
-                    if not showtime:
-                        booking_counter.labels(status="showtime_not_found").inc()
-                        raise HTTPException(
-                            status_code=404, detail="Showtime not found"
-                        )
-
-                    if showtime["available_seats"] < len(seat_ids):
-                        booking_counter.labels(status="no_seats").inc()
-                        raise HTTPException(
-                            status_code=400, detail="Not enough seats available"
-                        )
-
-                # Calculate total price
-                total_price = Decimal(str(showtime["price"])) * len(seat_ids)
-
-                # Create booking
-                booking_code = generate_booking_code()
-                new_booking = Booking(
-                    user_id=uuid.UUID(current_user["user_id"]),
+    try:
+        # Calculate total price
+        total_price = Decimal(str(showtime["price"])) * len(seat_ids)
+
+        # Create booking
+        booking_code = generate_booking_code()
+        new_booking = Booking(
+            id=booking_id,
+            user_id=uuid.UUID(current_user["user_id"]),
+            showtime_id=booking_data.showtime_id,
+            booking_code=booking_code,
+            total_seats=len(seat_ids),
+            total_price=total_price,
+            status="pending",
+            payment_status="unpaid",
+            expires_at=datetime.utcnow() + timedelta(seconds=SEAT_HOLD_TTL),
+        )
+        db.add(new_booking)
+
+        # Record reserved seats
+        for seat_id in seat_ids:
+            db.add(
+                BookingSeat(
+                    booking_id=booking_id,
+                    seat_id=uuid.UUID(seat_id),
                     showtime_id=booking_data.showtime_id,
-                    booking_code=booking_code,
-                    total_seats=len(seat_ids),
-                    total_price=total_price,
-                    status="pending",
-                    payment_status="unpaid",
-                    expires_at=datetime.utcnow() + timedelta(minutes=15),
+                    status="reserved",
                 )
+            )
 
-                db.add(new_booking)
-                await db.flush()
-
-                # Reserve seats
-                for seat_id in seat_ids:
-                    booking_seat = BookingSeat(
-                        booking_id=new_booking.id,
-                        seat_id=uuid.UUID(seat_id),
-                        showtime_id=booking_data.showtime_id,
-                        status="reserved",
-                    )
-                    db.add(booking_seat)
-
-                    # Mark seat as booked in Redis (15 min TTL)
-                    seat_key = f"seat:{showtime_id}:{seat_id}"
-                    await redis_client.setex(seat_key, 900, str(new_booking.id))
-
-                await db.commit()
-                await db.refresh(new_booking)
-
-                # Record success metrics
-                booking_counter.labels(status="success").inc()
-                active_bookings_gauge.inc()
-                seat_reservation_histogram.observe(time.time() - start_time)
-                logger.info(
-                    f"Booking successful: booking_code={booking_code}, duration={time.time() - start_time:.3f}s"
-                )
+        await db.commit()
+        await db.refresh(new_booking)
+    except Exception:
+        # Do not leave seats held by a booking that was never stored
+        await db.rollback()
+        await seat_engine.release(showtime_id, seat_ids, str(booking_id))
+        booking_counter.labels(status="error").inc()
+        raise
 
-                return new_booking
+    try:
+        await expiry_scheduler.schedule(str(booking_id), new_booking.expires_at)
+    except Exception as e:
+        # The periodic reseed picks the booking up from the database
+        logger.warning(f"Could not schedule expiry for booking {booking_id}: {e}")
 
-            finally:
-                # Always release the lock
-                await release_lock(lock_name)
-        else:
-            # Lock not acquired, retry
-            lock_wait_counter.inc()
-            retry_count += 1
-            logger.warning(f"Lock wait: {lock_name}, retry {retry_count}/{max_retries}")
-            await asyncio.sleep(0.5)
+    # Record success metrics
+    booking_counter.labels(status="success").inc()
+    active_bookings_gauge.inc()
+    seat_reservation_histogram.observe(time.time() - start_time)
+    logger.info(
+        f"Booking successful: booking_code={booking_code}, duration={time.time() - start_time:.3f}s"
+    )
 
-    booking_counter.labels(status="timeout").inc()
-    logger.error(f"Booking failed: lock timeout for {lock_name}")
-    raise HTTPException(status_code=503, detail="Service busy, please try again")
+    return new_booking
 
 
 @app.get("/bookings", response_model=List[BookingResponse])
 async def get_bookings(
-    current_user: dict = Depends(get_current_user), db: AsyncSession = Depends(get_db)
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
-    """Get user bookings"""
-    from sqlalchemy import select
+    """Get user bookings, newest first; the next page is in X-Next-Cursor"""
+    try:
+        query, names = BOOKINGS_PAGE.select(
+            Booking.user_id == uuid.UUID(current_user["user_id"]),
+            cursor=cursor,
+            limit=limit,
+            fields=fields,
+        )
+    except InvalidPageRequest as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    result = await db.execute(
-        select(Booking).filter(Booking.user_id == uuid.UUID(current_user["user_id"]))
-    )
-    bookings = result.scalars().all()
-    return bookings
+    result = await db.execute(query)
+    body, headers = BOOKINGS_PAGE.dump(result.all(), limit, names)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 @app.get("/bookings/{booking_id}", response_model=BookingResponse)
@@ -617,18 +1003,21 @@ async def cancel_booking(
     )
     booking_seats = seat_result.scalars().all()
 
-    for bs in booking_seats:
-        seat_key = f"seat:{bs.showtime_id}:{bs.seat_id}"
-        await redis_client.delete(seat_key)
+    await seat_engine.release(
+        str(booking.showtime_id),
+        [str(bs.seat_id) for bs in booking_seats],
+        str(booking.id),
+    )
 
-        # Update seat status
-        await db.execute(
-            update(BookingSeat)
-            .where(BookingSeat.id == bs.id)
-            .values(status="cancelled")
-        )
+    # Update seat status
+    await db.execute(
+        update(BookingSeat)
+        .where(BookingSeat.booking_id == booking_id)
+        .values(status="cancelled")
+    )
 
     await db.commit()
+    await expiry_scheduler.cancel(str(booking_id))
 
     active_bookings_gauge.dec()
     booking_counter.labels(status="cancelled").inc()
@@ -687,6 +1076,8 @@ async def update_booking_payment_status(
         update(Booking).where(Booking.id == booking_id).values(**update_values)
     )
     await db.commit()
+    if update_data.status and update_data.status != "pending":
+        await expiry_scheduler.cancel(str(booking_id))
 
     logger.info(
         f"Booking payment status updated: booking={booking_id}, status={update_data.payment_status}"
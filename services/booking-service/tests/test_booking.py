@@ -4,12 +4,16 @@
 # =====================================================
 import os
 import sys
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from httpx import AsyncClient
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# services/ holds the shared package
+sys.path.insert(
+    0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
 
 from app.main import CircuitBreaker, app
 
@@ -80,3 +84,686 @@ class TestBookingEndpoint:
         async with AsyncClient(app=app, base_url="http://test") as client:
             response = await client.get("/bookings")
             assert response.status_code == 401
+
+    @pytest.mark.asyncio
+    async def test_get_bookings_pages_by_cursor(self):
+        """Test bookings are paged newest first with a keyset cursor."""
+        import uuid
+        from datetime import datetime, timedelta
+        from decimal import Decimal
+        from types import SimpleNamespace
+        from unittest.mock import MagicMock
+
+        from sqlalchemy.dialects import postgresql
+
+        from app.main import BOOKINGS_PAGE, get_current_user, get_db
+
+        user_id = uuid.uuid4()
+        newest = datetime(2026, 3, 1, 12, 0)
+        rows = [
+            SimpleNamespace(
+                id=uuid.uuid4(),
+                booking_code=f"BK{i}",
+                total_price=Decimal("10.00"),
+                created_at=newest - timedelta(minutes=i),
+            )
+            for i in range(3)
+        ]
+        result = MagicMock()
+        result.all.return_value = rows
+        session = MagicMock()
+        session.execute = AsyncMock(return_value=result)
+
+        async def override_db():
+            yield session
+
+        app.dependency_overrides[get_db] = override_db
+        app.dependency_overrides[get_current_user] = lambda: {"user_id": str(user_id)}
+        try:
+            async with AsyncClient(app=app, base_url="http://test") as client:
+                response = await client.get(
+                    "/bookings?limit=2&fields=booking_code,total_price,id"
+                )
+                cursor = response.headers["X-Next-Cursor"]
+                await client.get(f"/bookings?limit=2&fields=id&cursor={cursor}")
+                bad_cursor = await client.get("/bookings?cursor=not-a-cursor")
+                bad_field = await client.get("/bookings?fields=password")
+        finally:
+            app.dependency_overrides.clear()
+
+        assert response.status_code == 200
+        # Projected fields only, in model order; the extra row is trimmed
+        assert response.json() == [
+            {
+                "id": str(row.id),
+                "booking_code": row.booking_code,
+                "total_price": "10.00",
+            }
+            for row in rows[:2]
+        ]
+        assert BOOKINGS_PAGE.decode(cursor) == [rows[1].created_at, rows[1].id]
+        sql = str(
+            session.execute.await_args.args[0].compile(dialect=postgresql.dialect())
+        )
+        assert "(bookings.created_at, bookings.id) < (" in sql
+        assert "ORDER BY bookings.created_at DESC, bookings.id DESC" in sql
+        assert bad_cursor.status_code == 400
+        assert bad_field.status_code == 400
+
+
+class TestSeatReservationEngine:
+    """Test atomic per-seat reservation."""
+
+    def _engine(self, reserve_result=0, release_result=0):
+        from unittest.mock import MagicMock
+
+        from app.main import SeatReservationEngine
+
+        redis_client = MagicMock()
+        redis_client.register_script.side_effect = [
+            AsyncMock(return_value=reserve_result),
+            AsyncMock(return_value=release_result),
+        ]
+        return SeatReservationEngine(redis_client, hold_ttl=60)
+
+    def test_seat_map_key_format(self):
+        """Test a showtime's seats share one seatmap:{showtime} key."""
+        from app.main import SeatReservationEngine
+
+        assert SeatReservationEngine.key("st") == "seatmap:st"
+
+    @pytest.mark.asyncio
+    async def test_reserve_claims_all_seats_in_one_call(self):
+        """Test all seats are passed to a single script call."""
+        engine = self._engine(reserve_result=0)
+
+        conflict = await engine.reserve("st", ["s1", "s2"], "booking-1")
+
+        assert conflict is None
+        engine._reserve.assert_awaited_once_with(
+            keys=["seatmap:st", "seatmap-log:st"],
+            args=[
+                "booking-1",
+                60000,
+                "seatmap-events:st",
+                512,
+                86400000,
+                "s1",
+                "s2",
+            ],
+        )
+
+    @pytest.mark.asyncio
+    async def test_reserve_reports_conflicting_seat(self):
+        """Test the script's 1-based conflict index maps back to the seat id."""
+        engine = self._engine(reserve_result=2)
+
+        conflict = await engine.reserve("st", ["s1", "s2", "s3"], "booking-1")
+
+        assert conflict == "s2"
+
+    @pytest.mark.asyncio
+    async def test_release_without_seats_skips_redis(self):
+        """Test releasing nothing does not call Redis."""
+        engine = self._engine()
+
+        assert await engine.release("st", [], "booking-1") == 0
+        engine._release.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_release_holds_is_one_multi_key_call(self):
+        """Test holds of several bookings are released in one script call."""
+        engine = self._engine(release_result=2)
+
+        released = await engine.release_holds(
+            [("st1", "s1", "booking-1"), ("st2", "s9", "booking-2")]
+        )
+
+        assert released == 2
+        engine._release.assert_awaited_once_with(
+            keys=["seatmap:st1", "seatmap-log:st1", "seatmap:st2", "seatmap-log:st2"],
+            args=[
+                512,
+                86400000,
+                "s1",
+                "booking-1",
+                "seatmap-events:st1",
+                "s9",
+                "booking-2",
+                "seatmap-events:st2",
+            ],
+        )
+
+
+class TestBookingExpiryScheduler:
+    """Test the sorted-set expiry timer."""
+
+    def _scheduler(self, claim_result=None):
+        from unittest.mock import MagicMock
+
+        from app.main import BookingExpiryScheduler
+
+        redis_client = MagicMock()
+        redis_client.register_script.return_value = AsyncMock(
+            return_value=claim_result or []
+        )
+        redis_client.zadd = AsyncMock(return_value=1)
+        redis_client.zrange = AsyncMock(return_value=[])
+        return BookingExpiryScheduler(redis_client, batch_size=100, max_sleep=5)
+
+    @pytest.mark.asyncio
+    async def test_schedule_scores_by_expiry_time(self):
+        """Test bookings are scored by their UTC expiry timestamp."""
+        from datetime import datetime
+
+        scheduler = self._scheduler()
+        await scheduler.schedule("booking-1", datetime(2030, 1, 1))
+
+        scheduler.redis.zadd.assert_awaited_once_with(
+            "booking:expiry", {"booking-1": 1893456000.0}
+        )
+
+    @pytest.mark.asyncio
+    async def test_claim_due_returns_ids_with_scores(self):
+        """Test the claim script's flat reply maps to {booking_id: expiry}."""
+        scheduler = self._scheduler(claim_result=["b1", "100.5", "b2", "101"])
+
+        due = await scheduler.claim_due(now=200)
+
+        assert due == {"b1": 100.5, "b2": 101.0}
+        scheduler._claim.assert_awaited_once_with(
+            keys=["booking:expiry"], args=[200, 100]
+        )
+
+    @pytest.mark.asyncio
+    async def test_sleep_is_capped_when_nothing_is_scheduled(self):
+        """Test the worker wakes up periodically with an empty schedule."""
+        scheduler = self._scheduler()
+
+        assert await scheduler.seconds_until_next() == 5
+
+
+class TestLeaderElection:
+    """Test lease-based leader election for the expiry worker."""
+
+    def _election(self, eval_result):
+        from unittest.mock import MagicMock
+
+        from shared.distributed_patterns import LeaderElection
+
+        redis_client = MagicMock()
+        redis_client.eval = AsyncMock(return_value=eval_result)
+        changes = []
+        election = LeaderElection(
+            redis_client,
+            "booking-expiry",
+            lease_seconds=15,
+            identity="replica-1",
+            on_change=changes.append,
+        )
+        return election, changes
+
+    @pytest.mark.asyncio
+    async def test_acquiring_lease_makes_replica_leader(self):
+        """Test a granted lease flips leadership and reports the change."""
+        election, changes = self._election(eval_result=1)
+
+        assert await election.try_acquire() is True
+        assert election.is_leader
+        assert changes == [True]
+        args = election.redis.eval.await_args.args
+        assert args[2:] == ("leader:booking-expiry", "replica-1", 15000)
+
+    @pytest.mark.asyncio
+    async def test_lease_held_elsewhere_keeps_follower(self):
+        """Test a replica stays a follower while another holds the lease."""
+        election, changes = self._election(eval_result=0)
+
+        assert await election.try_acquire() is False
+        assert changes == []
+
+    @pytest.mark.asyncio
+    async def test_redis_error_steps_down(self):
+        """Test a leader that cannot renew its lease stops leading."""
+        election, changes = self._election(eval_result=1)
+        await election.try_acquire()
+
+        election.redis.eval.side_effect = ConnectionError("redis down")
+        assert await election.try_acquire() is False
+        assert changes == [True, False]
+
+
+class TestShowtimeCache:
+    """Test the bounded TTL cache used for showtime lookups."""
+
+    def test_cache_returns_fresh_entries(self):
+        """Test a stored value is returned until it expires."""
+        from app.main import TTLCache
+
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", {"price": 10})
+        assert cache.get("a") == {"price": 10}
+
+    def test_cache_expires_entries(self):
+        """Test entries past their TTL are dropped."""
+        from app.main import TTLCache
+
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1, ttl=-1)
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_cache_evicts_least_recently_used(self):
+        """Test the cache stays within maxsize."""
+        from app.main import TTLCache
+
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+    def test_cache_explicit_invalidation(self):
+        """Test invalidate removes a single key."""
+        from app.main import TTLCache
+
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        assert cache.invalidate("a") is True
+        assert cache.invalidate("a") is False
+        assert cache.get("a") is None
+
+    @pytest.mark.asyncio
+    async def test_showtime_invalidations_drop_the_cache(self):
+        """Test movie-service's showtime invalidations clear every entry."""
+        import asyncio
+
+        from app.main import showtime_cache, watch_showtime_changes
+
+        seen = []
+
+        async def listen():
+            showtime_cache.set("a", {"price": 10})
+            yield {"type": "subscribe", "data": 1}
+            yield {"type": "message", "data": '{"movies": 3}'}
+            seen.append(showtime_cache.get("a"))
+            yield {"type": "message", "data": '{"showtimes": 4}'}
+            seen.append(showtime_cache.get("a"))
+            raise asyncio.CancelledError
+
+        pubsub = MagicMock()
+        pubsub.subscribe = AsyncMock()
+        pubsub.close = AsyncMock()
+        pubsub.listen = listen
+        redis_client = MagicMock()
+        redis_client.pubsub.return_value = pubsub
+
+        with patch("app.main.redis_client", redis_client):
+            with pytest.raises(asyncio.CancelledError):
+                await watch_showtime_changes()
+
+        pubsub.subscribe.assert_awaited_once_with("catalog:invalidations")
+        assert seen == [{"price": 10}, None]
+
+
+class TestServiceClients:
+    """Test pooled inter-service HTTP clients."""
+
+    def test_downstream_clients_registered(self):
+        """Test one long-lived client exists per downstream service."""
+        from app.main import auth_client, movie_client, service_clients
+
+        assert service_clients["auth-service"] is auth_client
+        assert service_clients["movie-service"] is movie_client
+
+    @pytest.mark.asyncio
+    async def test_requests_reuse_one_pooled_client(self):
+        """Test consecutive calls go through the same httpx client."""
+        import httpx
+
+        from shared.http_client import ServiceClient
+
+        seen = []
+
+        def handler(request):
+            seen.append(str(request.url))
+            return httpx.Response(200, json={"ok": True})
+
+        service = ServiceClient("test-target", "http://target")
+        service._client = httpx.AsyncClient(
+            base_url="http://target", transport=httpx.MockTransport(handler)
+        )
+        pooled = service.client
+
+        await service.get("/a")
+        await service.get("/b")
+
+        assert service.client is pooled
+        assert seen == ["http://target/a", "http://target/b"]
+        await service.close()
+        assert service._client is None
+
+
+class TestTokenVerificationCache:
+    """Test the local cache of verified tokens."""
+
+    @staticmethod
+    def make_token(exp):
+        import base64
+        import json
+
+        payload = base64.urlsafe_b64encode(json.dumps({"exp": exp}).encode())
+        return f"header.{payload.decode().rstrip('=')}.signature"
+
+    @pytest.mark.asyncio
+    async def test_verified_token_is_cached(self):
+        """Test a second lookup does not call auth service again."""
+        import time
+
+        from shared.auth import TokenVerificationCache
+
+        cache = TokenVerificationCache(maxsize=10, ttl=60)
+        verify = AsyncMock(return_value={"id": "u1"})
+        token = self.make_token(time.time() + 3600)
+
+        assert await cache.get_or_verify(token, verify) == {"id": "u1"}
+        assert await cache.get_or_verify(token, verify) == {"id": "u1"}
+        assert verify.await_count == 1
+        assert token not in cache._cache._data
+
+    @pytest.mark.asyncio
+    async def test_entry_never_outlives_token_expiry(self):
+        """Test expired tokens are not cached."""
+        import time
+
+        from shared.auth import TokenVerificationCache
+
+        cache = TokenVerificationCache(maxsize=10, ttl=60)
+        verify = AsyncMock(return_value={"id": "u1"})
+        token = self.make_token(time.time() - 1)
+
+        await cache.get_or_verify(token, verify)
+        await cache.get_or_verify(token, verify)
+        assert verify.await_count == 2
+        assert len(cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_rejected_token_is_not_cached(self):
+        """Test a rejected token is verified again next time."""
+        from shared.auth import TokenVerificationCache
+
+        cache = TokenVerificationCache(maxsize=10, ttl=60)
+        verify = AsyncMock(return_value=None)
+
+        assert await cache.get_or_verify("bad-token", verify) is None
+        assert await cache.get_or_verify("bad-token", verify) is None
+        assert verify.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_call(self):
+        """Test concurrent lookups of one token make a single upstream call."""
+        import asyncio
+
+        from shared.auth import TokenVerificationCache
+
+        cache = TokenVerificationCache(maxsize=10, ttl=60)
+        calls = 0
+
+        async def verify():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"id": "u1"}
+
+        results = await asyncio.gather(
+            *(cache.get_or_verify("token", verify) for _ in range(10))
+        )
+        assert calls == 1
+        assert all(result == {"id": "u1"} for result in results)
+
+    @pytest.mark.asyncio
+    async def test_cached_token_skips_auth_service(self):
+        """Test get_current_user serves cached claims while auth is down."""
+        from app.main import auth_circuit_breaker, get_current_user, token_cache
+
+        token_cache.set("cached-token", {"id": "u1"})
+        with patch.object(auth_circuit_breaker, "can_execute", return_value=False):
+            assert await get_current_user("cached-token") == {"id": "u1"}
+        token_cache.clear()
+
+    @pytest.mark.asyncio
+    async def test_revoked_token_is_rejected_after_verification(self):
+        """Test a cached token is refused once its jti is revoked."""
+        import time
+        from unittest.mock import MagicMock
+
+        from fastapi import HTTPException
+
+        from app.main import get_current_user, token_cache
+
+        token = self.make_token(time.time() + 3600)
+        revocations = MagicMock()
+        revocations.is_token_revoked = AsyncMock(return_value=True)
+        token_cache.set(token, {"id": "u1"})
+        try:
+            with patch("app.main.revocation_list", revocations):
+                with pytest.raises(HTTPException) as exc:
+                    await get_current_user(token)
+        finally:
+            token_cache.clear()
+
+        assert exc.value.status_code == 401
+        revocations.is_token_revoked.assert_awaited_once_with(token)
+
+
+class TestBatchVerifier:
+    """Test concurrent verifications are coalesced into batch calls."""
+
+    @staticmethod
+    def make_verifier(handler, **options):
+        import httpx
+
+        from shared.auth import BatchVerifier
+        from shared.http_client import ServiceClient
+
+        auth = ServiceClient("auth-test", "http://auth")
+        auth._client = httpx.AsyncClient(
+            base_url="http://auth", transport=httpx.MockTransport(handler)
+        )
+        return BatchVerifier(auth, **options)
+
+    @pytest.mark.asyncio
+    async def test_concurrent_verifications_share_one_call(self):
+        """Test tokens verified together go out in one request, in order."""
+        import asyncio
+        import json
+
+        import httpx
+
+        batches = []
+
+        def handler(request):
+            tokens = json.loads(request.content)["tokens"]
+            batches.append(tokens)
+            return httpx.Response(
+                200,
+                json={
+                    "results": [
+                        (
+                            {"error": "invalid_token"}
+                            if token == "bad"
+                            else {"claims": {"username": token}}
+                        )
+                        for token in tokens
+                    ]
+                },
+            )
+
+        verifier = self.make_verifier(handler, max_batch=10, max_wait=0.01)
+        results = await asyncio.gather(
+            *(verifier.verify(token) for token in ["alice", "bad", "bob"])
+        )
+
+        assert batches == [["alice", "bad", "bob"]]
+        assert results == [{"username": "alice"}, None, {"username": "bob"}]
+
+    @pytest.mark.asyncio
+    async def test_short_reply_falls_back_to_single_verify(self):
+        """Test a batch answered with too few results is verified token by token."""
+        import asyncio
+
+        import httpx
+
+        def handler(request):
+            if request.url.path == "/verify/batch":
+                return httpx.Response(200, json={"results": [{"claims": {}}]})
+            token = request.headers["Authorization"].removeprefix("Bearer ")
+            if token == "bad":
+                return httpx.Response(401)
+            return httpx.Response(200, json={"username": token})
+
+        verifier = self.make_verifier(handler, max_batch=10, max_wait=0.01)
+        results = await asyncio.wait_for(
+            asyncio.gather(*(verifier.verify(t) for t in ["alice", "bad", "bob"])),
+            timeout=1,
+        )
+
+        assert results == [{"username": "alice"}, None, {"username": "bob"}]
+
+    @pytest.mark.asyncio
+    async def test_full_batch_is_sent_at_once(self):
+        """Test a batch reaching max_batch does not wait for the timer."""
+        import asyncio
+
+        import httpx
+
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(200, json={"results": [{"claims": {}}] * 2})
+
+        verifier = self.make_verifier(handler, max_batch=2, max_wait=60)
+        await asyncio.wait_for(
+            asyncio.gather(verifier.verify("a"), verifier.verify("b")), timeout=1
+        )
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_call_raises_in_every_caller(self):
+        """Test a 5xx from auth service fails the whole batch."""
+        import asyncio
+
+        import httpx
+
+        verifier = self.make_verifier(lambda request: httpx.Response(503))
+        results = await asyncio.gather(
+            verifier.verify("a"), verifier.verify("b"), return_exceptions=True
+        )
+        assert all(isinstance(result, httpx.HTTPStatusError) for result in results)
+
+
+class TestJWKSVerifier:
+    """Test local verification of asymmetric tokens."""
+
+    @staticmethod
+    def make_key(kid):
+        from cryptography.hazmat.primitives import serialization
+        from cryptography.hazmat.primitives.asymmetric import rsa
+        from jose import jwk
+
+        private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        pem = private.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ).decode()
+        public = jwk.construct(pem, "RS256").public_key().to_dict()
+        public["kid"] = kid
+        return pem, public
+
+    @staticmethod
+    def make_verifier(jwks, **options):
+        import httpx
+
+        from shared.http_client import ServiceClient
+        from shared.jwks import JWKSVerifier
+
+        fetches = []
+
+        def handler(request):
+            fetches.append(request.url.path)
+            return httpx.Response(200, json=jwks)
+
+        auth = ServiceClient("auth-test", "http://auth")
+        auth._client = httpx.AsyncClient(
+            base_url="http://auth", transport=httpx.MockTransport(handler)
+        )
+        return JWKSVerifier(auth, **options), fetches
+
+    @pytest.mark.asyncio
+    async def test_valid_token_verified_without_remote_call(self):
+        """Test a signed token is verified with one JWKS fetch and no /verify."""
+        from jose import jwt
+
+        pem, public = self.make_key("k1")
+        verifier, fetches = self.make_verifier({"keys": [public]})
+        token = jwt.encode(
+            {"sub": "alice", "user_id": "u1"},
+            pem,
+            algorithm="RS256",
+            headers={"kid": "k1"},
+        )
+
+        assert verifier.can_verify(token)
+        assert (await verifier.verify(token))["user_id"] == "u1"
+        assert (await verifier.verify(token))["sub"] == "alice"
+        assert fetches == ["/.well-known/jwks.json"]
+
+    @pytest.mark.asyncio
+    async def test_token_signed_by_other_key_is_rejected(self):
+        """Test a token whose signature does not match the published key fails."""
+        from jose import jwt
+
+        from shared.jwks import TokenVerificationError
+
+        _, public = self.make_key("k1")
+        other_pem, _ = self.make_key("k1")
+        verifier, _ = self.make_verifier({"keys": [public]})
+        token = jwt.encode(
+            {"user_id": "u1"}, other_pem, algorithm="RS256", headers={"kid": "k1"}
+        )
+
+        with pytest.raises(TokenVerificationError):
+            await verifier.verify(token)
+
+    @pytest.mark.asyncio
+    async def test_unknown_kid_triggers_refetch(self):
+        """Test a rotated key is picked up by refetching the JWKS."""
+        from jose import jwt
+
+        old_pem, old_public = self.make_key("old")
+        new_pem, new_public = self.make_key("new")
+        jwks = {"keys": [old_public]}
+        verifier, fetches = self.make_verifier(jwks, min_refresh_interval=0)
+        await verifier.refresh()
+
+        jwks["keys"] = [new_public, old_public]
+        token = jwt.encode(
+            {"user_id": "u1"}, new_pem, algorithm="RS256", headers={"kid": "new"}
+        )
+
+        assert (await verifier.verify(token))["user_id"] == "u1"
+        assert len(fetches) == 2
+
+    def test_hs256_tokens_are_left_to_auth_service(self):
+        """Test legacy shared-secret tokens are not verified locally."""
+        from jose import jwt
+
+        from shared.jwks import JWKSVerifier
+
+        token = jwt.encode({"user_id": "u1"}, "secret", algorithm="HS256")
+        assert not JWKSVerifier(client=None).can_verify(token)
@@ -11,6 +11,10 @@ import pytest
 from httpx import AsyncClient
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# services/ holds the shared package
+sys.path.insert(
+    0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
 
 from app.main import app
 
@@ -27,6 +31,16 @@ class TestHealthEndpoint:
             data = response.json()
             assert data["status"] == "healthy"
 
+    @pytest.mark.asyncio
+    async def test_cross_origin_reads_pagination_and_etag_headers(self):
+        """Test CORS exposes the cursor and ETag headers to browsers."""
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.get(
+                "/health", headers={"Origin": "http://localhost:3000"}
+            )
+        exposed = response.headers["access-control-expose-headers"]
+        assert "X-Next-Cursor" in exposed and "ETag" in exposed
+
 
 class TestMoviesEndpoint:
     """Test movies endpoints."""
@@ -67,3 +81,1746 @@ class TestTheatersEndpoint:
         async with AsyncClient(app=app, base_url="http://test") as client:
             response = await client.get("/theaters")
             assert response.status_code in [200, 500]
+
+
+class TestSeatMap:
+    """Test reading seat holds from the compact seat map."""
+
+    @pytest.mark.asyncio
+    async def test_expired_holds_are_ignored(self):
+        """Test only holds whose expiry is in the future count as held."""
+        import time as clock
+        from unittest.mock import AsyncMock, MagicMock
+
+        from shared.seat_map import SeatMap
+
+        now_ms = int(clock.time() * 1000)
+        redis_client = MagicMock()
+        redis_client.hgetall = AsyncMock(
+            return_value={
+                "seat-1": f"booking-1|{now_ms + 60000}",
+                "seat-2": f"booking-2|{now_ms - 1000}",
+            }
+        )
+        seat_map = SeatMap(redis_client)
+
+        assert await seat_map.held_seats("st") == {"seat-1"}
+        redis_client.hgetall.assert_awaited_once_with("seatmap:st")
+
+    @pytest.mark.asyncio
+    async def test_changes_since_folds_log_entries(self):
+        """Test the net change per seat is returned with the current version."""
+        import json
+        from unittest.mock import AsyncMock, MagicMock, patch
+
+        from shared.seat_map import SeatMap
+
+        entries = [
+            json.dumps({"previous": 10, "version": 11, "held": ["s1", "s2"]}),
+            json.dumps({"previous": 11, "version": 12, "released": ["s1"]}),
+        ]
+        pipe = MagicMock()
+        pipe.execute = AsyncMock(
+            return_value=[entries, [(entries[1], 12.0)], {"s2": "booking-1|99000"}]
+        )
+        redis_client = MagicMock()
+        redis_client.pipeline.return_value = pipe
+        seat_map = SeatMap(redis_client)
+
+        with patch("shared.seat_map.time.time", return_value=1.0):
+            assert await seat_map.changes_since("st", 10) == (
+                12,
+                {"s1": False, "s2": True},
+                99000,
+            )
+            # Version 9 -> 11 was trimmed from the log
+            assert await seat_map.changes_since("st", 9) == (12, None, 99000)
+
+    @pytest.mark.asyncio
+    async def test_changes_since_counts_lapsed_holds_as_released(self):
+        """Test a hold that ran out after the version is released, not unchanged."""
+        from unittest.mock import AsyncMock, MagicMock, patch
+
+        from shared.seat_map import SeatMap
+
+        pipe = MagicMock()
+        pipe.execute = AsyncMock(
+            return_value=[
+                [],
+                [("entry", 1000.0)],
+                {
+                    "s1": "booking-1|900",  # lapsed before version 1000
+                    "s2": "booking-2|1500",  # lapsed since
+                    "s3": "booking-3|5000",
+                },
+            ]
+        )
+        redis_client = MagicMock()
+        redis_client.pipeline.return_value = pipe
+        seat_map = SeatMap(redis_client)
+
+        with patch("shared.seat_map.time.time", return_value=2.0):
+            assert await seat_map.changes_since("st", 1000) == (
+                1000,
+                {"s2": False},
+                5000,
+            )
+
+    @pytest.mark.asyncio
+    async def test_seat_map_stats_endpoint(self):
+        """Test the internal endpoint reports held seats and memory."""
+        from unittest.mock import AsyncMock, patch
+
+        seat_map = AsyncMock()
+        seat_map.holds.return_value = {"seat-1": ("booking-1", 0)}
+        seat_map.memory_usage.return_value = 312
+        showtime_id = "00000000-0000-0000-0000-000000000001"
+
+        with patch("app.main.seat_map", seat_map):
+            async with AsyncClient(app=app, base_url="http://test") as client:
+                response = await client.get(
+                    f"/internal/showtimes/{showtime_id}/seat-map"
+                )
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "showtime_id": showtime_id,
+            "key": f"seatmap:{showtime_id}",
+            "held_seats": 1,
+            "memory_bytes": 312,
+        }
+
+
+class TestAvailableSeats:
+    """Test the seat availability endpoint."""
+
+    @pytest.mark.asyncio
+    async def test_layout_cached_and_holds_read_once(self):
+        """Test a repeat request skips the DB and marks held seats."""
+        import uuid
+        from types import SimpleNamespace
+        from unittest.mock import AsyncMock, MagicMock, patch
+
+        from app.main import get_db, seat_layout_cache, showtime_theater_cache
+
+        theater_id = uuid.uuid4()
+        seats = [
+            SimpleNamespace(
+                id=uuid.uuid4(), seat_row="A", seat_number=n, seat_type="regular"
+            )
+            for n in (1, 2)
+        ]
+        result = MagicMock()
+        result.all.return_value = [(theater_id, seat) for seat in seats]
+        session = MagicMock()
+        session.execute = AsyncMock(return_value=result)
+
+        async def override_db():
+            yield session
+
+        seat_map = AsyncMock()
+        seat_map.snapshot.return_value = ({str(seats[1].id)}, 7, 0)
+        showtime_id = uuid.uuid4()
+
+        app.dependency_overrides[get_db] = override_db
+        try:
+            with patch("app.main.seat_map", seat_map):
+                async with AsyncClient(app=app, base_url="http://test") as client:
+                    url = f"/showtimes/{showtime_id}/available-seats"
+                    first = await client.get(url)
+                    second = await client.get(url)
+        finally:
+            app.dependency_overrides.clear()
+            showtime_theater_cache.clear()
+            seat_layout_cache.clear()
+
+        assert first.json() == second.json()
+        data = second.json()
+        assert data["version"] == 7
+        assert second.headers["etag"] == '"7-0"'
+        assert data["available_count"] == 1
+        assert data["booked_seats"][0]["id"] == str(seats[1].id)
+        assert session.execute.await_count == 1
+        assert seat_map.snapshot.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_if_none_match_current_version_is_304(self):
+        """Test a client holding the current ETag gets 304 without a body."""
+        from unittest.mock import AsyncMock, patch
+
+        seat_map = AsyncMock()
+        seat_map.snapshot.return_value = (set(), 7, 0)
+        showtime_id = "00000000-0000-0000-0000-000000000001"
+
+        with patch("app.main.seat_map", seat_map), patch(
+            "app.main.get_seat_layout", AsyncMock(return_value=[])
+        ):
+            async with AsyncClient(app=app, base_url="http://test") as client:
+                response = await client.get(
+                    f"/showtimes/{showtime_id}/available-seats",
+                    headers={"If-None-Match": '"7-0"'},
+                )
+
+        assert response.status_code == 304
+        assert response.headers["etag"] == '"7-0"'
+        assert response.content == b""
+
+    @pytest.mark.asyncio
+    async def test_since_returns_only_changed_seats(self):
+        """Test ?since= returns the net changes without the seat list."""
+        from unittest.mock import AsyncMock, patch
+
+        seat_map = AsyncMock()
+        seat_map.changes_since.return_value = (9, {"s1": True, "s2": False}, 0)
+        layout = AsyncMock(return_value=[{"id": "s1"}, {"id": "s2"}])
+        showtime_id = "00000000-0000-0000-0000-000000000001"
+
+        with patch("app.main.seat_map", seat_map), patch(
+            "app.main.get_seat_layout", layout
+        ):
+            async with AsyncClient(app=app, base_url="http://test") as client:
+                response = await client.get(
+                    f"/showtimes/{showtime_id}/available-seats?since=7"
+                )
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "showtime_id": showtime_id,
+            "version": 9,
+            "since": 7,
+            "held": ["s1"],
+            "released": ["s2"],
+        }
+        seat_map.changes_since.assert_awaited_once_with(showtime_id, 7)
+        seat_map.snapshot.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_since_current_version_is_304(self):
+        """Test asking for changes at the current version gets 304."""
+        from unittest.mock import AsyncMock, patch
+
+        seat_map = AsyncMock()
+        seat_map.changes_since.return_value = (7, {}, 0)
+        showtime_id = "00000000-0000-0000-0000-000000000001"
+
+        with patch("app.main.seat_map", seat_map), patch(
+            "app.main.get_seat_layout", AsyncMock(return_value=[])
+        ):
+            async with AsyncClient(app=app, base_url="http://test") as client:
+                response = await client.get(
+                    f"/showtimes/{showtime_id}/available-seats?since=7"
+                )
+
+        assert response.status_code == 304
+
+    @pytest.mark.asyncio
+    async def test_since_reports_lapsed_holds_until_seen(self):
+        """Test a lapsed hold at the same version is a delta, then 304 by ETag."""
+        from unittest.mock import AsyncMock, patch
+
+        seat_map = AsyncMock()
+        seat_map.changes_since.return_value = (7, {"s1": False}, 5000)
+        showtime_id = "00000000-0000-0000-0000-000000000001"
+        url = f"/showtimes/{showtime_id}/available-seats?since=7"
+
+        with patch("app.main.seat_map", seat_map), patch(
+            "app.main.get_seat_layout", AsyncMock(return_value=[{"id": "s1"}])
+        ):
+            async with AsyncClient(app=app, base_url="http://test") as client:
+                delta = await client.get(url)
+                again = await client.get(
+                    url, headers={"If-None-Match": delta.headers["etag"]}
+                )
+
+        assert delta.status_code == 200
+        assert delta.json()["released"] == ["s1"]
+        assert delta.headers["etag"] == '"7-5000"'
+        assert again.status_code == 304
+
+    @pytest.mark.asyncio
+    async def test_since_beyond_change_log_returns_full_list(self):
+        """Test a version the log no longer covers falls back to the full list."""
+        from unittest.mock import AsyncMock, patch
+
+        seat_map = AsyncMock()
+        seat_map.changes_since.return_value = (9, None, 0)
+        seat_map.snapshot.return_value = ({"s1"}, 9, 0)
+        layout = [{"id": "s1"}, {"id": "s2"}]
+        showtime_id = "00000000-0000-0000-0000-000000000001"
+
+        with patch("app.main.seat_map", seat_map), patch(
+            "app.main.get_seat_layout", AsyncMock(return_value=layout)
+        ):
+            async with AsyncClient(app=app, base_url="http://test") as client:
+                response = await client.get(
+                    f"/showtimes/{showtime_id}/available-seats?since=1"
+                )
+
+        data = response.json()
+        assert response.status_code == 200
+        assert data["version"] == 9
+        assert data["available_count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_unknown_showtime_is_404_on_every_path(self):
+        """Test conditional and delta reads of a missing showtime get 404."""
+        from unittest.mock import AsyncMock, patch
+
+        seat_map = AsyncMock()
+        seat_map.changes_since.return_value = (7, {}, 0)
+        seat_map.snapshot.return_value = (set(), 7, 0)
+        showtime_id = "00000000-0000-0000-0000-000000000001"
+        url = f"/showtimes/{showtime_id}/available-seats"
+
+        with patch("app.main.seat_map", seat_map), patch(
+            "app.main.get_seat_layout", AsyncMock(return_value=None)
+        ):
+            async with AsyncClient(app=app, base_url="http://test") as client:
+                delta = await client.get(f"{url}?since=7")
+                conditional = await client.get(url, headers={"If-None-Match": '"7-0"'})
+
+        assert delta.status_code == 404
+        assert conditional.status_code == 404
+
+
+class TestSeatStream:
+    """Test pushing seat-map changes to stream subscribers."""
+
+    def test_deltas_fan_out_to_showtime_subscribers(self):
+        """Test each delta reaches every subscriber of its showtime only."""
+        from unittest.mock import MagicMock
+
+        from shared.seat_map import SeatMapEvents
+
+        events = SeatMapEvents(MagicMock())
+        first = events.subscribe("st1")
+        second = events.subscribe("st1")
+        other = events.subscribe("st2")
+
+        events.publish_local("st1", {"held": ["s1"]})
+
+        assert first.get_nowait() == second.get_nowait() == {"held": ["s1"]}
+        assert other.empty()
+
+        events.unsubscribe("st1", first)
+        events.unsubscribe("st1", second)
+        events.unsubscribe("st2", other)
+        assert events.subscriber_count() == 0
+
+    def test_slow_subscriber_gets_single_resync_marker(self):
+        """Test a full queue is replaced by one None so the client resyncs."""
+        from unittest.mock import MagicMock
+
+        from shared.seat_map import SeatMapEvents
+
+        events = SeatMapEvents(MagicMock(), queue_size=2)
+        queue = events.subscribe("st1")
+
+        for n in range(3):
+            events.publish_local("st1", {"held": [f"s{n}"]})
+
+        assert queue.qsize() == 1
+        assert queue.get_nowait() is None
+        events.unsubscribe("st1", queue)
+
+    @pytest.mark.asyncio
+    async def test_stream_sends_snapshot_then_deltas(self):
+        """Test the stream opens with the held seats and then relays deltas."""
+        import uuid
+        from unittest.mock import AsyncMock, MagicMock, patch
+
+        from app.main import stream_seat_changes
+        from shared.seat_map import SeatMapEvents
+
+        events = SeatMapEvents(MagicMock())
+        seat_map = AsyncMock()
+        seat_map.snapshot.return_value = ({"s2", "s1"}, 5, 0)
+        showtime_id = uuid.uuid4()
+
+        with patch("app.main.seat_events", events), patch(
+            "app.main.seat_map", seat_map
+        ), patch("app.main.get_seat_layout", AsyncMock(return_value=[])):
+            response = await stream_seat_changes(showtime_id, MagicMock(), None)
+            stream = response.body_iterator
+            assert await stream.__anext__() == "retry: 3000\n\n"
+            snapshot = await stream.__anext__()
+            # Already part of the snapshot
+            events.publish_local(str(showtime_id), {"held": ["s2"], "version": 5})
+            events.publish_local(str(showtime_id), {"released": ["s1"], "version": 6})
+            delta = await stream.__anext__()
+            await stream.aclose()
+
+        assert snapshot.startswith("id: 5\nevent: snapshot\n")
+        assert '"held": ["s1", "s2"]' in snapshot
+        assert delta.startswith("id: 6\nevent: delta\n")
+        assert '"released": ["s1"]' in delta
+        assert events.subscriber_count() == 0
+
+    @pytest.mark.asyncio
+    async def test_stream_unknown_showtime(self):
+        """Test streaming a showtime that does not exist returns 404."""
+        from unittest.mock import AsyncMock, patch
+
+        with patch("app.main.get_seat_layout", AsyncMock(return_value=None)):
+            async with AsyncClient(app=app, base_url="http://test") as client:
+                response = await client.get(
+                    "/showtimes/00000000-0000-0000-0000-000000000001/seats/stream"
+                )
+
+        assert response.status_code == 404
+
+
+class TestCatalogCache:
+    """Test caching of catalog list and detail responses."""
+
+    def test_params_normalized(self):
+        """Test keys ignore parameter order and unset parameters."""
+        from shared.cache import RedisCache
+
+        assert RedisCache.normalize({"q": "star", "genre": None, "a": 1}) == (
+            "a=1&q=star"
+        )
+        assert RedisCache.normalize({}) == ""
+
+    @pytest.mark.asyncio
+    async def test_hit_is_served_without_db(self):
+        """Test a cached body is returned as is, without a query."""
+        from unittest.mock import AsyncMock, MagicMock, patch
+
+        from app.main import get_db
+
+        cache = AsyncMock()
+        cache.get_or_load.return_value = ('next\n[{"id":"t1"}]', "l1")
+        session = MagicMock()
+        session.execute = AsyncMock()
+
+        async def override_db():
+            yield session
+
+        app.dependency_overrides[get_db] = override_db
+        try:
+            with patch("app.main.catalog_cache", cache):
+                async with AsyncClient(app=app, base_url="http://test") as client:
+                    response = await client.get("/theaters")
+        finally:
+            app.dependency_overrides.clear()
+
+        assert response.status_code == 200
+        assert response.json() == [{"id": "t1"}]
+        assert response.headers["X-Next-Cursor"] == "next"
+        session.execute.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_miss_loads_with_normalized_params(self):
+        """Test a miss runs the query through the cache's loader."""
+        import uuid
+        from types import SimpleNamespace
+        from unittest.mock import AsyncMock, MagicMock, patch
+
+        from app.main import MovieResponse, get_db
+
+        movie = SimpleNamespace(
+            id=uuid.uuid4(),
+            title="Heat",
+            description=None,
+            duration_minutes=170,
+            genre="Drama",
+            language=None,
+            rating=None,
+            release_date=None,
+            poster_url=None,
+            director=None,
+            is_active=True,
+        )
+        result = MagicMock()
+        result.all.return_value = [movie]
+        session = MagicMock()
+        session.execute = AsyncMock(return_value=result)
+
+        async def override_db():
+            yield session
+
+        async def get_or_load(name, groups, params, load, ttl, refresh=None):
+            return await load(), "load"
+
+        cache = AsyncMock()
+        cache.get_or_load.side_effect = get_or_load
+
+        app.dependency_overrides[get_db] = override_db
+        try:
+            with patch("app.main.catalog_cache", cache):
+                async with AsyncClient(app=app, base_url="http://test") as client:
+                    response = await client.get("/movies?genre=Drama")
+        finally:
+            app.dependency_overrides.clear()
+
+        assert response.status_code == 200
+        assert response.json()[0]["id"] == str(movie.id)
+        name, groups, params, _, ttl = cache.get_or_load.await_args.args
+        assert (name, groups, params, ttl) == (
+            "movies",
+            ["movies"],
+            {
+                "q": None,
+                "genre": "drama",
+                "cursor": None,
+                "limit": 50,
+                "offset": None,
+                "fields": ",".join(MovieResponse.model_fields),
+            },
+            300,
+        )
+        session.execute.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_background_refresh_opens_its_own_session(self):
+        """Test a refresh that outlives the request does not use its session."""
+        from unittest.mock import AsyncMock, MagicMock, patch
+
+        from app.main import get_db
+
+        result = MagicMock()
+        result.all.return_value = []
+        request_session = MagicMock()
+        request_session.execute = AsyncMock()
+        own_session = MagicMock()
+        own_session.execute = AsyncMock(return_value=result)
+        session_maker = MagicMock()
+        session_maker.return_value.__aenter__ = AsyncMock(return_value=own_session)
+        session_maker.return_value.__aexit__ = AsyncMock(return_value=False)
+
+        async def override_db():
+            yield request_session
+
+        refreshes = []
+
+        async def get_or_load(name, groups, params, load, ttl, refresh=None):
+            refreshes.append(refresh)
+            return "\n[]", "stale"
+
+        cache = AsyncMock()
+        cache.get_or_load.side_effect = get_or_load
+
+        app.dependency_overrides[get_db] = override_db
+        try:
+            with patch("app.main.catalog_cache", cache):
+                async with AsyncClient(app=app, base_url="http://test") as client:
+                    response = await client.get("/theaters")
+        finally:
+            app.dependency_overrides.clear()
+        assert response.status_code == 200
+
+        # The cache runs it after the response, once get_db has closed
+        with patch("app.main.async_session_maker", session_maker):
+            assert await refreshes[0]() == "\n[]"
+        own_session.execute.assert_awaited_once()
+        request_session.execute.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_create_theater_invalidates_theaters(self):
+        """Test creating a theater drops the cached theater lists."""
+        import uuid
+        from unittest.mock import AsyncMock, MagicMock, patch
+
+        from app.main import get_db
+
+        session = MagicMock()
+        session.commit = AsyncMock()
+        session.refresh = AsyncMock(
+            side_effect=lambda theater: setattr(theater, "id", uuid.uuid4())
+        )
+
+        async def override_db():
+            yield session
+
+        cache = AsyncMock()
+
+        app.dependency_overrides[get_db] = override_db
+        try:
+            with patch("app.main.catalog_cache", cache):
+                async with AsyncClient(app=app, base_url="http://test") as client:
+                    response = await client.post(
+                        "/theaters", json={"name": "Rex", "total_seats": 100}
+                    )
+        finally:
+            app.dependency_overrides.clear()
+
+        assert response.status_code == 201
+        cache.invalidate.assert_awaited_once_with("theaters")
+
+
+class TestMovieSearch:
+    """Test full-text movie search."""
+
+    def test_search_terms_builds_prefix_query(self):
+        """Test free text becomes an AND of prefix terms."""
+        from app.main import search_terms
+
+        assert search_terms("Đêm  Trắng") == "đêm:* & trắng:*"
+        assert search_terms("dem tr") == "dem:* & tr:*"
+        # tsquery operators in user input are dropped
+        assert search_terms("star & !wars | (") == "star:* & wars:*"
+        assert search_terms("!!!") is None
+
+    @pytest.mark.asyncio
+    async def test_search_uses_ranked_tsquery(self):
+        """Test searching matches search_vector and ranks by relevance."""
+        from unittest.mock import AsyncMock, MagicMock, patch
+
+        from sqlalchemy.dialects import postgresql
+
+        from app.main import MovieResponse, get_db
+
+        result = MagicMock()
+        result.all.return_value = []
+        session = MagicMock()
+        session.execute = AsyncMock(return_value=result)
+
+        async def override_db():
+            yield session
+
+        async def get_or_load(name, groups, params, load, ttl, refresh=None):
+            return await load(), "load"
+
+        cache = AsyncMock()
+        cache.get_or_load.side_effect = get_or_load
+
+        app.dependency_overrides[get_db] = override_db
+        try:
+            with patch("app.main.catalog_cache", cache):
+                async with AsyncClient(app=app, base_url="http://test") as client:
+                    response = await client.get(
+                        "/movies?q=Mắt%20Biếc&limit=10&offset=20"
+                    )
+        finally:
+            app.dependency_overrides.clear()
+
+        assert response.status_code == 200
+        params = cache.get_or_load.await_args.args[2]
+        assert params == {
+            "q": "mắt:* & biếc:*",
+            "genre": None,
+            "cursor": None,
+            "limit": 10,
+            "offset": 20,
+            "fields": ",".join(MovieResponse.model_fields),
+        }
+        query = session.execute.await_args.args[0]
+        sql = str(query.compile(dialect=postgresql.dialect()))
+        assert "movies.search_vector @@ to_tsquery(" in sql
+        assert "f_unaccent(" in sql
+        assert "ORDER BY ts_rank_cd(movies.search_vector, to_tsquery(" in sql
+        assert "ILIKE" not in sql
+        # The generated column is deferred and never sent to clients
+        assert "movies.search_vector," not in sql.split("FROM")[0]
+
+    @pytest.mark.asyncio
+    async def test_search_without_terms_returns_empty(self):
+        """Test a query with no searchable words skips the database."""
+        from unittest.mock import AsyncMock, patch
+
+        cache = AsyncMock()
+        with patch("app.main.catalog_cache", cache):
+            async with AsyncClient(app=app, base_url="http://test") as client:
+                response = await client.get("/movies?q=%21%21")
+
+        assert response.status_code == 200
+        assert response.json() == []
+        cache.get_or_load.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_page_size_is_bounded(self):
+        """Test the page size limits are validated."""
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            too_small = await client.get("/movies?limit=0")
+            too_large = await client.get("/movies?limit=201")
+            negative = await client.get("/movies?offset=-1")
+
+        assert too_small.status_code == 422
+        assert too_large.status_code == 422
+        assert negative.status_code == 422
+
+
+class TestCatalogPagination:
+    """Test keyset pagination and field projection of catalog lists."""
+
+    @pytest.mark.asyncio
+    async def test_showtimes_page_and_cursor(self):
+        """Test a full page sets X-Next-Cursor and the cursor seeks past it."""
+        import uuid
+        from types import SimpleNamespace
+        from unittest.mock import AsyncMock, MagicMock, patch
+
+        from sqlalchemy.dialects import postgresql
+
+        from app.main import SHOWTIMES_PAGE, get_db
+
+        rows = [
+            SimpleNamespace(
+                id=uuid.uuid4(), show_date=date(2026, 5, 1), show_time=time(18, i)
+            )
+            for i in range(3)
+        ]
+        result = MagicMock()
+        result.all.return_value = rows
+        session = MagicMock()
+        session.execute = AsyncMock(return_value=result)
+
+        async def override_db():
+            yield session
+
+        app.dependency_overrides[get_db] = override_db
+        try:
+            with patch("app.main.catalog_cache", None):
+                async with AsyncClient(app=app, base_url="http://test") as client:
+                    first = await client.get("/showtimes?limit=2&fields=id")
+                    cursor = first.headers["X-Next-Cursor"]
+                    await client.get(f"/showtimes?limit=2&fields=id&cursor={cursor}")
+        finally:
+            app.dependency_overrides.clear()
+
+        assert first.json() == [{"id": str(row.id)} for row in rows[:2]]
+        assert SHOWTIMES_PAGE.decode(cursor) == [
+            rows[1].show_date,
+            rows[1].show_time,
+            rows[1].id,
+        ]
+        sql = str(
+            session.execute.await_args.args[0].compile(dialect=postgresql.dialect())
+        )
+        # Only the projected and cursor columns are read
+        assert sql.startswith(
+            "SELECT showtimes.id, showtimes.show_date, showtimes.show_time \nFROM"
+        )
+        assert "(showtimes.show_date, showtimes.show_time, showtimes.id) > (" in sql
+        assert "LIMIT" in sql
+
+    @pytest.mark.asyncio
+    async def test_last_page_has_no_cursor(self):
+        """Test a short page ends the listing."""
+        import uuid
+        from types import SimpleNamespace
+        from unittest.mock import AsyncMock, MagicMock, patch
+
+        from app.main import get_db
+
+        result = MagicMock()
+        result.all.return_value = [
+            SimpleNamespace(id=uuid.uuid4(), name="Rex", total_seats=100)
+        ]
+        session = MagicMock()
+        session.execute = AsyncMock(return_value=result)
+
+        async def override_db():
+            yield session
+
+        app.dependency_overrides[get_db] = override_db
+        try:
+            with patch("app.main.catalog_cache", None):
+                async with AsyncClient(app=app, base_url="http://test") as client:
+                    response = await client.get("/theaters?fields=name,total_seats")
+        finally:
+            app.dependency_overrides.clear()
+
+        assert response.json() == [{"name": "Rex", "total_seats": 100}]
+        assert "X-Next-Cursor" not in response.headers
+
+    @pytest.mark.asyncio
+    async def test_invalid_page_requests_are_rejected(self):
+        """Test bad cursors and fields, and cursors on search, return 400."""
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            bad_cursor = await client.get("/theaters?cursor=%%%")
+            bad_field = await client.get("/movies?fields=id,search_vector")
+            search_cursor = await client.get("/movies?q=heat&cursor=abc")
+
+        assert bad_cursor.status_code == 400
+        assert bad_field.status_code == 400
+        assert search_cursor.status_code == 400
+
+
+class TestShowtimeDetails:
+    """Test showtime details are read with one joined query."""
+
+    @staticmethod
+    def showtime(theater_id=None):
+        import uuid
+        from types import SimpleNamespace
+
+        return SimpleNamespace(
+            id=uuid.uuid4(),
+            movie_id=uuid.uuid4(),
+            theater_id=theater_id or uuid.uuid4(),
+            show_date=date(2026, 5, 1),
+            show_time=time(18, 30),
+            price=Decimal("90000"),
+            available_seats=80,
+            total_seats=100,
+        )
+
+    @pytest.mark.asyncio
+    async def test_detail_joins_movie_and_theater(self):
+        """Test the detail endpoint makes a single round trip."""
+        from types import SimpleNamespace
+        from unittest.mock import AsyncMock, MagicMock, patch
+
+        from sqlalchemy.dialects import postgresql
+
+        from app.main import get_db
+
+        showtime = self.showtime()
+        theater = SimpleNamespace(
+            id=showtime.theater_id,
+            name="Rex",
+            location=None,
+            city="HCM",
+            total_seats=100,
+        )
+        result = MagicMock()
+        result.one_or_none.return_value = (showtime, None, theater)
+        session = MagicMock()
+        session.execute = AsyncMock(return_value=result)
+
+        async def override_db():
+            yield session
+
+        app.dependency_overrides[get_db] = override_db
+        try:
+            with patch("app.main.catalog_cache", None):
+                async with AsyncClient(app=app, base_url="http://test") as client:
+                    response = await client.get(f"/showtimes/{showtime.id}")
+        finally:
+            app.dependency_overrides.clear()
+
+        assert response.status_code == 200
+        assert response.json()["theater"]["name"] == "Rex"
+        assert response.json()["movie"] is None
+        session.execute.assert_awaited_once()
+        sql = str(
+            session.execute.await_args.args[0].compile(dialect=postgresql.dialect())
+        )
+        assert "LEFT OUTER JOIN movies ON movies.id = showtimes.movie_id" in sql
+        assert "LEFT OUTER JOIN theaters ON theaters.id = showtimes.theater_id" in sql
+
+    @pytest.mark.asyncio
+    async def test_batch_keeps_request_order(self):
+        """Test ids= returns details in request order, skipping unknown ids."""
+        import uuid
+        from types import SimpleNamespace
+        from unittest.mock import AsyncMock, MagicMock, patch
+
+        from sqlalchemy.dialects import postgresql
+
+        from app.main import get_db
+
+        first, second = self.showtime(), self.showtime()
+        theater = SimpleNamespace(
+            id=second.theater_id, name="Rex", location=None, city="HCM", total_seats=100
+        )
+        result = MagicMock()
+        # Database order differs from request order
+        result.all.return_value = [(second, theater), (first, None)]
+        session = MagicMock()
+        session.execute = AsyncMock(return_value=result)
+
+        async def override_db():
+            yield session
+
+        ids = f"{first.id},{uuid.uuid4()},{second.id},{first.id}"
+        app.dependency_overrides[get_db] = override_db
+        try:
+            with patch("app.main.catalog_cache", None):
+                async with AsyncClient(app=app, base_url="http://test") as client:
+                    response = await client.get(f"/showtimes?ids={ids}&expand=theater")
+        finally:
+            app.dependency_overrides.clear()
+
+        body = response.json()
+        assert [item["id"] for item in body] == [str(first.id), str(second.id)]
+        assert body[0]["theater"] is None
+        assert body[1]["theater"]["name"] == "Rex"
+        assert body[1]["movie"] is None
+        session.execute.assert_awaited_once()
+        sql = str(
+            session.execute.await_args.args[0].compile(dialect=postgresql.dialect())
+        )
+        assert "JOIN theaters" in sql
+        assert "JOIN movies" not in sql
+        assert "showtimes.id IN" in sql
+
+    @pytest.mark.asyncio
+    async def test_invalid_batch_requests_are_rejected(self):
+        """Test bad ids, unknown expansions and expand without ids return 400."""
+        import uuid
+
+        too_many = ",".join(str(uuid.uuid4()) for _ in range(101))
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            bad_id = await client.get("/showtimes?ids=abc")
+            bad_expand = await client.get(f"/showtimes?ids={uuid.uuid4()}&expand=seats")
+            no_ids = await client.get("/showtimes?expand=movie")
+            over_limit = await client.get(f"/showtimes?ids={too_many}")
+
+        assert bad_id.status_code == 400
+        assert bad_expand.status_code == 400
+        assert no_ids.status_code == 400
+        assert over_limit.status_code == 400
+
+
+class TestPrefixIndex:
+    """Test the in-memory prefix index behind movie suggestions."""
+
+    def test_fold_strips_case_accents_and_punctuation(self):
+        """Test Vietnamese text folds to plain ASCII words."""
+        from shared.prefix_index import fold
+
+        assert fold("Đêm Trắng: Mắt Biếc!") == "dem trang mat biec"
+
+    def test_search_matches_any_word_and_ranks_titles_first(self):
+        """Test prefixes match later words and titles outrank names."""
+        from shared.prefix_index import PrefixIndex
+
+        index = PrefixIndex()
+        index.add("1", "Mắt Biếc", [("Mắt Biếc", 0), ("Victor Vũ", 1)])
+        index.add("2", "Bố Già", [("Bố Già", 0), ("Trấn Thành", 1)])
+        index.add("3", "Biệt Đội", [("Biệt Đội", 0), ("Bình An", 1)])
+
+        assert index.search("mat bi") == [("1", "Mắt Biếc")]
+        assert index.search("BIEC") == [("1", "Mắt Biếc")]
+        # Title start, then title word, then a cast/director match
+        assert index.search("b") == [
+            ("2", "Bố Già"),
+            ("3", "Biệt Đội"),
+            ("1", "Mắt Biếc"),
+        ]
+        assert index.search("b", limit=1) == [("2", "Bố Già")]
+        assert index.search("tran") == [("2", "Bố Già")]
+        assert index.search("zz") == []
+        assert index.search("  ") == []
+
+    def test_add_replaces_and_remove_drops(self):
+        """Test re-adding a document replaces its keys."""
+        from shared.prefix_index import PrefixIndex
+
+        index = PrefixIndex()
+        index.add("1", "Heat", [("Heat", 0), ("Michael Mann", 1)])
+        index.add("1", "Heat", [("Heat", 0)])
+
+        assert index.search("mann") == []
+        assert len(index) == 1
+        assert index.remove("1") is True
+        assert index.search("heat") == []
+        assert index.remove("1") is False
+
+    def test_short_prefix_results_are_exact(self):
+        """Test a prefix with more matches than scan_limit still ranks by weight."""
+        from shared.prefix_index import PrefixIndex
+
+        index = PrefixIndex(scan_limit=5, top_k=3)
+        for i in range(50):
+            index.add(str(i), f"Movie {i:02d}", [(f"Movie {i:02d}", 1)])
+        # Sorts after every other key with the prefix, but weighs the least
+        index.add("99", "Movie 99", [("Movie 99", 0)])
+
+        assert index.search("movie", limit=2) == [("99", "Movie 99"), ("0", "Movie 00")]
+        assert len(index.search("movie", limit=20)) == 20
+
+        # Kept results follow adds and removes
+        index.add("98", "Movie 98", [("Movie 98", 0)])
+        assert index.search("movie", limit=2) == [
+            ("98", "Movie 98"),
+            ("99", "Movie 99"),
+        ]
+        index.remove("98")
+        index.remove("99")
+        assert index.search("movie", limit=2) == [("0", "Movie 00"), ("1", "Movie 01")]
+
+
+class TestScheduleIndex:
+    """Test the in-memory per-day schedule behind next-showtime lookups."""
+
+    @staticmethod
+    def entry(showtime_id, day, hour, theater="t1", city="Hà Nội", movie="m1"):
+        from shared.schedule_index import ScheduleEntry
+
+        return ScheduleEntry(
+            showtime_id, movie, theater, city, date(2026, 5, day), time(hour)
+        )
+
+    def test_upcoming_walks_days_in_start_order(self):
+        """Test shows already started are skipped and later days follow."""
+        from datetime import datetime
+
+        from shared.schedule_index import ScheduleIndex
+
+        index = ScheduleIndex()
+        index.load(
+            [
+                self.entry("c", 2, 10),
+                self.entry("a", 1, 14),
+                self.entry("b", 1, 20),
+                self.entry("x", 1, 21, movie="m2"),
+            ]
+        )
+
+        after = datetime(2026, 5, 1, 15)
+        assert [e.id for e in index.upcoming("m1", after)] == ["b", "c"]
+        assert [e.id for e in index.upcoming("m1", after, limit=1)] == ["b"]
+        assert [e.id for e in index.upcoming("m1", datetime(2026, 5, 1, 14))] == [
+            "a",
+            "b",
+            "c",
+        ]
+        assert index.upcoming("m3", after) == []
+
+    def test_city_and_theater_filters(self):
+        """Test cities match case-insensitively and theaters exactly."""
+        from datetime import datetime
+
+        from shared.schedule_index import ScheduleIndex
+
+        index = ScheduleIndex()
+        index.add(self.entry("a", 1, 18, theater="t1", city="Hà Nội"))
+        index.add(self.entry("b", 1, 19, theater="t2", city="Đà Nẵng"))
+        index.add(self.entry("c", 1, 20, theater="t3", city="HÀ NỘI"))
+
+        after = datetime(2026, 5, 1)
+        assert [e.id for e in index.upcoming("m1", after, city="hà nội")] == ["a", "c"]
+        assert [e.id for e in index.upcoming("m1", after, theater_id="t2")] == ["b"]
+
+    def test_add_moves_and_prune_drops_past_days(self):
+        """Test a rescheduled showtime moves and past days are dropped."""
+        from datetime import datetime
+
+        from shared.schedule_index import ScheduleIndex
+
+        index = ScheduleIndex()
+        index.add(self.entry("a", 1, 18))
+        index.add(self.entry("b", 2, 18))
+        index.add(self.entry("a", 3, 12))
+
+        assert [e.id for e in index.upcoming("m1", datetime(2026, 5, 1))] == [
+            "b",
+            "a",
+        ]
+        assert index.prune(date(2026, 5, 3)) == 1
+        assert "b" not in index
+        assert len(index) == 1
+        assert index.remove("a") is True
+        assert index.remove("a") is False
+        assert index.upcoming("m1", datetime(2026, 5, 1)) == []
+
+
+class TestShowtimeQueries:
+    """Test showtime range, location and next-showtime queries."""
+
+    @staticmethod
+    def session(result):
+        from unittest.mock import AsyncMock, MagicMock
+
+        session = MagicMock()
+        session.execute = AsyncMock(return_value=result)
+        return session
+
+    @pytest.mark.asyncio
+    async def test_range_and_city_filters(self):
+        """Test date/time ranges and city become index-friendly criteria."""
+        from unittest.mock import MagicMock, patch
+
+        from sqlalchemy.dialects import postgresql
+
+        from app.main import get_db
+
+        result = MagicMock()
+        result.all.return_value = []
+        session = self.session(result)
+
+        async def override_db():
+            yield session
+
+        app.dependency_overrides[get_db] = override_db
+        try:
+            with patch("app.main.catalog_cache", None):
+                async with AsyncClient(app=app, base_url="http://test") as client:
+                    response = await client.get(
+                        "/showtimes?from_date=2026-05-01&to_date=2026-05-07"
+                        "&from_time=17:00&city=Ha%20Noi&fields=id"
+                    )
+        finally:
+            app.dependency_overrides.clear()
+
+        assert response.status_code == 200
+        query = session.execute.await_args.args[0].compile(dialect=postgresql.dialect())
+        sql = str(query)
+        assert "showtimes.show_date >= %(show_date_1)s" in sql
+        assert "showtimes.show_date <= %(show_date_2)s" in sql
+        assert "showtimes.show_time >= %(show_time_1)s" in sql
+        assert "lower(theaters.city) = %(lower_1)s" in sql
+        assert query.params["lower_1"] == "ha noi"
+
+    @pytest.mark.asyncio
+    async def test_listing_defaults_to_upcoming(self):
+        """Test an unfiltered listing starts today, not at the first show."""
+        from unittest.mock import MagicMock, patch
+
+        from sqlalchemy.dialects import postgresql
+
+        from app.main import get_db
+
+        result = MagicMock()
+        result.all.return_value = []
+        session = self.session(result)
+
+        async def override_db():
+            yield session
+
+        app.dependency_overrides[get_db] = override_db
+        try:
+            with patch("app.main.catalog_cache", None):
+                async with AsyncClient(app=app, base_url="http://test") as client:
+                    await client.get("/showtimes?fields=id")
+        finally:
+            app.dependency_overrides.clear()
+
+        query = session.execute.await_args.args[0].compile(dialect=postgresql.dialect())
+        assert query.params["show_date_1"] == date.today()
+
+    @pytest.mark.asyncio
+    async def test_invalid_ranges_are_rejected(self):
+        """Test inverted ranges and show_date with a range return 400."""
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            dates = await client.get(
+                "/showtimes?from_date=2026-05-02&to_date=2026-05-01"
+            )
+            times = await client.get("/showtimes?from_time=20:00&to_time=18:00")
+            mixed = await client.get(
+                "/showtimes?show_date=2026-05-01&from_date=2026-05-01"
+            )
+
+        assert dates.status_code == 400
+        assert times.status_code == 400
+        assert mixed.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_next_showtimes_come_from_the_schedule_index(self):
+        """Test next-N picks ids from the index and reads them in one query."""
+        import uuid
+        from datetime import datetime
+        from types import SimpleNamespace
+        from unittest.mock import MagicMock, patch
+
+        from app.main import get_db
+        from shared.schedule_index import ScheduleEntry, ScheduleIndex
+
+        movie_id, theater_id = uuid.uuid4(), uuid.uuid4()
+        showtimes = [
+            SimpleNamespace(
+                id=uuid.uuid4(),
+                movie_id=movie_id,
+                theater_id=theater_id,
+                show_date=date(2026, 5, 1),
+                show_time=time(hour),
+                price=Decimal("90000"),
+                available_seats=80,
+                total_seats=100,
+            )
+            for hour in (18, 20, 22)
+        ]
+        index = ScheduleIndex()
+        index.load(
+            [
+                ScheduleEntry(
+                    str(s.id),
+                    str(movie_id),
+                    str(theater_id),
+                    "Hà Nội",
+                    s.show_date,
+                    s.show_time,
+                )
+                for s in showtimes
+            ]
+        )
+        theater = SimpleNamespace(
+            id=theater_id, name="Rex", location=None, city="Hà Nội", total_seats=100
+        )
+        result = MagicMock()
+        result.all.return_value = [(s, theater) for s in reversed(showtimes)]
+        session = self.session(result)
+
+        async def override_db():
+            yield session
+
+        app.dependency_overrides[get_db] = override_db
+        try:
+            with patch("app.main.catalog_cache", None), patch(
+                "app.main.schedule_index", index
+            ):
+                async with AsyncClient(app=app, base_url="http://test") as client:
+                    response = await client.get(
+                        f"/movies/{movie_id}/showtimes/next",
+                        params={
+                            "city": "hà nội",
+                            "after": datetime(2026, 5, 1, 19).isoformat(),
+                            "limit": 2,
+                        },
+                    )
+        finally:
+            app.dependency_overrides.clear()
+
+        body = response.json()
+        assert [item["id"] for item in body] == [str(s.id) for s in showtimes[1:]]
+        assert body[0]["theater"]["name"] == "Rex"
+        session.execute.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_next_showtimes_fall_back_to_the_database(self):
+        """Test next-N queries the movie's schedule while the index loads."""
+        import uuid
+        from unittest.mock import MagicMock, patch
+
+        from sqlalchemy.dialects import postgresql
+
+        from app.main import get_db
+        from shared.schedule_index import ScheduleIndex
+
+        result = MagicMock()
+        result.scalars.return_value.all.return_value = []
+        session = self.session(result)
+
+        async def override_db():
+            yield session
+
+        app.dependency_overrides[get_db] = override_db
+        try:
+            with patch("app.main.schedule_index", ScheduleIndex()):
+                async with AsyncClient(app=app, base_url="http://test") as client:
+                    response = await client.get(
+                        f"/movies/{uuid.uuid4()}/showtimes/next?city=Hue"
+                    )
+        finally:
+            app.dependency_overrides.clear()
+
+        assert response.json() == []
+        sql = str(
+            session.execute.await_args.args[0].compile(dialect=postgresql.dialect())
+        )
+        assert "(showtimes.show_date, showtimes.show_time) >= (" in sql
+        assert "ORDER BY showtimes.show_date, showtimes.show_time, showtimes.id" in sql
+
+
+class TestCatalogImport:
+    """Test bulk import of catalog records."""
+
+    @staticmethod
+    async def chunks(*parts):
+        for part in parts:
+            yield part.encode()
+
+    @staticmethod
+    def session(*results):
+        from unittest.mock import AsyncMock, MagicMock
+
+        session = MagicMock()
+        session.execute = AsyncMock(side_effect=list(results) or None)
+        session.commit = AsyncMock()
+        session.rollback = AsyncMock()
+        return session
+
+    @pytest.mark.asyncio
+    async def test_read_records_streams_csv_and_ndjson(self):
+        """Test records split across chunks, quoted newlines and bad lines."""
+        from shared.catalog_import import InvalidRecord, read_records
+
+        ndjson = [
+            record
+            async for record in read_records(
+                self.chunks('{"title": "He', 'at"}\n\n[1]\n{bad\n'), "ndjson"
+            )
+        ]
+        assert ndjson[0] == (1, {"title": "Heat"})
+        assert [line for line, _ in ndjson] == [1, 3, 4]
+        assert all(isinstance(record, InvalidRecord) for _, record in ndjson[1:])
+
+        rows = [
+            record
+            async for record in read_records(
+                self.chunks('name,city\r\n"Rex\nHall",\nSolo\n'), "csv"
+            )
+        ]
+        assert rows[0] == (2, {"name": "Rex\nHall", "city": None})
+        assert rows[1][0] == 4
+        assert isinstance(rows[1][1], InvalidRecord)
+
+    def test_seat_grid_from_layout(self):
+        """Test a layout spec expands to typed seats, row by row."""
+        from shared.catalog_import import InvalidRecord, seat_grid
+
+        grid = seat_grid("A-C,AA", 4, vip_rows="b", premium_rows="AA")
+        assert len(grid) == 16
+        assert grid[0] == ("A", 1, "regular")
+        assert grid[4] == ("B", 1, "vip")
+        assert grid[-1] == ("AA", 4, "premium")
+        for rows, per_row, vip in (("C-A", 4, None), ("A-B", 0, None), ("A", 2, "Z")):
+            with pytest.raises(InvalidRecord):
+                seat_grid(rows, per_row, vip_rows=vip)
+
+    @pytest.mark.asyncio
+    async def test_import_theaters_generates_seats(self):
+        """Test theaters and their seats load as multi-row INSERTs."""
+        import json
+        from unittest.mock import patch
+
+        from app.main import get_db, require_admin
+
+        session = self.session()
+
+        async def override_db():
+            yield session
+
+        body = "\n".join(
+            json.dumps(record)
+            for record in [
+                {"name": "Rex", "city": "HCM", "seat_rows": "A-J", "seats_per_row": 12},
+                {"name": "Mini", "total_seats": 40},
+                {
+                    "name": "Bad",
+                    "seat_rows": "A-B",
+                    "seats_per_row": 5,
+                    "total_seats": 9,
+                },
+                {"city": "Hue"},
+            ]
+        )
+        app.dependency_overrides[get_db] = override_db
+        app.dependency_overrides[require_admin] = lambda: {"username": "admin"}
+        try:
+            with patch("app.main.catalog_cache", None):
+                async with AsyncClient(app=app, base_url="http://test") as client:
+                    response = await client.post("/import/theaters", content=body)
+        finally:
+            app.dependency_overrides.clear()
+
+        result = response.json()
+        assert result["received"] == 4
+        assert result["imported"] == 2
+        assert result["seats"] == 120
+        assert result["rejected"] == 2
+        assert [error["line"] for error in result["errors"]] == [3, 4]
+        statements = [call.args[0] for call in session.execute.await_args_list]
+        assert [s.table.name for s in statements] == ["theaters", "seats"]
+        assert statements[1].compile().params["seat_row_m119"] == "J"
+        session.commit.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_import_showtimes_checks_references(self):
+        """Test unknown movies are rejected and seats default to the theater's."""
+        import uuid
+        from unittest.mock import MagicMock, patch
+
+        from app.main import get_db, require_admin
+
+        movie_id, theater_id = uuid.uuid4(), uuid.uuid4()
+        movies = MagicMock()
+        movies.scalars.return_value.all.return_value = [movie_id]
+        theaters = MagicMock()
+        theaters.all.return_value = [(theater_id, 120)]
+        session = self.session(movies, theaters, MagicMock())
+
+        async def override_db():
+            yield session
+
+        body = (
+            "movie_id,theater_id,show_date,show_time,price\n"
+            f"{movie_id},{theater_id},2026-05-01,19:30,90000\n"
+            f"{uuid.uuid4()},{theater_id},2026-05-01,21:30,90000\n"
+        )
+        app.dependency_overrides[get_db] = override_db
+        app.dependency_overrides[require_admin] = lambda: {"username": "admin"}
+        try:
+            with patch("app.main.catalog_cache", None):
+                async with AsyncClient(app=app, base_url="http://test") as client:
+                    response = await client.post(
+                        "/import/showtimes",
+                        content=body,
+                        headers={"Content-Type": "text/csv"},
+                    )
+        finally:
+            app.dependency_overrides.clear()
+
+        result = response.json()
+        assert result["imported"] == 1
+        assert result["errors"] == [{"line": 3, "error": "Movie not found"}]
+        insert = session.execute.await_args_list[-1].args[0].compile().params
+        assert insert["total_seats_m0"] == 120
+        assert insert["available_seats_m0"] == 120
+
+    @pytest.mark.asyncio
+    async def test_database_error_rolls_back_the_batch(self):
+        """Test a batch the database refuses is reported as a whole."""
+        from unittest.mock import patch
+
+        from sqlalchemy.exc import IntegrityError
+
+        from app.main import get_db, require_admin
+
+        session = self.session(IntegrityError("INSERT", {}, Exception("duplicate")))
+
+        async def override_db():
+            yield session
+
+        body = '{"title": "Heat", "duration_minutes": 170}\n' * 3
+        app.dependency_overrides[get_db] = override_db
+        app.dependency_overrides[require_admin] = lambda: {"username": "admin"}
+        try:
+            with patch("app.main.catalog_cache", None):
+                async with AsyncClient(app=app, base_url="http://test") as client:
+                    response = await client.post("/import/movies", content=body)
+                    bad_format = await client.post(
+                        "/import/movies?format=xml", content=body
+                    )
+        finally:
+            app.dependency_overrides.clear()
+
+        result = response.json()
+        assert result["imported"] == 0
+        assert result["rejected"] == 3
+        assert result["errors"][0]["error"] == "Lines 1-3 not imported: duplicate"
+        session.rollback.assert_awaited_once()
+        assert bad_format.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_import_requires_an_admin_token(self):
+        """Test imports are refused without a token or for non-admin users."""
+        from unittest.mock import AsyncMock, MagicMock, patch
+
+        def verified(status_code, role=None):
+            response = MagicMock(status_code=status_code)
+            response.json.return_value = {"username": "u", "role": role}
+            return response
+
+        body = '{"title": "Heat", "duration_minutes": 170}\n'
+        verify = AsyncMock(
+            side_effect=[
+                verified(401),
+                verified(200, "customer"),
+                verified(200, "admin"),
+            ]
+        )
+        with patch("app.main.auth_client.get", verify), patch(
+            "app.main.import_batch", AsyncMock()
+        ):
+            async with AsyncClient(app=app, base_url="http://test") as client:
+                anonymous = await client.post("/import/movies", content=body)
+                headers = {"Authorization": "Bearer t"}
+                invalid = await client.post(
+                    "/import/movies", content=body, headers=headers
+                )
+                customer = await client.post(
+                    "/import/movies", content=body, headers=headers
+                )
+                admin = await client.post(
+                    "/import/movies", content=body, headers=headers
+                )
+
+        assert anonymous.status_code == 401
+        assert invalid.status_code == 401
+        assert customer.status_code == 403
+        assert admin.status_code == 200
+        assert verify.await_count == 3
+
+
+class TestMovieSuggest:
+    """Test the movie typeahead endpoint."""
+
+    @pytest.mark.asyncio
+    async def test_suggest_is_served_from_the_index(self):
+        """Test /movies/suggest is not routed to /movies/{movie_id}."""
+        import uuid
+        from types import SimpleNamespace
+        from unittest.mock import patch
+
+        from app.main import index_movie
+        from shared.prefix_index import PrefixIndex
+
+        index = PrefixIndex()
+        movie = SimpleNamespace(
+            id=uuid.uuid4(),
+            title="Mắt Biếc",
+            director="Victor Vũ",
+            cast="Trần Nghĩa, Trúc Anh",
+            is_active=True,
+        )
+        with patch("app.main.suggest_index", index):
+            index_movie(movie)
+            async with AsyncClient(app=app, base_url="http://test") as client:
+                by_cast = await client.get("/movies/suggest?q=truc")
+                by_title = await client.get("/movies/suggest?q=mat%20b&limit=5")
+                too_many = await client.get("/movies/suggest?q=m&limit=21")
+
+            movie.is_active = False
+            index_movie(movie)
+
+        assert by_cast.status_code == 200
+        assert by_cast.json() == [{"id": str(movie.id), "title": "Mắt Biếc"}]
+        assert by_title.json() == by_cast.json()
+        assert too_many.status_code == 422
+        assert len(index) == 0
+
+    @pytest.mark.asyncio
+    async def test_sync_advances_watermark(self):
+        """Test a sync indexes new rows and returns the newest updated_at."""
+        import uuid
+        from datetime import datetime
+        from types import SimpleNamespace
+        from unittest.mock import AsyncMock, MagicMock, patch
+
+        from app.main import sync_suggest_index
+        from shared.prefix_index import PrefixIndex
+
+        newer = datetime(2026, 1, 2)
+        rows = [
+            SimpleNamespace(
+                id=uuid.uuid4(),
+                title=title,
+                director=None,
+                cast=None,
+                is_active=True,
+                updated_at=updated_at,
+            )
+            for title, updated_at in [("Heat", datetime(2026, 1, 1)), ("Ran", newer)]
+        ]
+        result = MagicMock()
+        result.all.return_value = rows
+        session = MagicMock()
+        session.execute = AsyncMock(return_value=result)
+        session_maker = MagicMock()
+        session_maker.return_value.__aenter__ = AsyncMock(return_value=session)
+        session_maker.return_value.__aexit__ = AsyncMock(return_value=False)
+
+        index = PrefixIndex()
+        with patch("app.main.suggest_index", index), patch(
+            "app.main.async_session_maker", session_maker
+        ):
+            watermark = await sync_suggest_index(None)
+            again = await sync_suggest_index(watermark)
+
+        assert watermark == newer
+        assert again == newer
+        assert len(index) == 2
+        # The delta sync filters on updated_at
+        assert "updated_at >=" in str(session.execute.await_args.args[0])
+
+
+def cached_value(value, fresh_for=60):
+    """A Redis value as TieredCache stores it, fresh for `fresh_for` seconds."""
+    import time as clock
+
+    from shared.cache import TieredCache
+
+    return TieredCache._wrap(value, clock.time() + fresh_for)
+
+
+class TestTieredCache:
+    """Test the in-process tier in front of the Redis catalog cache."""
+
+    async def _cache(self, lookup):
+        import asyncio
+        from unittest.mock import AsyncMock, MagicMock
+
+        from shared.cache import TieredCache
+
+        messages = asyncio.Queue()
+
+        async def listen():
+            while True:
+                yield await messages.get()
+
+        pubsub = MagicMock()
+        pubsub.subscribe = AsyncMock()
+        pubsub.close = AsyncMock()
+        pubsub.listen = listen
+        redis_client = MagicMock()
+        redis_client.pubsub.return_value = pubsub
+
+        cache = TieredCache(redis_client, prefix="catalog")
+        cache.l2.lookup = AsyncMock(side_effect=lookup)
+        await cache.start()
+        await asyncio.sleep(0)
+        return cache, messages
+
+    @pytest.mark.asyncio
+    async def test_repeat_read_is_served_from_l1(self):
+        """Test a Redis hit is kept in process and the next read skips Redis."""
+        cache, _ = await self._cache([("3", cached_value('["m1"]'))])
+        try:
+            first = await cache.get("movies", ["movies"], {"genre": "drama"})
+            second = await cache.get("movies", ["movies"], {"genre": "drama"})
+        finally:
+            await cache.stop()
+
+        assert first == ("catalog:movies:3:genre=drama", '["m1"]', "l2")
+        assert second == ("catalog:movies:3:genre=drama", '["m1"]', "l1")
+        assert cache.l2.lookup.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_broadcast_invalidation_drops_l1_entries(self):
+        """Test a newer generation from another replica evicts the group."""
+        import asyncio
+
+        cache, messages = await self._cache(
+            [
+                ("3", cached_value('["m1"]')),
+                ("3.1", cached_value("{}")),
+                ("4", cached_value('["m1","m2"]')),
+            ]
+        )
+        try:
+            await cache.get("movies", ["movies"])
+            await cache.get("showtime", ["movies", "theaters"], {"id": "s"})
+            assert len(cache.l1) == 2
+
+            await messages.put({"type": "message", "data": '{"movies": 4}'})
+            await asyncio.sleep(0)
+            assert len(cache.l1) == 0
+
+            key, value, tier = await cache.get("movies", ["movies"])
+        finally:
+            await cache.stop()
+
+        assert (key, value, tier) == ("catalog:movies:4:", '["m1","m2"]', "l2")
+
+    def test_l1_byte_cap_evicts_least_recently_used(self):
+        """Test the byte cap evicts old entries and skips oversized ones."""
+        from shared.cache import TTLCache
+
+        cache = TTLCache(maxsize=100, ttl=60, maxbytes=10, sizeof=len)
+        cache.set("a", "xxxx")
+        cache.set("b", "yyyy")
+        cache.get("a")
+        cache.set("c", "zzzz")
+
+        assert cache.get("b") is None
+        assert cache.get("a") == "xxxx" and cache.get("c") == "zzzz"
+        assert cache.total_bytes == 8
+
+        cache.set("big", "x" * 11)
+        assert cache.get("big") is None
+        assert cache.total_bytes == 8
+
+
+class TestCacheStampede:
+    """Test stampede protection of catalog cache loads."""
+
+    def _cache(self, lookup, lease_acquired=True, stale_ttl=60):
+        from unittest.mock import AsyncMock, MagicMock
+
+        from shared.cache import TieredCache
+
+        redis_client = MagicMock()
+        redis_client.set = AsyncMock(return_value=lease_acquired)
+        redis_client.eval = AsyncMock(return_value=1)
+        cache = TieredCache(redis_client, prefix="catalog", stale_ttl=stale_ttl)
+        cache.l2.lookup = AsyncMock(side_effect=lookup)
+        cache.l2.set = AsyncMock()
+        return cache
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_load(self):
+        """Test a burst of misses for one key runs the loader once."""
+        import asyncio
+
+        cache = self._cache(lambda *args: ("3", None))
+        calls = []
+
+        async def load():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "body"
+
+        results = await asyncio.gather(
+            *[
+                cache.get_or_load("movie", ["movies"], {"id": 1}, load)
+                for _ in range(20)
+            ]
+        )
+
+        assert len(calls) == 1
+        assert {value for value, _ in results} == {"body"}
+        assert sorted({source for _, source in results}) == ["coalesced", "load"]
+        cache.l2.set.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_stale_value_served_while_refreshing(self):
+        """Test an expired entry is returned at once and refreshed in the background."""
+        import asyncio
+
+        cache = self._cache(lambda *args: ("3", cached_value("old", fresh_for=-1)))
+        refreshed = asyncio.Event()
+
+        async def load():
+            refreshed.set()
+            return "new"
+
+        value, source = await cache.get_or_load("movie", ["movies"], {"id": 1}, load)
+        assert (value, source) == ("old", "stale")
+
+        await asyncio.wait_for(refreshed.wait(), timeout=1)
+        await asyncio.sleep(0)
+        key, stored, ttl = cache.l2.set.await_args.args
+        assert stored.endswith("|new")
+        assert ttl == cache.ttl + 60
+
+    @pytest.mark.asyncio
+    async def test_stale_refresh_runs_the_refresh_loader(self):
+        """Test a background refresh uses `refresh`, not the caller's `load`."""
+        import asyncio
+        from unittest.mock import AsyncMock
+
+        cache = self._cache(lambda *args: ("3", cached_value("old", fresh_for=-1)))
+        load = AsyncMock(return_value="from request")
+        refresh = AsyncMock(return_value="new")
+
+        value, source = await cache.get_or_load(
+            "movie", ["movies"], {"id": 1}, load, refresh=refresh
+        )
+        assert (value, source) == ("old", "stale")
+
+        await asyncio.gather(*cache._refreshes)
+        refresh.assert_awaited_once()
+        load.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_other_replica_holding_lease_is_waited_for(self):
+        """Test a replica without the lease picks up the holder's result."""
+        from unittest.mock import AsyncMock
+
+        cache = self._cache(lambda *args: ("3", None), lease_acquired=False)
+        cache.lease_seconds = 1
+        cache.redis.mget = AsyncMock(
+            side_effect=[[None, "holder"], [cached_value("theirs"), None]]
+        )
+        load = AsyncMock(return_value="ours")
+
+        value, source = await cache.get_or_load("movie", ["movies"], {"id": 1}, load)
+
+        assert (value, source) == ("theirs", "remote")
+        load.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_failed_remote_load_is_not_waited_out(self):
+        """Test a lease released without a value ends the wait at once."""
+        import time
+        from unittest.mock import AsyncMock
+
+        from fastapi import HTTPException
+
+        cache = self._cache(lambda *args: ("3", None), lease_acquired=False)
+        cache.lease_seconds = 5
+        cache.redis.mget = AsyncMock(side_effect=[[None, "holder"], [None, None]])
+        load = AsyncMock(side_effect=HTTPException(status_code=404))
+
+        started = time.monotonic()
+        with pytest.raises(HTTPException) as exc:
+            await cache.get_or_load("showtime", ["showtimes"], {"id": 1}, load)
+
+        assert exc.value.status_code == 404
+        assert time.monotonic() - started < 1
+        load.assert_awaited_once()
@@ -9,17 +9,24 @@ from datetime import datetime
 from typing import List, Optional
 
 import aio_pika
-from fastapi import Depends, FastAPI, Request, status
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from prometheus_client import Counter, Gauge, Histogram
 from prometheus_fastapi_instrumentator import Instrumentator
 from pydantic import BaseModel
-from sqlalchemy import Column, DateTime, String, Text
+from sqlalchemy import Column, DateTime, Index, String, Text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base
 from starlette.middleware.base import BaseHTTPMiddleware
 
+from shared.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    InvalidPageRequest,
+    Pager,
+)
+
 # Correlation ID context
 correlation_id_ctx: ContextVar[str] = ContextVar("correlation_id", default="")
 
@@ -82,6 +89,10 @@ Base = declarative_base()
 # Models
 class Notification(Base):
     __tablename__ = "notifications"
+    # Serves a user's notifications, newest first
+    __table_args__ = (
+        Index("idx_notifications_user_created", "user_id", "created_at", "id"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     # Note: No ForeignKey to users table since each service has its own database
@@ -115,6 +126,14 @@ class NotificationResponse(BaseModel):
         from_attributes = True
 
 
+NOTIFICATIONS_PAGE = Pager(
+    Notification,
+    NotificationResponse,
+    (Notification.created_at, Notification.id),
+    descending=True,
+)
+
+
 app = FastAPI(
     title="Notification Service",
     description="""
@@ -179,6 +198,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
     allow_headers=["Authorization", "Content-Type", "X-Correlation-ID"],
+    # Readable by cross-origin frontends: the cursor of the next page
+    expose_headers=["X-Next-Cursor"],
 )
 
 rabbitmq_connection: Optional[aio_pika.Connection] = None
@@ -378,18 +399,24 @@ async def send_notification(
 
 
 @app.get("/notifications", response_model=List[NotificationResponse])
-async def get_notifications(user_id: uuid.UUID, db: AsyncSession = Depends(get_db)):
-    """Get notifications for a user"""
-    from sqlalchemy import select
-
-    result = await db.execute(
-        select(Notification)
-        .filter(Notification.user_id == user_id)
-        .order_by(Notification.created_at.desc())
-    )
+async def get_notifications(
+    user_id: uuid.UUID,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """Get notifications for a user, newest first; the next page is in X-Next-Cursor"""
+    try:
+        query, names = NOTIFICATIONS_PAGE.select(
+            Notification.user_id == user_id, cursor=cursor, limit=limit, fields=fields
+        )
+    except InvalidPageRequest as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    notifications = result.scalars().all()
-    return notifications
+    result = await db.execute(query)
+    body, headers = NOTIFICATIONS_PAGE.dump(result.all(), limit, names)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 if __name__ == "__main__":
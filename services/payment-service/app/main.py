@@ -11,18 +11,29 @@ from typing import List, Optional
 
 import aio_pika
 import httpx
-from fastapi import Depends, FastAPI, HTTPException, Request, status
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordBearer
 from prometheus_client import Counter, Histogram
 from prometheus_fastapi_instrumentator import Instrumentator
 from pydantic import BaseModel
-from sqlalchemy import DECIMAL, Column, DateTime, String, select
+from sqlalchemy import DECIMAL, Column, DateTime, Index, String, select
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base
 from starlette.middleware.base import BaseHTTPMiddleware
 
+from shared.auth import BatchVerifier, TokenVerificationCache, user_from_claims
+from shared.http_client import ServiceClientRegistry
+from shared.jwks import JWKSVerifier, TokenVerificationError
+from shared.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    InvalidPageRequest,
+    Pager,
+)
+from shared.revocation import RevocationList
+
 # Correlation ID context
 correlation_id_ctx: ContextVar[str] = ContextVar("correlation_id", default="")
 
@@ -68,6 +79,25 @@ AUTH_SERVICE_URL = os.getenv("AUTH_SERVICE_URL", "http://auth-service:8000")
 BOOKING_SERVICE_URL = os.getenv("BOOKING_SERVICE_URL", "http://booking-service:8000")
 REDIS_URL = os.getenv("REDIS_URL", "redis://:redis123@redis:6379/3")
 REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT", "10.0"))
+AUTH_REQUEST_TIMEOUT = float(os.getenv("AUTH_REQUEST_TIMEOUT", str(REQUEST_TIMEOUT)))
+BOOKING_REQUEST_TIMEOUT = float(
+    os.getenv("BOOKING_REQUEST_TIMEOUT", str(REQUEST_TIMEOUT))
+)
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "false").lower() == "true"
+TOKEN_CACHE_TTL = float(os.getenv("TOKEN_CACHE_TTL", "60"))
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+# Concurrent token cache misses share one /verify/batch call, sent when this
+# many are waiting or this many ms after the first
+AUTH_VERIFY_BATCH_SIZE = int(os.getenv("AUTH_VERIFY_BATCH_SIZE", "100"))
+AUTH_VERIFY_BATCH_WAIT_MS = float(os.getenv("AUTH_VERIFY_BATCH_WAIT_MS", "2"))
+# Auth-service's Redis, where revoked tokens are recorded
+REVOCATION_REDIS_URL = os.getenv(
+    "REVOCATION_REDIS_URL", "redis://:redis123@redis:6379/0"
+)
+REVOCATION_SYNC_INTERVAL = float(os.getenv("REVOCATION_SYNC_INTERVAL", "5"))
+JWKS_CACHE_TTL = float(os.getenv("JWKS_CACHE_TTL", "300"))
 CORS_ORIGINS = os.getenv(
     "CORS_ORIGINS", "http://localhost:8080,http://localhost:3000"
 ).split(",")
@@ -92,6 +122,10 @@ redis_client: Optional = None
 # Models
 class Payment(Base):
     __tablename__ = "payments"
+    # Serves a user's payment history, newest first
+    __table_args__ = (
+        Index("idx_payments_user_created", "user_id", "created_at", "id"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     # Note: No ForeignKey to bookings table since each service has its own database
@@ -130,6 +164,11 @@ class PaymentResponse(BaseModel):
         from_attributes = True
 
 
+PAYMENTS_PAGE = Pager(
+    Payment, PaymentResponse, (Payment.created_at, Payment.id), descending=True
+)
+
+
 app = FastAPI(
     title="Payment Service",
     description="""
@@ -193,12 +232,69 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
     allow_headers=["Authorization", "Content-Type", "X-Correlation-ID"],
+    # Readable by cross-origin frontends: the cursor of the next page
+    expose_headers=["X-Next-Cursor"],
 )
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 rabbitmq_connection: Optional[aio_pika.Connection] = None
 rabbitmq_channel: Optional[aio_pika.Channel] = None
 
+# Pooled clients for downstream services (opened at startup, closed at shutdown)
+service_clients = ServiceClientRegistry()
+auth_client = service_clients.register(
+    "auth-service",
+    AUTH_SERVICE_URL,
+    timeout=AUTH_REQUEST_TIMEOUT,
+    max_connections=HTTP_MAX_CONNECTIONS,
+    max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+    http2=HTTP2_ENABLED,
+)
+booking_client = service_clients.register(
+    "booking-service",
+    BOOKING_SERVICE_URL,
+    timeout=BOOKING_REQUEST_TIMEOUT,
+    max_connections=HTTP_MAX_CONNECTIONS,
+    max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+    http2=HTTP2_ENABLED,
+)
+
+
+token_cache = TokenVerificationCache(maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL)
+batch_verifier = BatchVerifier(
+    auth_client,
+    max_batch=AUTH_VERIFY_BATCH_SIZE,
+    max_wait=AUTH_VERIFY_BATCH_WAIT_MS / 1000,
+)
+jwks_verifier = JWKSVerifier(auth_client, cache_ttl=JWKS_CACHE_TTL)
+
+
+async def verify_token_locally(token: str) -> Optional[dict]:
+    """Verify an asymmetric token against auth-service's JWKS, None if not possible"""
+    if not jwks_verifier.can_verify(token):
+        return None
+    try:
+        claims = await jwks_verifier.verify(token)
+    except TokenVerificationError:
+        raise HTTPException(status_code=401, detail="Invalid authentication")
+    except Exception as e:
+        logger.warning(f"Local token verification unavailable: {e}")
+        return None
+    user = user_from_claims(claims)
+    if not user["user_id"]:
+        raise HTTPException(status_code=401, detail="Invalid authentication")
+    return user
+
+
+revocation_redis: Optional = None
+revocation_list: Optional[RevocationList] = None
+
+
+async def reject_revoked(token: str):
+    """401 for a verified token that has since been revoked (logout, password change)"""
+    if revocation_list and await revocation_list.is_token_revoked(token):
+        raise HTTPException(status_code=401, detail="Invalid authentication")
+
 
 async def get_db():
     async with async_session_maker() as session:
@@ -206,18 +302,23 @@ async def get_db():
 
 
 async def get_current_user(token: str = Depends(oauth2_scheme)):
-    """Verify token with auth service"""
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(
-                f"{AUTH_SERVICE_URL}/verify",
-                headers={"Authorization": f"Bearer {token}"},
-            )
-            if response.status_code == 200:
-                return response.json()
-            raise HTTPException(status_code=401, detail="Invalid authentication")
-        except Exception as e:
-            raise HTTPException(status_code=401, detail=f"Auth service error: {str(e)}")
+    """Verify token locally via JWKS, else via the local cache or auth service"""
+    user = await verify_token_locally(token)
+    if user is not None:
+        await reject_revoked(token)
+        return user
+
+    async def verify_with_auth_service():
+        return await batch_verifier.verify(token)
+
+    try:
+        user = await token_cache.get_or_verify(token, verify_with_auth_service)
+    except Exception as e:
+        raise HTTPException(status_code=401, detail=f"Auth service error: {str(e)}")
+    if user is None:
+        raise HTTPException(status_code=401, detail="Invalid authentication")
+    await reject_revoked(token)
+    return user
 
 
 async def publish_notification(message: dict):
@@ -269,13 +370,27 @@ async def store_idempotency(idempotency_key: str, payment_id: str):
 @app.on_event("startup")
 async def startup_event():
     global rabbitmq_connection, rabbitmq_channel, redis_client
+    global revocation_redis, revocation_list
 
     # Connect to Redis
     import redis.asyncio as aioredis
 
     redis_client = await aioredis.from_url(REDIS_URL, decode_responses=True)
+    revocation_redis = await aioredis.from_url(
+        REVOCATION_REDIS_URL, decode_responses=True
+    )
+    revocation_list = RevocationList(
+        revocation_redis, sync_interval=REVOCATION_SYNC_INTERVAL
+    )
+    await revocation_list.start()
     logger.info("Connected to Redis")
 
+    await service_clients.start_all()
+    try:
+        await jwks_verifier.refresh()
+    except Exception as e:
+        logger.warning(f"Could not prefetch JWKS, will retry on demand: {e}")
+
     # Connect to RabbitMQ with retry
     max_retries = 5
     for attempt in range(max_retries):
@@ -301,6 +416,11 @@ async def startup_event():
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    await service_clients.close_all()
+    if revocation_list:
+        await revocation_list.stop()
+    if revocation_redis:
+        await revocation_redis.close()
     if rabbitmq_connection:
         await rabbitmq_connection.close()
     if redis_client:
@@ -353,19 +473,18 @@ async def process_payment(
             return existing_payment
 
     # Verify booking exists via booking-service API (database-per-service pattern)
-    async with httpx.AsyncClient(timeout=REQUEST_TIMEOUT) as client:
-        try:
-            response = await client.get(
-                f"{BOOKING_SERVICE_URL}/internal/bookings/{payment_data.booking_id}",
-            )
-            if response.status_code == 404:
-                raise HTTPException(status_code=404, detail="Booking not found")
-            if response.status_code != 200:
-                raise HTTPException(status_code=502, detail="Booking service error")
-            booking = response.json()
-        except httpx.RequestError as e:
-            logger.error(f"Booking service request error: {e}")
-            raise HTTPException(status_code=503, detail="Booking service unavailable")
+    try:
+        response = await booking_client.get(
+            f"/internal/bookings/{payment_data.booking_id}",
+        )
+        if response.status_code == 404:
+            raise HTTPException(status_code=404, detail="Booking not found")
+        if response.status_code != 200:
+            raise HTTPException(status_code=502, detail="Booking service error")
+        booking = response.json()
+    except httpx.RequestError as e:
+        logger.error(f"Booking service request error: {e}")
+        raise HTTPException(status_code=503, detail="Booking service unavailable")
 
     # Verify user owns this booking
     if booking.get("user_id") != str(current_user["user_id"]):
@@ -402,15 +521,14 @@ async def process_payment(
     await db.refresh(new_payment)
 
     # Update booking status via booking-service API
-    async with httpx.AsyncClient(timeout=REQUEST_TIMEOUT) as client:
-        try:
-            await client.patch(
-                f"{BOOKING_SERVICE_URL}/internal/bookings/{payment_data.booking_id}/payment-status",
-                json={"payment_status": "paid", "status": "confirmed"},
-            )
-        except httpx.RequestError as e:
-            logger.warning(f"Failed to update booking status: {e}")
-            # Payment is recorded, booking update can be retried or reconciled later
+    try:
+        await booking_client.patch(
+            f"/internal/bookings/{payment_data.booking_id}/payment-status",
+            json={"payment_status": "paid", "status": "confirmed"},
+        )
+    except httpx.RequestError as e:
+        logger.warning(f"Failed to update booking status: {e}")
+        # Payment is recorded, booking update can be retried or reconciled later
 
     # Store idempotency key
     if payment_data.idempotency_key:
@@ -437,16 +555,27 @@ async def process_payment(
 
 @app.get("/payments", response_model=List[PaymentResponse])
 async def get_payments(
-    current_user: dict = Depends(get_current_user), db: AsyncSession = Depends(get_db)
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
-    """Get user's payment history"""
+    """Get user's payment history, newest first; the next page is in X-Next-Cursor"""
     # Get payments for this user directly (no cross-db join needed)
-    result = await db.execute(
-        select(Payment).where(Payment.user_id == uuid.UUID(current_user["user_id"]))
-    )
+    try:
+        query, names = PAYMENTS_PAGE.select(
+            Payment.user_id == uuid.UUID(current_user["user_id"]),
+            cursor=cursor,
+            limit=limit,
+            fields=fields,
+        )
+    except InvalidPageRequest as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    payments = result.scalars().all()
-    return payments
+    result = await db.execute(query)
+    body, headers = PAYMENTS_PAGE.dump(result.all(), limit, names)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 @app.get("/payments/{payment_id}", response_model=PaymentResponse)
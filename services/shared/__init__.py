@@ -1,52 +1,90 @@
 """
 Shared module for Movie Booking Microservices
+
+Exports are resolved lazily, so a service only needs the dependencies of the
+modules it actually uses (e.g. `from shared.http_client import ...` does not
+require aio-pika).
 """
 
-from .config import (
-    AuthServiceConfig,
-    BaseConfig,
-    BookingServiceConfig,
-    MovieServiceConfig,
-    NotificationServiceConfig,
-    PaymentServiceConfig,
-    get_config,
-)
-from .database import Base, DatabaseManager
-from .distributed_patterns import (
-    CircuitBreaker,
-    CircuitBreakerOpenError,
-    DistributedLock,
-    IdempotencyChecker,
-    LockAcquisitionError,
-    RateLimiter,
-    Retry,
-)
-from .messaging import Event, EventTypes, Exchanges, MessageBroker, Queues
+import importlib
 
-__all__ = [
+_EXPORTS = {
+    # Auth
+    "TokenVerificationCache": "auth",
+    "BatchVerifier": "auth",
+    "user_from_claims": "auth",
+    "unverified_claims": "auth",
+    "JWKSVerifier": "jwks",
+    "TokenVerificationError": "jwks",
+    # Claims Cache
+    "ClaimsCache": "claims_cache",
+    # Cache
+    "TTLCache": "cache",
+    "SingleFlight": "cache",
+    "RedisCache": "cache",
+    "TieredCache": "cache",
+    # Catalog Import
+    "read_records": "catalog_import",
+    "seat_grid": "catalog_import",
+    "InvalidRecord": "catalog_import",
     # Config
-    "BaseConfig",
-    "AuthServiceConfig",
-    "MovieServiceConfig",
-    "BookingServiceConfig",
-    "PaymentServiceConfig",
-    "NotificationServiceConfig",
-    "get_config",
+    "BaseConfig": "config",
+    "AuthServiceConfig": "config",
+    "MovieServiceConfig": "config",
+    "BookingServiceConfig": "config",
+    "PaymentServiceConfig": "config",
+    "NotificationServiceConfig": "config",
+    "get_config": "config",
     # Database
-    "DatabaseManager",
-    "Base",
+    "DatabaseManager": "database",
+    "Base": "database",
     # Distributed Patterns
-    "CircuitBreaker",
-    "CircuitBreakerOpenError",
-    "DistributedLock",
-    "LockAcquisitionError",
-    "Retry",
-    "IdempotencyChecker",
-    "RateLimiter",
+    "CircuitBreaker": "distributed_patterns",
+    "CircuitBreakerOpenError": "distributed_patterns",
+    "DistributedLock": "distributed_patterns",
+    "LockAcquisitionError": "distributed_patterns",
+    "LeaderElection": "distributed_patterns",
+    "Retry": "distributed_patterns",
+    "IdempotencyChecker": "distributed_patterns",
+    "RateLimiter": "distributed_patterns",
+    # HTTP Client
+    "ServiceClient": "http_client",
+    "ServiceClientRegistry": "http_client",
+    # Pagination
+    "Pager": "pagination",
+    "InvalidPageRequest": "pagination",
+    # Prefix Index
+    "PrefixIndex": "prefix_index",
+    # Refresh Tokens
+    "RefreshTokenStore": "refresh_tokens",
+    "InvalidRefreshToken": "refresh_tokens",
+    "RefreshTokenReused": "refresh_tokens",
+    # Revocation
+    "RevocationList": "revocation",
+    # Schedule Index
+    "ScheduleIndex": "schedule_index",
+    "ScheduleEntry": "schedule_index",
+    # Seat Map
+    "SeatMap": "seat_map",
+    "SeatMapEvents": "seat_map",
+    # Worker Pool
+    "WorkerPool": "worker_pool",
+    "WorkerPoolFull": "worker_pool",
     # Messaging
-    "MessageBroker",
-    "Event",
-    "EventTypes",
-    "Exchanges",
-    "Queues",
-]
+    "MessageBroker": "messaging",
+    "Event": "messaging",
+    "EventTypes": "messaging",
+    "Exchanges": "messaging",
+    "Queues": "messaging",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,234 @@
+"""
+Shared Auth Module
+Helpers for services that authenticate requests against auth-service
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import time
+from typing import Any, Awaitable, Callable, List, Optional, Set, Tuple
+
+from prometheus_client import Counter, Histogram
+
+from .cache import SingleFlight, TTLCache
+
+token_cache_counter = Counter(
+    "token_cache_total", "Token verification cache results", ["result"]
+)
+token_batch_histogram = Histogram(
+    "token_verify_batch_size",
+    "Tokens per batched call to auth-service",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500),
+)
+
+
+def unverified_claims(token: str) -> dict:
+    """
+    Read the claims of a JWT without verifying it, {} if it cannot be parsed
+
+    Only for tokens that are verified anyway; nothing read here may grant
+    access on its own.
+    """
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+        return claims if isinstance(claims, dict) else {}
+    except (IndexError, ValueError, TypeError, AttributeError):
+        return {}
+
+
+def token_expiry(token: str) -> Optional[float]:
+    """
+    Read the `exp` claim of a JWT without verifying it
+
+    Only used to bound how long a verified result may be cached; the token
+    itself is always verified by auth-service before it is cached.
+    """
+    try:
+        exp = unverified_claims(token).get("exp")
+        return float(exp) if exp is not None else None
+    except (ValueError, TypeError):
+        return None
+
+
+def user_from_claims(claims: dict) -> dict:
+    """Build the current-user dict from locally verified access-token claims"""
+    return {
+        "user_id": claims.get("user_id"),
+        "username": claims.get("sub"),
+        "role": claims.get("role"),
+    }
+
+
+class TokenVerificationCache:
+    """
+    Bounded in-process cache of verified token -> user claims
+
+    Entries are keyed by a SHA-256 of the token (raw tokens are never held as
+    keys), expire after `ttl` seconds or at the token's `exp`, whichever comes
+    first, and concurrent misses for the same token share one upstream call.
+
+    Usage:
+        token_cache = TokenVerificationCache(maxsize=10000, ttl=60)
+        user = await token_cache.get_or_verify(token, verify_with_auth_service)
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 60.0):
+        self.ttl = ttl
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._flight = SingleFlight()
+
+    @staticmethod
+    def key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[Any]:
+        return self._cache.get(self.key(token))
+
+    def set(self, token: str, claims: Any) -> None:
+        ttl = self.ttl
+        exp = token_expiry(token)
+        if exp is not None:
+            ttl = min(ttl, exp - time.time())
+        if ttl > 0:
+            self._cache.set(self.key(token), claims, ttl=ttl)
+
+    def invalidate(self, token: str) -> bool:
+        return self._cache.invalidate(self.key(token))
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    async def get_or_verify(
+        self, token: str, verify: Callable[[], Awaitable[Optional[Any]]]
+    ) -> Optional[Any]:
+        """
+        Return cached claims for `token`, or call `verify` once and cache them
+
+        `verify` returns the claims, or None when the token is rejected;
+        rejections and exceptions are not cached.
+        """
+        key = self.key(token)
+        claims = self._cache.get(key)
+        if claims is not None:
+            token_cache_counter.labels(result="hit").inc()
+            return claims
+
+        if self._flight.in_flight(key):
+            token_cache_counter.labels(result="coalesced").inc()
+        else:
+            token_cache_counter.labels(result="miss").inc()
+
+        async def verify_and_store():
+            result = await verify()
+            if result is not None:
+                self.set(token, result)
+            return result
+
+        return await self._flight.do(key, verify_and_store)
+
+
+class IncompleteBatch(Exception):
+    """Raised when auth-service answers a batch with the wrong number of results"""
+
+    pass
+
+
+class BatchVerifier:
+    """
+    Coalesces concurrent token verifications into `POST /verify/batch` calls
+
+    Each `verify` joins the pending batch, which is sent once it holds
+    `max_batch` tokens or `max_wait` seconds after its first token, so under
+    load many requests share one round trip to auth-service at the cost of
+    at most `max_wait` added latency.
+
+    `verify` returns the claims, or None when auth-service rejects the
+    token. A failed call (transport error, non-2xx) raises in every caller
+    of that batch, so callers retry and break circuits as they would for a
+    single `/verify`. If the reply holds fewer or more results than tokens,
+    every token of the batch is verified on its own with `single_path`.
+
+    Usage:
+        batch_verifier = BatchVerifier(auth_client, max_batch=100, max_wait=0.002)
+        user = await token_cache.get_or_verify(
+            token, lambda: batch_verifier.verify(token)
+        )
+    """
+
+    def __init__(
+        self,
+        client,
+        max_batch: int = 100,
+        max_wait: float = 0.002,
+        path: str = "/verify/batch",
+        single_path: str = "/verify",
+    ):
+        self.client = client
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.path = path
+        self.single_path = single_path
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._sending: Set[asyncio.Task] = set()
+
+    async def verify(self, token: str) -> Optional[dict]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((token, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        try:
+            return await future
+        except IncompleteBatch:
+            return await self._verify_one(token)
+
+    async def _verify_one(self, token: str) -> Optional[dict]:
+        response = await self.client.get(
+            self.single_path, headers={"Authorization": f"Bearer {token}"}
+        )
+        if response.status_code == 401:
+            return None
+        response.raise_for_status()
+        return response.json()
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._send(batch))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    async def _send(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        token_batch_histogram.observe(len(batch))
+        try:
+            response = await self.client.post(
+                self.path, json={"tokens": [token for token, _ in batch]}
+            )
+            response.raise_for_status()
+            results = response.json()["results"]
+            if len(results) != len(batch):
+                # Results are matched by position, so none of them can be used
+                raise IncompleteBatch(
+                    f"{len(results)} verification results for {len(batch)} tokens"
+                )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result.get("claims"))
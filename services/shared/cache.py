@@ -0,0 +1,661 @@
+"""
+Shared Cache Module
+In-process and Redis caching primitives used across services
+"""
+
+import asyncio
+import json
+import logging
+import sys
+import time
+from collections import OrderedDict
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+)
+from urllib.parse import urlencode
+
+import redis.asyncio as redis
+from prometheus_client import Counter
+
+from .distributed_patterns import DistributedLock
+
+logger = logging.getLogger(__name__)
+
+cache_refresh_counter = Counter(
+    "cache_refresh_total", "Stale cache entries refreshed in the background", ["result"]
+)
+
+T = TypeVar("T")
+
+
+class TTLCache:
+    """
+    Bounded LRU cache whose entries expire `ttl` seconds after being set
+
+    Besides `maxsize` entries, the cache can be capped at `maxbytes` as
+    measured by `sizeof` (sys.getsizeof by default); least recently used
+    entries are evicted to stay under both limits.
+
+    Usage:
+        cache = TTLCache(maxsize=1024, ttl=30)
+        cache.set("showtime:1", showtime)
+        showtime = cache.get("showtime:1")
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float = 30.0,
+        maxbytes: Optional[int] = None,
+        sizeof: Callable[[Any], int] = sys.getsizeof,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.maxbytes = maxbytes
+        self.sizeof = sizeof
+        self.total_bytes = 0
+        self._data: OrderedDict = OrderedDict()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return default
+        expires_at, value, _ = item
+        if expires_at <= time.monotonic():
+            self.invalidate(key)
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        size = self.sizeof(value) if self.maxbytes is not None else 0
+        self.invalidate(key)
+        if self.maxbytes is not None and size > self.maxbytes:
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value, size)
+        self.total_bytes += size
+        while len(self._data) > self.maxsize or (
+            self.maxbytes is not None and self.total_bytes > self.maxbytes
+        ):
+            _, (_, _, evicted) = self._data.popitem(last=False)
+            self.total_bytes -= evicted
+
+    def invalidate(self, key: str) -> bool:
+        item = self._data.pop(key, None)
+        if item is None:
+            return False
+        self.total_bytes -= item[2]
+        return True
+
+    def prune(self, predicate: Callable[[str, Any], bool]) -> int:
+        """Drop every entry for which predicate(key, value) is true"""
+        keys = [key for key, item in self._data.items() if predicate(key, item[1])]
+        for key in keys:
+            self.invalidate(key)
+        return len(keys)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.total_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls for the same key into one in-flight call
+
+    The first caller for a key starts the work; callers arriving while it is
+    still running await the same result (or exception) instead of repeating it.
+
+    Usage:
+        flight = SingleFlight()
+        user = await flight.do(token_hash, lambda: verify_remote(token))
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Future] = {}
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._calls
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        # Shield so one cancelled waiter does not cancel the shared call
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Future) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+
+
+class RedisCache:
+    """
+    Redis cache of pre-serialized values with group invalidation
+
+    Every entry belongs to one or more groups (e.g. "movies") and its key
+    embeds the current generation of each: `{prefix}:{name}:{gens}:{params}`.
+    Invalidating a group bumps its generation, so every entry built on the
+    old one, including list results under any filter combination, stops
+    being read at once and ages out on its TTL. A value loaded while its
+    group was being invalidated is stored under the old generation and never
+    served. Redis errors are logged and treated as misses.
+
+    Usage:
+        cache = RedisCache(redis_client, prefix="catalog", ttl=300)
+        key, value = await cache.get("movies", ["movies"], {"genre": "drama"})
+        if value is None:
+            value = await load()
+            await cache.set(key, value)
+        await cache.invalidate("movies")
+    """
+
+    # KEYS = group generations, ARGV = entry key prefix, normalized params
+    GET_SCRIPT = """
+    local gens = {}
+    for i, key in ipairs(KEYS) do
+        gens[i] = redis.call("get", key) or "0"
+    end
+    local generation = table.concat(gens, ".")
+    return {generation, redis.call("get", ARGV[1] .. ":" .. generation .. ":" .. ARGV[2])}
+    """
+
+    def __init__(self, redis_client: redis.Redis, prefix: str, ttl: float = 300.0):
+        self.redis = redis_client
+        self.prefix = prefix
+        self.ttl = ttl
+        self._get = redis_client.register_script(self.GET_SCRIPT)
+
+    def generation_key(self, group: str) -> str:
+        return f"{self.prefix}:gen:{group}"
+
+    def entry_key(self, name: str, generation: str, params: str) -> str:
+        return f"{self.prefix}:{name}:{generation}:{params}"
+
+    @staticmethod
+    def normalize(params: Optional[Dict[str, Any]] = None) -> str:
+        """Canonical query string: sorted, without unset parameters"""
+        return urlencode(
+            sorted((k, str(v)) for k, v in (params or {}).items() if v is not None)
+        )
+
+    async def get(
+        self,
+        name: str,
+        groups: Sequence[str],
+        params: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[Optional[str], Optional[Any]]:
+        """
+        Look up an entry in one round trip
+
+        Returns (key, value); value is None on a miss. Pass the key to `set`
+        to store the loaded value under the generations seen here. Both are
+        None when Redis is unavailable.
+        """
+        generation, value = await self.lookup(name, groups, params)
+        if generation is None:
+            return None, None
+        return self.entry_key(name, generation, self.normalize(params)), value
+
+    async def lookup(
+        self,
+        name: str,
+        groups: Sequence[str],
+        params: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[Optional[str], Optional[Any]]:
+        """Like `get`, but returns the groups' generations ("3.7") instead of the key"""
+        try:
+            generation, value = await self._get(
+                keys=[self.generation_key(group) for group in groups],
+                args=[f"{self.prefix}:{name}", self.normalize(params)],
+            )
+        except Exception as e:
+            logger.warning(f"Cache read failed for {name}: {e}")
+            return None, None
+        return generation, value
+
+    async def set(self, key: Optional[str], value: Any, ttl: Optional[float] = None):
+        if key is None:
+            return
+        try:
+            await self.redis.set(key, value, ex=int(ttl or self.ttl))
+        except Exception as e:
+            logger.warning(f"Cache write failed for {key}: {e}")
+
+    async def put(
+        self,
+        name: str,
+        groups: Sequence[str],
+        params: Optional[Dict[str, Any]],
+        value: Any,
+        ttl: Optional[float] = None,
+    ) -> None:
+        """Write-through: store a value under the groups' current generations"""
+        try:
+            gens = await self.redis.mget(
+                [self.generation_key(group) for group in groups]
+            )
+        except Exception as e:
+            logger.warning(f"Cache write failed for {name}: {e}")
+            return
+        generation = ".".join(gen or "0" for gen in gens)
+        await self.set(
+            self.entry_key(name, generation, self.normalize(params)), value, ttl
+        )
+
+    async def invalidate(self, *groups: str) -> Dict[str, int]:
+        """Drop every entry of the given groups; returns their new generations"""
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for group in groups:
+                    pipe.incr(self.generation_key(group))
+                return dict(zip(groups, await pipe.execute()))
+        except Exception as e:
+            logger.error(f"Cache invalidation failed for {groups}: {e}")
+            return {}
+
+
+class TieredCache:
+    """
+    In-process LRU (L1) in front of a RedisCache (L2)
+
+    The process keeps the generation of every group it has seen, so an L1
+    hit needs no network call at all. `invalidate` bumps the generations in
+    Redis and broadcasts the new ones on `{prefix}:invalidations`; every
+    replica, this one included, adopts them and drops its L1 entries of
+    those groups as soon as the message arrives. Generations only move
+    forward, so a slow read can never bring an older one back.
+
+    While the broadcast subscription is down the L1 is bypassed, and it is
+    cleared once the subscription is back, so a replica never serves an L1
+    entry it might have missed an invalidation for. L1 entries also expire
+    after `l1_ttl`, and the L1 is capped at `l1_maxsize` entries and
+    `l1_maxbytes` bytes of values.
+
+    `get_or_load` protects the loader from stampedes: concurrent misses for
+    a key share one load per process, and a short Redis lease lets only one
+    replica load it while the others wait for its result. Entries stay
+    servable for `stale_ttl` seconds past their TTL; a stale hit is answered
+    at once and refreshed in the background under the same lease.
+
+    Usage:
+        cache = TieredCache(redis_client, prefix="catalog", stale_ttl=60)
+        await cache.start()
+        value, source = await cache.get_or_load("movies", ["movies"], params, load)
+        await cache.invalidate("movies")
+    """
+
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        prefix: str,
+        ttl: float = 300.0,
+        l1_ttl: float = 30.0,
+        l1_maxsize: int = 10000,
+        l1_maxbytes: Optional[int] = 32 * 1024 * 1024,
+        stale_ttl: float = 0.0,
+        lease_seconds: int = 5,
+        reconnect_delay: float = 1.0,
+    ):
+        self.redis = redis_client
+        self.l2 = RedisCache(redis_client, prefix=prefix, ttl=ttl)
+        # L1 values are (groups, value, fresh_until); only the value counts
+        # towards the cap
+        self.l1 = TTLCache(
+            maxsize=l1_maxsize,
+            ttl=l1_ttl,
+            maxbytes=l1_maxbytes,
+            sizeof=lambda entry: sys.getsizeof(entry[1]),
+        )
+        self.stale_ttl = stale_ttl
+        self.lease_seconds = lease_seconds
+        self.channel = f"{prefix}:invalidations"
+        self.reconnect_delay = reconnect_delay
+        self._generations: Dict[str, int] = {}
+        self._subscribed = False
+        self._task: Optional[asyncio.Task] = None
+        self._flight = SingleFlight()
+        self._refreshes: Set[asyncio.Future] = set()
+
+    @property
+    def ttl(self) -> float:
+        return self.l2.ttl
+
+    async def get(
+        self,
+        name: str,
+        groups: Sequence[str],
+        params: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[Optional[str], Optional[Any], Optional[str]]:
+        """
+        Look up a fresh entry in L1, then Redis
+
+        Returns (key, value, tier) with tier "l1" or "l2"; value and tier are
+        None on a miss, and key is None as well when Redis is unavailable.
+        """
+        key, value, fresh_until, tier = await self._lookup(name, groups, params)
+        if value is None or fresh_until <= time.time():
+            return key, None, None
+        return key, value, tier
+
+    async def get_or_load(
+        self,
+        name: str,
+        groups: Sequence[str],
+        params: Optional[Dict[str, Any]],
+        load: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None,
+        refresh: Optional[Callable[[], Awaitable[Any]]] = None,
+    ) -> Tuple[Any, str]:
+        """
+        Return the cached value, loading it on a miss without a stampede
+
+        The source is "l1" or "l2" (fresh hit), "stale" (served while one
+        background refresh runs), "load" (loaded here), "coalesced" (shared
+        another caller's load in this process) or "remote" (waited for
+        another replica's load).
+
+        A background refresh outlives the call, so it runs `refresh` when
+        given: a loader that must not use anything scoped to the caller,
+        such as a request's database session. It defaults to `load`.
+        """
+        key, value, fresh_until, tier = await self._lookup(name, groups, params)
+        if value is not None:
+            if fresh_until > time.time():
+                return value, tier
+            self._refresh_in_background(key, groups, refresh or load, ttl)
+            return value, "stale"
+
+        if key is None:
+            # Redis is unavailable; still load once per process
+            flight_key = f"{name}:{self.l2.normalize(params)}"
+            return await self._flight.do(flight_key, load), "load"
+
+        coalesced = self._flight.in_flight(key)
+        value, source = await self._flight.do(
+            key, lambda: self._load_once(key, groups, load, ttl)
+        )
+        if value is None:
+            # Joined a background refresh that another replica was running
+            return await self._load_and_store(key, groups, load, ttl), "load"
+        return value, "coalesced" if coalesced else source
+
+    async def set(
+        self,
+        key: Optional[str],
+        value: Any,
+        ttl: Optional[float] = None,
+        groups: Sequence[str] = (),
+    ) -> None:
+        if key is None:
+            return
+        ttl = ttl or self.ttl
+        fresh_until = time.time() + ttl
+        await self.l2.set(key, self._wrap(value, fresh_until), ttl + self.stale_ttl)
+        self._store_l1(key, value, groups, fresh_until)
+
+    async def put(
+        self,
+        name: str,
+        groups: Sequence[str],
+        params: Optional[Dict[str, Any]],
+        value: Any,
+        ttl: Optional[float] = None,
+    ) -> None:
+        """Write-through to Redis; replicas pick the entry up on their next read"""
+        ttl = ttl or self.ttl
+        await self.l2.put(
+            name,
+            groups,
+            params,
+            self._wrap(value, time.time() + ttl),
+            ttl + self.stale_ttl,
+        )
+
+    async def invalidate(self, *groups: str) -> None:
+        """Drop the groups' entries here, in Redis and on every other replica"""
+        generations = await self.l2.invalidate(*groups)
+        if not generations:
+            return
+        self._apply(generations)
+        try:
+            await self.redis.publish(self.channel, json.dumps(generations))
+        except Exception as e:
+            # Other replicas catch up when their L1 entries expire
+            logger.error(f"Cache invalidation broadcast failed for {groups}: {e}")
+
+    # Redis values carry the time until which they are fresh: "{ms}|{value}"
+    @staticmethod
+    def _wrap(value: str, fresh_until: float) -> str:
+        return f"{int(fresh_until * 1000)}|{value}"
+
+    @staticmethod
+    def _unwrap(raw: Optional[str]) -> Tuple[Optional[str], float]:
+        fresh_until, sep, value = (raw or "").partition("|")
+        if not sep or not fresh_until.isdigit():
+            return None, 0.0
+        return value, int(fresh_until) / 1000
+
+    async def _lookup(
+        self,
+        name: str,
+        groups: Sequence[str],
+        params: Optional[Dict[str, Any]],
+    ) -> Tuple[Optional[str], Optional[Any], float, Optional[str]]:
+        params_key = self.l2.normalize(params)
+        if self._subscribed and all(group in self._generations for group in groups):
+            generation = ".".join(str(self._generations[group]) for group in groups)
+            key = self.l2.entry_key(name, generation, params_key)
+            entry = self.l1.get(key)
+            if entry is not None:
+                return key, entry[1], entry[2], "l1"
+
+        generation, raw = await self.l2.lookup(name, groups, params)
+        if generation is None:
+            return None, None, 0.0, None
+        self._advance(zip(groups, map(int, generation.split("."))))
+        key = self.l2.entry_key(name, generation, params_key)
+        value, fresh_until = self._unwrap(raw)
+        if value is None:
+            return key, None, 0.0, None
+        self._store_l1(key, value, groups, fresh_until)
+        return key, value, fresh_until, "l2"
+
+    def _lease(self, key: str) -> DistributedLock:
+        return DistributedLock(
+            self.redis,
+            f"{self.l2.prefix}-refresh:{key}",
+            ttl_seconds=self.lease_seconds,
+            retry_times=1,
+            retry_delay_ms=0,
+        )
+
+    async def _acquire(self, lease: DistributedLock) -> bool:
+        try:
+            return await lease.acquire()
+        except Exception as e:
+            # Without Redis there is nobody to coordinate with
+            logger.warning(f"Cache lease unavailable: {e}")
+            return True
+
+    async def _read_fresh(self, key: str, groups: Sequence[str]) -> Optional[Any]:
+        try:
+            value, fresh_until = self._unwrap(await self.redis.get(key))
+        except Exception:
+            return None
+        if value is None or fresh_until <= time.time():
+            return None
+        self._store_l1(key, value, groups, fresh_until)
+        return value
+
+    async def _poll(
+        self, key: str, lease: DistributedLock, groups: Sequence[str]
+    ) -> Tuple[Optional[Any], bool]:
+        """A fresh value of the entry, and whether its lease is still held"""
+        try:
+            raw, holder = await self.redis.mget([key, lease.resource_name])
+        except Exception:
+            return None, True
+        value, fresh_until = self._unwrap(raw)
+        if value is None or fresh_until <= time.time():
+            return None, holder is not None
+        self._store_l1(key, value, groups, fresh_until)
+        return value, True
+
+    async def _load_once(
+        self,
+        key: str,
+        groups: Sequence[str],
+        load: Callable[[], Awaitable[Any]],
+        ttl: Optional[float],
+    ) -> Tuple[Any, str]:
+        """Load a missing entry, or wait for the replica holding its lease"""
+        lease = self._lease(key)
+        if not await self._acquire(lease):
+            deadline = time.monotonic() + self.lease_seconds
+            while time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+                value, leased = await self._poll(key, lease, groups)
+                if value is not None:
+                    return value, "remote"
+                if not leased:
+                    # Released without storing a value: the holder's load
+                    # failed, so load it here and fail (or not) on our own
+                    break
+            # The lease holder died, failed or is too slow: load it ourselves
+            return await self._load_and_store(key, groups, load, ttl), "load"
+        try:
+            return await self._load_and_store(key, groups, load, ttl), "load"
+        finally:
+            await lease.release()
+
+    async def _load_and_store(
+        self,
+        key: str,
+        groups: Sequence[str],
+        load: Callable[[], Awaitable[Any]],
+        ttl: Optional[float],
+    ) -> Any:
+        value = await load()
+        await self.set(key, value, ttl, groups)
+        return value
+
+    def _refresh_in_background(
+        self,
+        key: str,
+        groups: Sequence[str],
+        load: Callable[[], Awaitable[Any]],
+        ttl: Optional[float],
+    ) -> None:
+        if self._flight.in_flight(key):
+            return
+
+        async def refresh():
+            lease = self._lease(key)
+            if not await self._acquire(lease):
+                cache_refresh_counter.labels(result="skipped").inc()
+                return None, "remote"
+            try:
+                # Another replica may have refreshed it just before us
+                value = await self._read_fresh(key, groups)
+                if value is not None:
+                    cache_refresh_counter.labels(result="skipped").inc()
+                    return value, "remote"
+                value = await self._load_and_store(key, groups, load, ttl)
+                cache_refresh_counter.labels(result="refreshed").inc()
+                return value, "load"
+            finally:
+                await lease.release()
+
+        task = asyncio.ensure_future(self._flight.do(key, refresh))
+        self._refreshes.add(task)
+        task.add_done_callback(self._refresh_done)
+
+    def _refresh_done(self, task: asyncio.Future) -> None:
+        self._refreshes.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            cache_refresh_counter.labels(result="error").inc()
+            logger.warning(f"Background cache refresh failed: {task.exception()}")
+
+    def _store_l1(
+        self, key: str, value: Any, groups: Sequence[str], fresh_until: float
+    ) -> None:
+        ttl = min(self.l1.ttl, fresh_until + self.stale_ttl - time.time())
+        if self._subscribed and ttl > 0:
+            self.l1.set(key, (frozenset(groups), value, fresh_until), ttl=ttl)
+
+    def _advance(self, generations: Iterable[Tuple[str, int]]) -> Dict[str, int]:
+        """Adopt newer generations; returns the groups that moved"""
+        moved = {}
+        for group, generation in generations:
+            if generation > self._generations.get(group, -1):
+                self._generations[group] = generation
+                moved[group] = generation
+        return moved
+
+    def _apply(self, generations: Dict[str, int]) -> None:
+        moved = set(self._advance(generations.items()))
+        if moved:
+            self.l1.prune(lambda _, entry: not moved.isdisjoint(entry[0]))
+
+    def _reset(self) -> None:
+        self._subscribed = False
+        self._generations.clear()
+        self.l1.clear()
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._reset()
+
+    async def _run(self) -> None:
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                # Invalidations sent while we were not listening are lost
+                self._reset()
+                self._subscribed = True
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    try:
+                        generations = json.loads(message["data"])
+                        self._apply({g: int(n) for g, n in generations.items()})
+                    except (ValueError, AttributeError) as e:
+                        logger.warning(f"Malformed cache invalidation: {e}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Cache invalidation subscription failed: {e}")
+                self._reset()
+                await asyncio.sleep(self.reconnect_delay)
+            finally:
+                try:
+                    await pubsub.close()
+                except Exception:
+                    pass
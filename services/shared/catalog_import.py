@@ -0,0 +1,132 @@
+"""
+Shared Catalog Import Module
+Streaming NDJSON/CSV record reader and seat grid generation for bulk imports
+"""
+
+import csv
+import json
+from typing import AsyncIterator, List, Optional, Tuple
+
+FORMATS = ("ndjson", "csv")
+
+
+class InvalidRecord(ValueError):
+    """Raised for a line that is not a record, or a seat layout that is not valid"""
+
+    pass
+
+
+async def read_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a byte stream into lines without holding more than one chunk"""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8").rstrip("\r")
+    if buffer:
+        yield buffer.decode("utf-8").rstrip("\r")
+
+
+async def read_records(
+    chunks: AsyncIterator[bytes], format: str
+) -> AsyncIterator[Tuple[int, object]]:
+    """
+    Yield (line number, record dict) for each record of an NDJSON or CSV stream
+
+    Blank lines are skipped. CSV needs a header line; empty cells become
+    None and quoted cells may span lines. A line that cannot be parsed is
+    yielded as (line number, InvalidRecord) so the import can report it and
+    go on.
+    """
+    header: Optional[List[str]] = None
+    pending: List[str] = []
+    start = 0
+    number = 0
+    async for line in read_lines(chunks):
+        number += 1
+        if format == "ndjson":
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield number, InvalidRecord(f"Invalid JSON: {e}")
+                continue
+            if not isinstance(record, dict):
+                yield number, InvalidRecord("Expected a JSON object")
+                continue
+            yield number, record
+            continue
+
+        if not pending:
+            if not line.strip():
+                continue
+            start = number
+        pending.append(line)
+        text = "\n".join(pending)
+        # An odd number of quotes means a quoted cell continues on the next line
+        if text.count('"') % 2:
+            continue
+        pending = []
+        cells = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in cells]
+            continue
+        if len(cells) != len(header):
+            yield start, InvalidRecord(
+                f"Expected {len(header)} columns, got {len(cells)}"
+            )
+            continue
+        yield start, {name: cell or None for name, cell in zip(header, cells)}
+
+    if pending:
+        yield start, InvalidRecord("Unterminated quoted field")
+
+
+def parse_rows(spec: Optional[str]) -> List[str]:
+    """Expand a row spec such as "A-H,K,AA" into row labels, in order"""
+    rows: List[str] = []
+    for part in (spec or "").split(","):
+        part = part.strip().upper()
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        if not last:
+            rows.append(first)
+        elif len(first) == len(last) == 1 and first.isalpha() and first <= last:
+            rows.extend(chr(c) for c in range(ord(first), ord(last) + 1))
+        else:
+            raise InvalidRecord(f"Invalid row range: {part}")
+    if any(len(row) > 5 for row in rows):
+        raise InvalidRecord("Row labels are at most 5 characters")
+    return rows
+
+
+def seat_grid(
+    rows: str,
+    seats_per_row: int,
+    vip_rows: Optional[str] = None,
+    premium_rows: Optional[str] = None,
+) -> List[Tuple[str, int, str]]:
+    """
+    Generate (row, number, seat type) for a rectangular hall
+
+    seat_grid("A-J", 12, vip_rows="E-G", premium_rows="J") gives 120 seats,
+    A1..J12, with rows E-G vip, J premium and the rest regular.
+    """
+    labels = parse_rows(rows)
+    if not labels or seats_per_row < 1:
+        raise InvalidRecord("A seat layout needs rows and seats_per_row")
+    if len(set(labels)) != len(labels):
+        raise InvalidRecord("Seat rows repeat")
+    types = {row: "vip" for row in parse_rows(vip_rows)}
+    types.update({row: "premium" for row in parse_rows(premium_rows)})
+    unknown = set(types) - set(labels)
+    if unknown:
+        raise InvalidRecord(f"Unknown seat rows: {', '.join(sorted(unknown))}")
+    return [
+        (row, number, types.get(row, "regular"))
+        for row in labels
+        for number in range(1, seats_per_row + 1)
+    ]
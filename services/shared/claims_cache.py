@@ -0,0 +1,144 @@
+"""
+Shared Claims Cache Module
+Redis (and optionally in-process) cache of the user claims /verify returns
+"""
+
+import json
+import logging
+from typing import Dict, Iterable, Optional
+
+import redis.asyncio as redis
+from prometheus_client import Counter
+
+from .cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+claims_cache_counter = Counter(
+    "claims_cache_total", "User claims cache results", ["result"]
+)
+
+# Written over an entry on invalidation; never served, and a load cannot
+# replace it (SET NX) until it expires
+TOMBSTONE = "-"
+
+
+class ClaimsCache:
+    """
+    Cache of the user projection behind token verification, keyed by username
+
+    Entries live in Redis for `ttl` seconds, so every replica shares them.
+    With `l1_ttl` > 0 they are also kept in process for that long; other
+    replicas' invalidations reach an L1 entry only when it expires, so
+    `l1_ttl` is the most a profile change can lag on them.
+
+    `invalidate` must be called after any write that changes the projection
+    (profile, password, deactivation). It replaces the entry with a short
+    tombstone instead of deleting it: `set` only writes missing keys, so a
+    load that read the user just before the write cannot put the old
+    projection back, in Redis or in L1, which is only filled by writes that
+    won. Redis errors are logged and read as misses.
+
+    Usage:
+        claims_cache = ClaimsCache(redis_client, ttl=300)
+        claims = await claims_cache.get(username)
+        if claims is None:
+            claims = load_from_db(username)
+            await claims_cache.set(username, claims)
+        await claims_cache.invalidate(username)  # after the user changes
+    """
+
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        prefix: str = "auth:claims",
+        ttl: float = 300.0,
+        l1_ttl: float = 0.0,
+        l1_maxsize: int = 10000,
+        tombstone_ttl: float = 10.0,
+    ):
+        self.redis = redis_client
+        self.prefix = prefix
+        self.ttl = ttl
+        self.tombstone_ttl = tombstone_ttl
+        self.l1 = TTLCache(maxsize=l1_maxsize, ttl=l1_ttl) if l1_ttl > 0 else None
+
+    def key(self, username: str) -> str:
+        return f"{self.prefix}:{username}"
+
+    async def get(self, username: str) -> Optional[dict]:
+        return (await self.get_many([username])).get(username)
+
+    async def get_many(self, usernames: Iterable[str]) -> Dict[str, dict]:
+        """Cached claims of the given users, from L1 then one MGET; misses are left out"""
+        found: Dict[str, dict] = {}
+        missing = []
+        for username in dict.fromkeys(usernames):
+            claims = self.l1.get(username) if self.l1 is not None else None
+            if claims is not None:
+                found[username] = claims
+            else:
+                missing.append(username)
+        if found:
+            claims_cache_counter.labels(result="l1").inc(len(found))
+        if not missing:
+            return found
+
+        try:
+            values = await self.redis.mget([self.key(name) for name in missing])
+        except Exception as e:
+            logger.warning(f"Claims cache read failed: {e}")
+            values = [None] * len(missing)
+        for username, raw in zip(missing, values):
+            if raw is None or raw == TOMBSTONE:
+                claims_cache_counter.labels(result="miss").inc()
+                continue
+            claims = json.loads(raw)
+            found[username] = claims
+            if self.l1 is not None:
+                self.l1.set(username, claims)
+            claims_cache_counter.labels(result="hit").inc()
+        return found
+
+    async def set(self, username: str, claims: dict) -> None:
+        try:
+            written = await self.redis.set(
+                self.key(username), json.dumps(claims), ex=int(self.ttl), nx=True
+            )
+        except Exception as e:
+            logger.warning(f"Claims cache write failed for {username}: {e}")
+            return
+        # Not written means a live entry or a tombstone: the claims may be stale
+        if written and self.l1 is not None:
+            self.l1.set(username, claims)
+
+    async def set_many(self, claims_by_user: Dict[str, dict]) -> None:
+        """`set` for several users in one pipelined round trip"""
+        if not claims_by_user:
+            return
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for username, claims in claims_by_user.items():
+                pipe.set(
+                    self.key(username), json.dumps(claims), ex=int(self.ttl), nx=True
+                )
+            results = await pipe.execute()
+        except Exception as e:
+            logger.warning(
+                f"Claims cache write failed for {len(claims_by_user)} users: {e}"
+            )
+            return
+        if self.l1 is not None:
+            for (username, claims), written in zip(claims_by_user.items(), results):
+                if written:
+                    self.l1.set(username, claims)
+
+    async def invalidate(self, username: str) -> None:
+        if self.l1 is not None:
+            self.l1.invalidate(username)
+        try:
+            await self.redis.set(
+                self.key(username), TOMBSTONE, ex=int(self.tombstone_ttl)
+            )
+        except Exception as e:
+            logger.error(f"Claims cache invalidation failed for {username}: {e}")
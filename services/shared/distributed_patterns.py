@@ -247,6 +247,124 @@ class LockAcquisitionError(Exception):
     pass
 
 
+class LeaderElection:
+    """
+    Lease-based leader election using Redis
+
+    Every candidate periodically tries to take or renew a lease key
+    (`leader:{name}`) holding its identity. The holder renews it every
+    `lease_seconds / 3`; if it stops renewing (crash, network partition) the
+    lease expires and another candidate takes over. A candidate that cannot
+    confirm its lease steps down immediately.
+
+    Usage:
+        election = LeaderElection(redis_client, "booking-expiry", lease_seconds=15)
+        await election.start()
+
+        await election.wait_for_leadership()
+        # Only one replica gets here at a time
+        ...
+
+        await election.stop()  # resigns so another replica takes over at once
+    """
+
+    ACQUIRE_SCRIPT = """
+    if redis.call("get", KEYS[1]) == ARGV[1] then
+        return redis.call("pexpire", KEYS[1], ARGV[2])
+    end
+    if redis.call("set", KEYS[1], ARGV[1], "NX", "PX", ARGV[2]) then
+        return 1
+    end
+    return 0
+    """
+
+    RESIGN_SCRIPT = """
+    if redis.call("get", KEYS[1]) == ARGV[1] then
+        return redis.call("del", KEYS[1])
+    end
+    return 0
+    """
+
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        name: str,
+        lease_seconds: float = 15.0,
+        identity: Optional[str] = None,
+        on_change: Optional[Callable[[bool], None]] = None,
+    ):
+        import socket
+        import uuid
+
+        self.redis = redis_client
+        self.key = f"leader:{name}"
+        self.lease_seconds = lease_seconds
+        self.renew_interval = lease_seconds / 3
+        self.identity = identity or f"{socket.gethostname()}:{uuid.uuid4().hex[:8]}"
+        self.on_change = on_change
+        self._is_leader = False
+        self._leader_event = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._is_leader
+
+    def _set_leader(self, is_leader: bool) -> None:
+        if is_leader == self._is_leader:
+            return
+        self._is_leader = is_leader
+        if is_leader:
+            self._leader_event.set()
+            logger.info(f"Became leader for {self.key} ({self.identity})")
+        else:
+            self._leader_event.clear()
+            logger.warning(f"Lost leadership for {self.key} ({self.identity})")
+        if self.on_change:
+            self.on_change(is_leader)
+
+    async def try_acquire(self) -> bool:
+        """Take the lease if it is free, or renew it if we already hold it"""
+        try:
+            result = await self.redis.eval(
+                self.ACQUIRE_SCRIPT,
+                1,
+                self.key,
+                self.identity,
+                int(self.lease_seconds * 1000),
+            )
+            self._set_leader(result == 1)
+        except Exception as e:
+            logger.error(f"Leader election error for {self.key}: {e}")
+            self._set_leader(False)
+        return self._is_leader
+
+    async def wait_for_leadership(self) -> None:
+        await self._leader_event.wait()
+
+    async def _run(self) -> None:
+        while True:
+            await self.try_acquire()
+            await asyncio.sleep(self.renew_interval)
+
+    async def start(self) -> None:
+        if self._task is None:
+            await self.try_acquire()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop campaigning and release the lease if we hold it"""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        if self._is_leader:
+            try:
+                await self.redis.eval(self.RESIGN_SCRIPT, 1, self.key, self.identity)
+            except Exception as e:
+                logger.error(f"Error resigning leadership for {self.key}: {e}")
+        self._set_leader(False)
+
+
 class Retry:
     """
     Retry with exponential backoff
@@ -0,0 +1,195 @@
+"""
+Shared HTTP Client Module
+Pooled, long-lived HTTP clients for service-to-service calls
+"""
+
+import importlib.util
+import logging
+import time
+from typing import Dict, Optional
+
+import httpx
+from prometheus_client import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+# Outbound call metrics, labelled by downstream service name
+http_client_requests = Counter(
+    "http_client_requests_total",
+    "Outbound requests to other services",
+    ["target", "status"],
+)
+http_client_duration = Histogram(
+    "http_client_request_seconds", "Outbound request duration", ["target"]
+)
+http_client_in_flight = Gauge(
+    "http_client_in_flight_requests",
+    "Outbound requests currently in flight",
+    ["target"],
+)
+http_client_pool_connections = Gauge(
+    "http_client_pool_connections",
+    "Connections held in the keep-alive pool",
+    ["target", "state"],
+)
+
+
+class ServiceClient:
+    """
+    Long-lived HTTP client for one downstream service
+
+    One client (and therefore one connection pool) is kept per target for the
+    whole life of the process, so requests reuse keep-alive connections instead
+    of paying for a new TCP connection on every call.
+
+    Usage:
+        auth = ServiceClient("auth-service", "http://auth-service:8000", timeout=5)
+        await auth.start()
+        response = await auth.get("/verify", headers={...})
+        await auth.close()
+    """
+
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        timeout: float = 10.0,
+        connect_timeout: Optional[float] = None,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: bool = False,
+    ):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.timeout = httpx.Timeout(
+            timeout, connect=connect_timeout if connect_timeout else timeout
+        )
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        # HTTP/2 needs the optional `h2` package (httpx[http2])
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning(f"HTTP/2 requested for {name} but h2 is not installed")
+            http2 = False
+        self.http2 = http2
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _build_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=self.timeout,
+            limits=self.limits,
+            http2=self.http2,
+        )
+
+    async def start(self) -> None:
+        """Create the underlying connection pool"""
+        if self._client is None:
+            self._client = self._build_client()
+            logger.info(f"HTTP client started: {self.name} -> {self.base_url}")
+
+    async def close(self) -> None:
+        """Close all pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            logger.info(f"HTTP client closed: {self.name}")
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            # Started lazily when used outside the app lifespan (tests, scripts)
+            self._client = self._build_client()
+        return self._client
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request through the pooled client and record metrics"""
+        start_time = time.time()
+        http_client_in_flight.labels(target=self.name).inc()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+            http_client_requests.labels(
+                target=self.name, status=str(response.status_code)
+            ).inc()
+            return response
+        except httpx.RequestError:
+            http_client_requests.labels(target=self.name, status="error").inc()
+            raise
+        finally:
+            http_client_in_flight.labels(target=self.name).dec()
+            http_client_duration.labels(target=self.name).observe(
+                time.time() - start_time
+            )
+            self._record_pool_usage()
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def patch(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("PATCH", url, **kwargs)
+
+    async def delete(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("DELETE", url, **kwargs)
+
+    def pool_stats(self) -> Dict[str, int]:
+        """Current number of active and idle pooled connections"""
+        stats = {"active": 0, "idle": 0}
+        # httpx does not expose pool state publicly; read it defensively
+        pool = getattr(getattr(self._client, "_transport", None), "_pool", None)
+        for connection in getattr(pool, "connections", []):
+            try:
+                stats["idle" if connection.is_idle() else "active"] += 1
+            except Exception:
+                continue
+        return stats
+
+    def _record_pool_usage(self) -> None:
+        for state, count in self.pool_stats().items():
+            http_client_pool_connections.labels(target=self.name, state=state).set(
+                count
+            )
+
+
+class ServiceClientRegistry:
+    """
+    Holds one ServiceClient per downstream service
+
+    Usage:
+        clients = ServiceClientRegistry()
+        auth = clients.register("auth-service", AUTH_SERVICE_URL, timeout=5)
+
+        @app.on_event("startup")
+        async def startup():
+            await clients.start_all()
+
+        @app.on_event("shutdown")
+        async def shutdown():
+            await clients.close_all()
+    """
+
+    def __init__(self):
+        self._clients: Dict[str, ServiceClient] = {}
+
+    def register(self, name: str, base_url: str, **options) -> ServiceClient:
+        if name in self._clients:
+            raise ValueError(f"HTTP client already registered: {name}")
+        client = ServiceClient(name, base_url, **options)
+        self._clients[name] = client
+        return client
+
+    def __getitem__(self, name: str) -> ServiceClient:
+        return self._clients[name]
+
+    async def start_all(self) -> None:
+        for client in self._clients.values():
+            await client.start()
+
+    async def close_all(self) -> None:
+        for client in self._clients.values():
+            await client.close()
@@ -0,0 +1,145 @@
+"""
+Shared JWKS Module
+Local verification of auth-service JWTs against its published signing keys
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional, Sequence
+
+from jose import JWTError, jwt
+from prometheus_client import Counter
+
+from .http_client import ServiceClient
+
+logger = logging.getLogger(__name__)
+
+jwks_refresh_counter = Counter(
+    "jwks_refresh_total", "JWKS fetches from auth-service", ["result"]
+)
+local_token_verify_counter = Counter(
+    "jwt_local_verifications_total", "Tokens verified locally with JWKS", ["result"]
+)
+
+ASYMMETRIC_ALGORITHMS = ("RS256", "RS384", "RS512", "ES256", "ES384", "ES512")
+
+
+class TokenVerificationError(Exception):
+    """Raised when a token is malformed, expired or has a bad signature"""
+
+    pass
+
+
+class JWKSVerifier:
+    """
+    Verifies asymmetric JWTs locally using keys from a JWKS endpoint
+
+    Keys are cached for `cache_ttl` seconds. A token signed with an unknown
+    `kid` (key rotation) triggers a refetch. Refetches happen at most once per
+    `min_refresh_interval`, and if one fails the cached keys stay in use.
+
+    Usage:
+        verifier = JWKSVerifier(auth_client)
+        if verifier.can_verify(token):
+            claims = await verifier.verify(token)
+    """
+
+    def __init__(
+        self,
+        client: ServiceClient,
+        path: str = "/.well-known/jwks.json",
+        algorithms: Sequence[str] = ASYMMETRIC_ALGORITHMS,
+        cache_ttl: float = 300.0,
+        min_refresh_interval: float = 30.0,
+    ):
+        self.client = client
+        self.path = path
+        self.algorithms = tuple(algorithms)
+        self.cache_ttl = cache_ttl
+        self.min_refresh_interval = min_refresh_interval
+        self._keys: Dict[Optional[str], Dict[str, Any]] = {}
+        self._fetched_at = 0.0
+        self._last_attempt = 0.0
+        self._refresh_lock = asyncio.Lock()
+
+    def can_verify(self, token: str) -> bool:
+        """True if the token is signed with an algorithm this verifier handles"""
+        try:
+            return jwt.get_unverified_header(token).get("alg") in self.algorithms
+        except JWTError:
+            return False
+
+    async def verify(self, token: str) -> Dict[str, Any]:
+        """Return the token's claims, or raise TokenVerificationError"""
+        try:
+            header = jwt.get_unverified_header(token)
+        except JWTError as e:
+            local_token_verify_counter.labels(result="invalid").inc()
+            raise TokenVerificationError(str(e))
+
+        algorithm = header.get("alg")
+        if algorithm not in self.algorithms:
+            local_token_verify_counter.labels(result="invalid").inc()
+            raise TokenVerificationError(f"Unsupported algorithm: {algorithm}")
+
+        key = await self.get_key(header.get("kid"))
+        if key is None:
+            local_token_verify_counter.labels(result="unknown_key").inc()
+            raise TokenVerificationError("Unknown signing key")
+
+        try:
+            claims = jwt.decode(token, key, algorithms=[algorithm])
+        except JWTError as e:
+            local_token_verify_counter.labels(result="invalid").inc()
+            raise TokenVerificationError(str(e))
+
+        local_token_verify_counter.labels(result="valid").inc()
+        return claims
+
+    async def get_key(self, kid: Optional[str]) -> Optional[Dict[str, Any]]:
+        if not self._keys or time.monotonic() - self._fetched_at > self.cache_ttl:
+            await self._refresh_if_due(required=not self._keys)
+        if not self._keys:
+            raise RuntimeError("No signing keys available")
+        key = self._lookup(kid)
+        if key is None:
+            # Possibly a freshly rotated key
+            await self._refresh_if_due()
+            key = self._lookup(kid)
+        return key
+
+    def _lookup(self, kid: Optional[str]) -> Optional[Dict[str, Any]]:
+        if kid is None and len(self._keys) == 1:
+            return next(iter(self._keys.values()))
+        return self._keys.get(kid)
+
+    async def _refresh_if_due(self, required: bool = False) -> None:
+        last_attempt = self._last_attempt
+        if self._keys and time.monotonic() - last_attempt < self.min_refresh_interval:
+            return
+        async with self._refresh_lock:
+            # Another caller refreshed while we waited
+            if self._last_attempt != last_attempt:
+                return
+            self._last_attempt = time.monotonic()
+            try:
+                await self.refresh()
+            except Exception as e:
+                if required:
+                    raise
+                logger.warning(f"JWKS refresh failed, using cached keys: {e}")
+
+    async def refresh(self) -> None:
+        """Fetch the current key set from the JWKS endpoint"""
+        try:
+            response = await self.client.get(self.path)
+            response.raise_for_status()
+            keys = response.json().get("keys", [])
+        except Exception:
+            jwks_refresh_counter.labels(result="error").inc()
+            raise
+        self._keys = {key.get("kid"): key for key in keys}
+        self._fetched_at = time.monotonic()
+        jwks_refresh_counter.labels(result="success").inc()
+        logger.info(f"Loaded {len(self._keys)} signing key(s) from {self.path}")
@@ -0,0 +1,170 @@
+"""
+Shared Pagination Module
+Keyset (cursor) pagination and `fields=` projection for list endpoints
+"""
+
+import base64
+import json
+import uuid
+from datetime import date, datetime, time
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type
+
+from pydantic import BaseModel, ConfigDict, TypeAdapter, create_model
+from sqlalchemy import select, tuple_
+from sqlalchemy.sql import Select
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Cursor values travel as JSON strings; these turn them back into the
+# column's Python type so they bind like the real values
+_PARSERS = {
+    uuid.UUID: uuid.UUID,
+    datetime: datetime.fromisoformat,
+    date: date.fromisoformat,
+    time: time.fromisoformat,
+    Decimal: Decimal,
+    int: int,
+    str: str,
+}
+
+
+class InvalidPageRequest(ValueError):
+    """Raised for a malformed cursor or an unknown field in `fields=`"""
+
+    pass
+
+
+@lru_cache(maxsize=256)
+def _projection_adapter(model: Type[BaseModel], fields: Tuple[str, ...]) -> TypeAdapter:
+    if fields == tuple(model.model_fields):
+        return TypeAdapter(List[model])
+    partial = create_model(
+        f"{model.__name__}Fields",
+        __config__=ConfigDict(from_attributes=True),
+        **{name: (model.model_fields[name].annotation, ...) for name in fields},
+    )
+    return TypeAdapter(List[partial])
+
+
+class Pager:
+    """
+    Keyset pagination over a table, serialized through a response model
+
+    Rows are ordered by `order` (all ascending, or all descending), which
+    must end in a unique column so the order is total. The cursor is the
+    order values of the last row served, and the next page starts strictly
+    after it with a row-value comparison, so a page costs one index range
+    scan however deep it is, and rows inserted meanwhile never shift or
+    repeat a page. Each `order` should be backed by a matching index.
+
+    Only the response model's columns are selected (or those named in
+    `fields=`), as plain rows, and the page is serialized by pydantic
+    straight to JSON. The next cursor is returned as the X-Next-Cursor
+    header and is absent on the last page.
+
+    Usage:
+        BOOKINGS = Pager(Booking, BookingResponse, (Booking.created_at, Booking.id),
+                         descending=True)
+        query, fields = BOOKINGS.select(Booking.user_id == user_id,
+                                        cursor=cursor, limit=limit, fields=fields)
+        rows = (await db.execute(query)).all()
+        body, headers = BOOKINGS.dump(rows, limit, fields)
+    """
+
+    def __init__(
+        self,
+        table: Any,
+        model: Type[BaseModel],
+        order: Sequence[Any],
+        descending: bool = False,
+    ):
+        self.table = table
+        self.model = model
+        self.order = tuple(order)
+        self.descending = descending
+        self._parsers = [_PARSERS[column.type.python_type] for column in self.order]
+
+    def fields(self, fields: Optional[str]) -> Tuple[str, ...]:
+        """Validate a comma-separated `fields=` value; None means all fields"""
+        if not fields:
+            return tuple(self.model.model_fields)
+        requested = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = requested - set(self.model.model_fields)
+        if unknown or not requested:
+            raise InvalidPageRequest(f"Unknown fields: {', '.join(sorted(unknown))}")
+        # Model order, so equal projections serialize (and cache) identically
+        return tuple(name for name in self.model.model_fields if name in requested)
+
+    def encode(self, row: Any) -> str:
+        values = [getattr(row, column.key) for column in self.order]
+        raw = json.dumps(values, default=str, separators=(",", ":"))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    def decode(self, cursor: str) -> List[Any]:
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            values = json.loads(raw)
+            if not isinstance(values, list) or len(values) != len(self.order):
+                raise ValueError("wrong length")
+            return [parse(value) for parse, value in zip(self._parsers, values)]
+        except (ValueError, TypeError):
+            raise InvalidPageRequest("Invalid cursor")
+
+    def columns(self, names: Sequence[str]) -> List[Any]:
+        """Columns for `names`, plus the order columns the cursor is built from"""
+        columns = {name: getattr(self.table, name) for name in names}
+        for column in self.order:
+            columns.setdefault(column.key, column)
+        return list(columns.values())
+
+    def order_by(self) -> List[Any]:
+        if self.descending:
+            return [column.desc() for column in self.order]
+        return list(self.order)
+
+    def after(self, cursor: str) -> Any:
+        """The condition for rows strictly after `cursor` in page order"""
+        key, values = tuple_(*self.order), tuple_(*self.decode(cursor))
+        return key < values if self.descending else key > values
+
+    def select(
+        self,
+        *criteria: Any,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        fields: Optional[str] = None,
+    ) -> Tuple[Select, Tuple[str, ...]]:
+        """
+        Build the page query; returns it with the validated field names
+
+        One row more than `limit` is fetched to learn whether a next page
+        exists. Raises InvalidPageRequest for a bad cursor or field.
+        """
+        names = self.fields(fields)
+        query = select(*self.columns(names)).where(*criteria)
+        if cursor:
+            query = query.where(self.after(cursor))
+        return query.order_by(*self.order_by()).limit(limit + 1), names
+
+    def page(
+        self, rows: Sequence[Any], limit: int
+    ) -> Tuple[Sequence[Any], Optional[str]]:
+        """Trim the extra row; returns the page and the next cursor, if any"""
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, self.encode(rows[-1])
+
+    def dump(
+        self, rows: Sequence[Any], limit: int, fields: Tuple[str, ...]
+    ) -> Tuple[str, Dict[str, str]]:
+        """Serialize a page to JSON; returns the body and response headers"""
+        rows, next_cursor = self.page(rows, limit)
+        adapter = _projection_adapter(self.model, fields)
+        body = adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+        headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+        return body.decode(), headers
@@ -0,0 +1,181 @@
+"""
+Shared Prefix Index Module
+In-memory prefix lookup for typeahead suggestions
+"""
+
+import heapq
+import re
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+WORD = re.compile(r"\w+")
+# Combining diacritical marks, which NFKD splits off accented letters
+MARKS = re.compile("[\u0300-\u036f]")
+
+# (folded text, weight, doc id); sorted, so a prefix is one contiguous run
+Entry = Tuple[str, int, str]
+# (doc id, (rank, label length, label)), in result order
+Ranked = List[Tuple[str, Tuple[int, int, str]]]
+
+
+def fold(text: str) -> str:
+    """
+    Lowercase, strip diacritics and collapse punctuation to single spaces
+
+    "Mắt Biếc!" -> "mat biec". NFKD leaves "đ" alone (it is a letter, not
+    d + a mark), so it is mapped by hand.
+    """
+    text = text.lower()
+    if not text.isascii():
+        text = MARKS.sub("", unicodedata.normalize("NFKD", text.replace("đ", "d")))
+    return " ".join(WORD.findall(text))
+
+
+class PrefixIndex:
+    """
+    Sorted-array prefix index over short phrases (titles, names)
+
+    Every word of every phrase is indexed, so "biec" finds "Mắt Biếc", and
+    matching ignores case and accents. A lookup is a bisect to the first key
+    with the prefix plus a scan of at most `scan_limit` keys, so its cost
+    does not depend on the index size. Matches are ranked by the phrase
+    weight (lower first), then by whether the phrase starts with the prefix,
+    then by label length.
+
+    A short prefix can match more than `scan_limit` keys, and the best
+    matches may sort anywhere in its run. Such a prefix is ranked over its
+    whole run once, and its best `top_k` results are kept until a document
+    with a key under it is added or removed, so results are always exact.
+
+    `load` builds the whole index with one sort. After that, documents are
+    added, replaced and removed one at a time (a bisect plus a list insert),
+    so the index never needs a rebuild.
+
+    Usage:
+        index = PrefixIndex()
+        index.add(movie_id, "Mắt Biếc", [("Mắt Biếc", 0), ("Victor Vũ", 1)])
+        index.search("mat b", limit=10)  # [(movie_id, "Mắt Biếc")]
+    """
+
+    def __init__(self, scan_limit: int = 256, top_k: int = 20):
+        self.scan_limit = scan_limit
+        self.top_k = top_k
+        self._keys: List[Entry] = []
+        # doc id -> (label, phrases, entries)
+        self._docs: Dict[str, Tuple[str, Tuple[Tuple[str, int], ...], List[Entry]]] = {}
+        # prefix -> its best top_k results, for prefixes with long runs
+        self._top: Dict[str, Ranked] = {}
+
+    @staticmethod
+    def _entries(doc_id: str, phrases: Sequence[Tuple[str, int]]) -> List[Entry]:
+        entries = set()
+        for phrase, weight in phrases:
+            words = fold(phrase).split()
+            for i in range(len(words)):
+                # A phrase-start match ranks above a later-word match
+                entries.add((" ".join(words[i:]), weight * 2 + (i > 0), doc_id))
+        return list(entries)
+
+    def add(self, doc_id: str, label: str, phrases: Sequence[Tuple[str, int]]) -> None:
+        """Index `doc_id` under each (phrase, weight); replaces any older version"""
+        phrases = tuple(phrases)
+        current = self._docs.get(doc_id)
+        if current is not None:
+            if current[:2] == (label, phrases):
+                return
+            self.remove(doc_id)
+
+        entries = self._entries(doc_id, phrases)
+        for entry in entries:
+            insort(self._keys, entry)
+        self._docs[doc_id] = (label, phrases, entries)
+        self._invalidate(entries)
+
+    def load(
+        self, documents: Iterable[Tuple[str, str, Sequence[Tuple[str, int]]]]
+    ) -> None:
+        """Replace the whole index with (doc id, label, phrases) documents"""
+        docs = {}
+        keys = []
+        for doc_id, label, phrases in documents:
+            entries = self._entries(doc_id, phrases)
+            docs[doc_id] = (label, tuple(phrases), entries)
+            keys.extend(entries)
+        # One sort instead of a list insert per key
+        keys.sort()
+        # _top last: search reads it before _keys, so it never caches results
+        # of the old keys in the new dict
+        self._docs, self._keys, self._top = docs, keys, {}
+
+    def remove(self, doc_id: str) -> bool:
+        doc = self._docs.pop(doc_id, None)
+        if doc is None:
+            return False
+        for entry in doc[2]:
+            i = bisect_left(self._keys, entry)
+            if i < len(self._keys) and self._keys[i] == entry:
+                del self._keys[i]
+        self._invalidate(doc[2])
+        return True
+
+    def _invalidate(self, entries: List[Entry]) -> None:
+        """Drop the kept results of every prefix of the given keys"""
+        if not self._top:
+            return
+        for key, _, _ in entries:
+            for n in range(1, len(key) + 1):
+                self._top.pop(key[:n], None)
+
+    def _rank(
+        self, keys: List[Entry], prefix: str, start: int, end: int
+    ) -> Optional[Dict[str, Tuple[int, int, str]]]:
+        """
+        Best (rank, label length, label) of each document in keys[start:end]
+
+        Returns None if the prefix's run goes on past `end`.
+        """
+        best: Dict[str, Tuple[int, int, str]] = {}
+        i = start
+        end = min(len(keys), end)
+        while i < end:
+            key, rank, doc_id = keys[i]
+            if not key.startswith(prefix):
+                return best
+            label = self._docs[doc_id][0]
+            candidate = (rank, len(label), label)
+            if doc_id not in best or candidate < best[doc_id]:
+                best[doc_id] = candidate
+            i += 1
+        if i < len(keys) and keys[i][0].startswith(prefix):
+            return None
+        return best
+
+    def search(self, prefix: str, limit: int = 10) -> List[Tuple[str, str]]:
+        """Return up to `limit` (doc id, label) pairs matching `prefix`"""
+        prefix = fold(prefix)
+        if not prefix:
+            return []
+
+        top = self._top
+        keys = self._keys
+        ranked = top.get(prefix)
+        if ranked is None or limit > self.top_k:
+            i = bisect_left(keys, (prefix,))
+            best = self._rank(keys, prefix, i, i + self.scan_limit)
+            if best is None:
+                # A long run: rank all of it, and keep the result
+                best = self._rank(keys, prefix, i, len(keys))
+                ranked = heapq.nsmallest(
+                    max(limit, self.top_k), best.items(), key=lambda item: item[1]
+                )
+                top[prefix] = ranked[: self.top_k]
+            else:
+                ranked = heapq.nsmallest(limit, best.items(), key=lambda item: item[1])
+        return [(doc_id, candidate[2]) for doc_id, candidate in ranked[:limit]]
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._docs
+
+    def __len__(self) -> int:
+        return len(self._docs)
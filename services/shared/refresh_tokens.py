@@ -0,0 +1,144 @@
+"""
+Shared Refresh Token Module
+Rotating, revocable refresh tokens kept in Redis
+"""
+
+import hashlib
+import secrets
+import uuid
+from typing import Tuple
+
+import redis.asyncio as redis
+
+
+class InvalidRefreshToken(ValueError):
+    """Raised for a refresh token that is malformed, expired or revoked"""
+
+    pass
+
+
+class RefreshTokenReused(InvalidRefreshToken):
+    """Raised when an already rotated refresh token is presented again"""
+
+    pass
+
+
+class RefreshTokenStore:
+    """
+    Refresh tokens grouped in families, one family per login
+
+    A token is "{family_id}.{secret}". Redis keeps one small hash per
+    family, `refresh:{family_id}` -> {u: user id, n: username, h: digest of
+    the current secret}, so neither the token nor any earlier one is stored.
+    Every refresh swaps in a new secret in one atomic script and renews the
+    family's idle expiry (`ttl`).
+
+    Presenting a secret that was already rotated out means the token was
+    copied: the whole family is deleted, so neither the thief nor the owner
+    can refresh again and the owner has to log in. Families are also
+    listed per user (`refresh-user:{user_id}`) so `revoke_user` can end all
+    of them, e.g. on a password change.
+
+    Usage:
+        refresh_store = RefreshTokenStore(redis_client, ttl=7 * 86400)
+        token = await refresh_store.issue(user_id, username)
+        token, user_id, username = await refresh_store.rotate(token)
+        await refresh_store.revoke_user(user_id)
+    """
+
+    KEY_PREFIX = "refresh"
+    USER_PREFIX = "refresh-user"
+
+    # KEYS = family; ARGV = presented digest, new digest, ttl seconds
+    ROTATE_SCRIPT = """
+    local current = redis.call("hget", KEYS[1], "h")
+    if not current then
+        return false
+    end
+    if current ~= ARGV[1] then
+        redis.call("del", KEYS[1])
+        return "reused"
+    end
+    redis.call("hset", KEYS[1], "h", ARGV[2])
+    redis.call("expire", KEYS[1], ARGV[3])
+    return redis.call("hmget", KEYS[1], "u", "n")
+    """
+
+    def __init__(self, redis_client: redis.Redis, ttl: int = 7 * 86400):
+        self.redis = redis_client
+        self.ttl = ttl
+        self._rotate = redis_client.register_script(self.ROTATE_SCRIPT)
+
+    @classmethod
+    def key(cls, family: str) -> str:
+        return f"{cls.KEY_PREFIX}:{family}"
+
+    @classmethod
+    def user_key(cls, user_id: str) -> str:
+        return f"{cls.USER_PREFIX}:{user_id}"
+
+    @staticmethod
+    def digest(secret: str) -> str:
+        # 128 bits of SHA-256 are plenty to match a 256-bit random secret
+        return hashlib.sha256(secret.encode()).hexdigest()[:32]
+
+    @staticmethod
+    def split(token: str) -> Tuple[str, str]:
+        family, _, secret = token.partition(".")
+        if not family or not secret:
+            raise InvalidRefreshToken("Malformed refresh token")
+        return family, secret
+
+    async def issue(self, user_id: str, username: str) -> str:
+        """Start a new family for a login and return its first token"""
+        family = uuid.uuid4().hex
+        secret = secrets.token_urlsafe(32)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hset(
+            self.key(family),
+            mapping={"u": str(user_id), "n": username, "h": self.digest(secret)},
+        )
+        pipe.expire(self.key(family), self.ttl)
+        pipe.sadd(self.user_key(user_id), family)
+        pipe.expire(self.user_key(user_id), self.ttl)
+        await pipe.execute()
+        return f"{family}.{secret}"
+
+    async def rotate(self, token: str) -> Tuple[str, str, str]:
+        """
+        Exchange a refresh token for the next one in its family
+
+        Returns (new token, user id, username). Raises RefreshTokenReused if
+        the token was already rotated (its family is then revoked), and
+        InvalidRefreshToken if it is unknown or expired.
+        """
+        family, secret = self.split(token)
+        new_secret = secrets.token_urlsafe(32)
+        result = await self._rotate(
+            keys=[self.key(family)],
+            args=[self.digest(secret), self.digest(new_secret), self.ttl],
+        )
+        if not result:
+            raise InvalidRefreshToken("Unknown or expired refresh token")
+        if result in ("reused", b"reused"):
+            raise RefreshTokenReused(f"Refresh token family {family} reused")
+        user_id, username = (
+            value.decode() if isinstance(value, bytes) else value for value in result
+        )
+        return f"{family}.{new_secret}", user_id, username
+
+    async def revoke(self, token: str) -> None:
+        """End the family a token belongs to"""
+        try:
+            family, _ = self.split(token)
+        except InvalidRefreshToken:
+            return
+        await self.redis.delete(self.key(family))
+
+    async def revoke_user(self, user_id: str) -> int:
+        """End every family of a user; returns how many were still live"""
+        families = await self.redis.smembers(self.user_key(user_id))
+        keys = [self.key(f.decode() if isinstance(f, bytes) else f) for f in families]
+        revoked = await self.redis.delete(*keys) if keys else 0
+        await self.redis.delete(self.user_key(user_id))
+        return revoked
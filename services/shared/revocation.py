@@ -0,0 +1,257 @@
+"""
+Shared Revocation Module
+Revoked access tokens by `jti`, checked through a locally synced Bloom filter
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Dict, List, Optional
+
+import redis.asyncio as redis
+from prometheus_client import Counter
+from redis.client import NEVER_DECODE
+
+from .auth import unverified_claims
+
+logger = logging.getLogger(__name__)
+
+revocation_check_counter = Counter(
+    "token_revocation_checks_total", "Access token revocation checks", ["result"]
+)
+revocation_sync_counter = Counter(
+    "token_revocation_sync_total", "Revocation filter syncs", ["result"]
+)
+revocation_fetch_counter = Counter(
+    "token_revocation_filter_fetches_total", "Changed revocation filters copied"
+)
+
+
+class RevocationList:
+    """
+    Access tokens revoked before their `exp`, keyed by `jti`
+
+    `revoke` writes `revoked:{jti}` with a TTL of the token's remaining
+    lifetime, and sets the jti's bits in a Bloom filter. Filters are plain
+    Redis strings, one per `WINDOW` seconds of token expiry
+    (`revoked-bloom:{window}`), so each expires with the last token it can
+    hold and no filter has to be cleared; the windows in use are listed in
+    the `revoked-bloom-windows` sorted set.
+
+    `track` records each token issued to a user in `user-tokens:{user_id}`,
+    a sorted set of jti by expiry, so `revoke_user` can revoke every one
+    that is still live (password change, deactivation, logout).
+
+    Every write to a filter also bumps its version,
+    `revoked-bloom-version:{window}`. Verifiers call `start()` to sync every
+    `sync_interval` seconds: one MGET of the live windows' versions, then a
+    copy of only the filters whose version moved. `is_revoked` then answers "not revoked", the
+    common case, from memory; only a possible hit costs an EXISTS on Redis,
+    which also rules out false positives. A token revoked elsewhere can
+    still pass for up to `sync_interval`. A possible hit that cannot be
+    checked is treated as revoked; before the first sync every check goes to
+    Redis, and passes if Redis is down.
+
+    The filter parameters are fixed here rather than configured, because
+    the auth-service writing filters and every verifier reading them must
+    agree on them. 2^20 bits with 7 hashes hold ~100k revocations per
+    window at a 1% false positive rate, in 128 KiB.
+
+    Usage:
+        revocations = RevocationList(redis_client, sync_interval=5)
+        await revocations.start()
+        await revocations.track(user_id, claims["jti"], claims["exp"])
+        await revocations.revoke(claims["jti"], claims["exp"])
+        await revocations.revoke_user(user_id)
+        if await revocations.is_revoked(claims["jti"], claims["exp"]): ...
+    """
+
+    KEY_PREFIX = "revoked"
+    BLOOM_PREFIX = "revoked-bloom"
+    VERSION_PREFIX = "revoked-bloom-version"
+    WINDOWS_KEY = "revoked-bloom-windows"
+    USER_PREFIX = "user-tokens"
+    WINDOW = 900
+    BLOOM_BITS = 1 << 20
+    BLOOM_HASHES = 7
+
+    def __init__(self, redis_client: redis.Redis, sync_interval: float = 5.0):
+        self.redis = redis_client
+        self.sync_interval = sync_interval
+        # window -> filter bits; None until the first successful sync
+        self._filters: Optional[Dict[int, bytes]] = None
+        # window -> version of the copy in _filters
+        self._versions: Dict[int, Optional[str]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def key(cls, jti: str) -> str:
+        return f"{cls.KEY_PREFIX}:{jti}"
+
+    @classmethod
+    def user_key(cls, user_id: str) -> str:
+        return f"{cls.USER_PREFIX}:{user_id}"
+
+    @classmethod
+    def window(cls, exp: float) -> int:
+        return int(exp // cls.WINDOW)
+
+    @classmethod
+    def bloom_key(cls, window: int) -> str:
+        return f"{cls.BLOOM_PREFIX}:{window}"
+
+    @classmethod
+    def version_key(cls, window: int) -> str:
+        return f"{cls.VERSION_PREFIX}:{window}"
+
+    @classmethod
+    def positions(cls, jti: str) -> List[int]:
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.sha256(jti.encode()).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:16], "big") | 1
+        return [(h1 + i * h2) % cls.BLOOM_BITS for i in range(cls.BLOOM_HASHES)]
+
+    @staticmethod
+    def _has_bits(bits: bytes, positions: List[int]) -> bool:
+        # SETBIT numbers bits from the most significant bit of each byte
+        for position in positions:
+            byte = position >> 3
+            if byte >= len(bits) or not bits[byte] & (0x80 >> (position & 7)):
+                return False
+        return True
+
+    async def revoke(self, jti: str, exp: float) -> None:
+        """Revoke a token until its expiry; a no-op once it has expired"""
+        ttl = int(exp - time.time()) + 1
+        if ttl <= 0:
+            return
+        window = self.window(exp)
+        window_end = (window + 1) * self.WINDOW
+        positions = self.positions(jti)
+
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.set(self.key(jti), 1, ex=ttl)
+        for position in positions:
+            pipe.setbit(self.bloom_key(window), position, 1)
+        pipe.expireat(self.bloom_key(window), window_end + 60)
+        pipe.incr(self.version_key(window))
+        pipe.expireat(self.version_key(window), window_end + 60)
+        pipe.zadd(self.WINDOWS_KEY, {str(window): window_end})
+        pipe.zremrangebyscore(self.WINDOWS_KEY, "-inf", time.time())
+        await pipe.execute()
+
+        # Visible to this process at once, not after the next sync
+        if self._filters is not None:
+            bits = bytearray(self._filters.get(window, b""))
+            bits.extend(bytes(max(0, self.BLOOM_BITS // 8 - len(bits))))
+            for position in positions:
+                bits[position >> 3] |= 0x80 >> (position & 7)
+            self._filters[window] = bytes(bits)
+
+    async def track(self, user_id: str, jti: str, exp: float) -> None:
+        """Record a token issued to a user, for `revoke_user`"""
+        key = self.user_key(user_id)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.zadd(key, {jti: exp})
+        pipe.zremrangebyscore(key, "-inf", time.time())
+        # Access tokens share one lifetime, so the newest expires last
+        pipe.expireat(key, int(exp) + 1)
+        await pipe.execute()
+
+    async def revoke_user(self, user_id: str) -> int:
+        """Revoke every live token tracked for a user; returns how many"""
+        key = self.user_key(user_id)
+        tokens = await self.redis.zrangebyscore(
+            key, time.time(), "+inf", withscores=True
+        )
+        for jti, exp in tokens:
+            await self.revoke(jti.decode() if isinstance(jti, bytes) else jti, exp)
+        await self.redis.delete(key)
+        return len(tokens)
+
+    async def sync(self) -> None:
+        """Copy the live filters that changed since the last sync"""
+        windows = [
+            int(window)
+            for window in await self.redis.zrangebyscore(
+                self.WINDOWS_KEY, time.time(), "+inf"
+            )
+        ]
+        # Versions are read before the filters, so a copy is never older
+        # than the version it is recorded under
+        versions = (
+            await self.redis.mget([self.version_key(w) for w in windows])
+            if windows
+            else []
+        )
+        filters = self._filters or {}
+        changed = [
+            window
+            for window, version in zip(windows, versions)
+            if window not in filters or self._versions.get(window) != version
+        ]
+        pipe = self.redis.pipeline(transaction=False)
+        for window in changed:
+            # Filter bits are binary, whatever the client's decode_responses
+            pipe.execute_command("GET", self.bloom_key(window), **{NEVER_DECODE: True})
+        values = await pipe.execute() if changed else []
+
+        synced = {window: filters[window] for window in windows if window in filters}
+        synced.update({window: bits or b"" for window, bits in zip(changed, values)})
+        self._versions = dict(zip(windows, versions))
+        self._filters = synced
+        revocation_fetch_counter.inc(len(changed))
+
+    async def is_revoked(self, jti: Optional[str], exp: Optional[float]) -> bool:
+        if not jti or exp is None:
+            # Tokens issued before revocation support cannot be revoked
+            return False
+        if self._filters is not None:
+            bits = self._filters.get(self.window(exp), b"")
+            if not self._has_bits(bits, self.positions(jti)):
+                revocation_check_counter.labels(result="clear").inc()
+                return False
+
+        try:
+            revoked = bool(await self.redis.exists(self.key(jti)))
+        except Exception as e:
+            revocation_check_counter.labels(result="unavailable").inc()
+            logger.error(f"Revocation check failed for {jti}: {e}")
+            return self._filters is not None
+        revocation_check_counter.labels(
+            result="revoked" if revoked else "false_positive"
+        ).inc()
+        return revoked
+
+    async def is_token_revoked(self, token: str) -> bool:
+        """`is_revoked` for a token that has already been verified"""
+        claims = unverified_claims(token)
+        return await self.is_revoked(claims.get("jti"), claims.get("exp"))
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.sync()
+                revocation_sync_counter.labels(result="ok").inc()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Keep checking against the last filters we have
+                revocation_sync_counter.labels(result="error").inc()
+                logger.error(f"Revocation filter sync failed: {e}")
+            await asyncio.sleep(self.sync_interval)
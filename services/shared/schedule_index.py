@@ -0,0 +1,137 @@
+"""
+Shared Schedule Index Module
+In-memory index of upcoming showtimes, by day and movie, in start order
+"""
+
+from bisect import bisect_left, insort
+from datetime import date, datetime, time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+
+class ScheduleEntry(NamedTuple):
+    id: str
+    movie_id: str
+    theater_id: str
+    city: Optional[str]
+    show_date: date
+    show_time: time
+
+
+# (start time, showtime id); sorted, so a day's remaining shows are a suffix
+Slot = Tuple[time, str]
+
+
+class ScheduleIndex:
+    """
+    Per-day schedule of showtimes for "next showtimes of this movie" lookups
+
+    Each day holds, for each movie, its showtimes sorted by start time. The
+    next N showtimes of a movie from a given moment are found by walking the
+    days in order from that moment's date and, on the first day, bisecting
+    past the shows that already started; only that movie's slots are read.
+    City and theater filters are applied to those slots as they are walked.
+
+    Showtimes are added, moved and removed one at a time, and days that have
+    passed are dropped with `prune`, so the index never needs a rebuild
+    after `load`. Cities are compared case-insensitively.
+
+    Usage:
+        index = ScheduleIndex()
+        index.add(ScheduleEntry(showtime_id, movie_id, theater_id, "Hà Nội",
+                                date(2026, 5, 1), time(19, 30)))
+        index.upcoming(movie_id, datetime(2026, 5, 1, 18), limit=5, city="hà nội")
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self._entries: Dict[str, ScheduleEntry] = {}
+        # day -> movie id -> slots
+        self._days: Dict[date, Dict[str, List[Slot]]] = {}
+        self._day_order: List[date] = []
+
+    @staticmethod
+    def _normalize(entry: ScheduleEntry) -> ScheduleEntry:
+        return entry._replace(city=entry.city.casefold() if entry.city else None)
+
+    def _insert(self, entry: ScheduleEntry) -> None:
+        movies = self._days.get(entry.show_date)
+        if movies is None:
+            movies = self._days[entry.show_date] = {}
+            insort(self._day_order, entry.show_date)
+        insort(movies.setdefault(entry.movie_id, []), (entry.show_time, entry.id))
+        self._entries[entry.id] = entry
+
+    def add(self, entry: ScheduleEntry) -> None:
+        """Index a showtime; replaces any older version of it"""
+        entry = self._normalize(entry)
+        current = self._entries.get(entry.id)
+        if current == entry:
+            return
+        if current is not None:
+            self.remove(entry.id)
+        self._insert(entry)
+
+    def load(self, entries: List[ScheduleEntry]) -> None:
+        """Replace the whole index"""
+        self._entries, self._days, self._day_order = {}, {}, []
+        for entry in sorted(map(self._normalize, entries), key=lambda e: e.show_date):
+            self._insert(entry)
+        self.loaded = True
+
+    def remove(self, showtime_id: str) -> bool:
+        entry = self._entries.pop(showtime_id, None)
+        if entry is None:
+            return False
+        movies = self._days[entry.show_date]
+        slots = movies[entry.movie_id]
+        del slots[bisect_left(slots, (entry.show_time, entry.id))]
+        if not slots:
+            del movies[entry.movie_id]
+        if not movies:
+            del self._days[entry.show_date]
+            self._day_order.remove(entry.show_date)
+        return True
+
+    def prune(self, before: date) -> int:
+        """Drop every day before `before`; returns the showtimes dropped"""
+        dropped = 0
+        while self._day_order and self._day_order[0] < before:
+            for slots in self._days.pop(self._day_order.pop(0)).values():
+                for _, showtime_id in slots:
+                    del self._entries[showtime_id]
+                    dropped += 1
+        return dropped
+
+    def upcoming(
+        self,
+        movie_id: str,
+        after: datetime,
+        limit: int = 5,
+        city: Optional[str] = None,
+        theater_id: Optional[str] = None,
+    ) -> List[ScheduleEntry]:
+        """Up to `limit` showtimes of a movie starting at or after `after`"""
+        city = city.casefold() if city else None
+        found: List[ScheduleEntry] = []
+        start = bisect_left(self._day_order, after.date())
+        for day in self._day_order[start:]:
+            slots = self._days[day].get(movie_id)
+            if not slots:
+                continue
+            first = bisect_left(slots, (after.time(),)) if day == after.date() else 0
+            for _, showtime_id in slots[first:]:
+                entry = self._entries[showtime_id]
+                if city and entry.city != city:
+                    continue
+                if theater_id and entry.theater_id != theater_id:
+                    continue
+                found.append(entry)
+                if len(found) == limit:
+                    return found
+        return found
+
+    def __contains__(self, showtime_id: str) -> bool:
+        return showtime_id in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
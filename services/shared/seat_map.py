@@ -0,0 +1,396 @@
+"""
+Shared Seat Map Module
+Compact per-showtime seat state in Redis, written by booking-service and
+read by movie-service
+"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+import redis.asyncio as redis
+from prometheus_client import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+seat_stream_subscribers = Gauge(
+    "seat_stream_subscribers", "Open seat-map streams in this process"
+)
+seat_stream_events_counter = Counter(
+    "seat_stream_events_total", "Seat-map deltas fanned out to streams", ["result"]
+)
+
+
+class SeatMap:
+    """
+    All held seats of a showtime in a single Redis hash
+
+    `seatmap:{showtime_id}` maps seat_id -> "{holder}|{expires_at_ms}". A
+    300-seat hall is one key instead of 300, reads are one HGETALL and every
+    write is a single atomic script. Each hold carries its own expiry (Redis
+    hashes have no per-field TTL on all supported versions); expired holds
+    are ignored by readers and overwritten by the next reservation, and the
+    hash itself expires once its longest hold has run out.
+
+    Every change is appended to the showtime's change log and published to
+    `seatmap-events:{showtime_id}`, from inside the same script, as
+    {"held" | "released": [...], "version": v, "previous": p}. The version
+    grows with every change (it is the Redis time in ms, or last + 1), so a
+    reader can ask for just the changes since a version it has seen.
+
+    Usage:
+        seat_map = SeatMap(redis_client, hold_ttl=900)
+        conflict = await seat_map.reserve(showtime_id, seat_ids, booking_id)
+        held = await seat_map.held_seats(showtime_id)
+        version, changes, next_expiry = await seat_map.changes_since(showtime_id, version)
+    """
+
+    KEY_PREFIX = "seatmap"
+    EVENTS_PREFIX = "seatmap-events"
+    LOG_PREFIX = "seatmap-log"
+
+    # Lua helpers shared by the scripts: parse "holder|expires_ms" and append
+    # a change to a showtime's change log (a sorted set scored by version)
+    _PARSE = """
+    local function parse(value)
+        local sep = string.find(value, "|", 1, true)
+        return string.sub(value, 1, sep - 1), tonumber(string.sub(value, sep + 1))
+    end
+    local t = redis.call("time")
+    local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+    local function log_change(log_key, change, log_size, log_ttl)
+        local last = redis.call("zrevrange", log_key, 0, 0, "withscores")
+        local previous = tonumber(last[2] or "0")
+        change.previous = previous
+        change.version = math.max(previous + 1, now)
+        local entry = cjson.encode(change)
+        redis.call("zadd", log_key, change.version, entry)
+        redis.call("zremrangebyrank", log_key, 0, -(log_size + 1))
+        redis.call("pexpire", log_key, log_ttl)
+        return entry
+    end
+    """
+
+    # KEYS = seat map, change log
+    # ARGV = holder, ttl_ms, events channel, log_size, log_ttl_ms, seat_id...
+    RESERVE_SCRIPT = _PARSE + """
+    local ttl = tonumber(ARGV[2])
+    for i = 6, #ARGV do
+        local value = redis.call("hget", KEYS[1], ARGV[i])
+        if value then
+            local _, expires = parse(value)
+            if expires > now then
+                return i - 5
+            end
+        end
+    end
+    local hold = ARGV[1] .. "|" .. (now + ttl)
+    local seats = {}
+    for i = 6, #ARGV do
+        redis.call("hset", KEYS[1], ARGV[i], hold)
+        seats[#seats + 1] = ARGV[i]
+    end
+    if redis.call("pttl", KEYS[1]) < ttl then
+        redis.call("pexpire", KEYS[1], ttl)
+    end
+    local entry = log_change(KEYS[2], {held = seats}, tonumber(ARGV[4]), ARGV[5])
+    redis.call("publish", ARGV[3], entry)
+    return 0
+    """
+
+    # KEYS = seat map, change log pairs, one per hold
+    # ARGV = log_size, log_ttl_ms, then seat_id, holder, events channel triples
+    RELEASE_SCRIPT = _PARSE + """
+    local released = 0
+    local by_log = {}
+    local logs = {}
+    for i = 1, #KEYS / 2 do
+        local key, log_key = KEYS[2 * i - 1], KEYS[2 * i]
+        local seat, holder = ARGV[3 * i], ARGV[3 * i + 1]
+        local value = redis.call("hget", key, seat)
+        if value and parse(value) == holder then
+            released = released + redis.call("hdel", key, seat)
+            if not by_log[log_key] then
+                by_log[log_key] = {channel = ARGV[3 * i + 2], seats = {}}
+                logs[#logs + 1] = log_key
+            end
+            table.insert(by_log[log_key].seats, seat)
+        end
+    end
+    for _, log_key in ipairs(logs) do
+        local change = by_log[log_key]
+        local entry = log_change(
+            log_key, {released = change.seats}, tonumber(ARGV[1]), ARGV[2]
+        )
+        redis.call("publish", change.channel, entry)
+    end
+    return released
+    """
+
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        hold_ttl: int = 900,
+        log_size: int = 512,
+        log_ttl: int = 86400,
+    ):
+        self.redis = redis_client
+        self.hold_ttl = hold_ttl
+        self.log_size = log_size
+        self.log_ttl = log_ttl
+        self._reserve = redis_client.register_script(self.RESERVE_SCRIPT)
+        self._release = redis_client.register_script(self.RELEASE_SCRIPT)
+
+    @classmethod
+    def key(cls, showtime_id: str) -> str:
+        return f"{cls.KEY_PREFIX}:{showtime_id}"
+
+    @classmethod
+    def channel(cls, showtime_id: str) -> str:
+        return f"{cls.EVENTS_PREFIX}:{showtime_id}"
+
+    @classmethod
+    def log_key(cls, showtime_id: str) -> str:
+        return f"{cls.LOG_PREFIX}:{showtime_id}"
+
+    async def reserve(
+        self, showtime_id: str, seat_ids: List[str], holder: str
+    ) -> Optional[str]:
+        """
+        Hold every seat for `holder` in one atomic step
+
+        Returns None on success, or the id of the first seat already held by
+        someone (in which case nothing was written).
+        """
+        conflict = await self._reserve(
+            keys=[self.key(showtime_id), self.log_key(showtime_id)],
+            args=[
+                holder,
+                self.hold_ttl * 1000,
+                self.channel(showtime_id),
+                self.log_size,
+                self.log_ttl * 1000,
+                *seat_ids,
+            ],
+        )
+        if conflict:
+            return seat_ids[int(conflict) - 1]
+        return None
+
+    async def release(self, showtime_id: str, seat_ids: List[str], holder: str) -> int:
+        """Release the seats of one showtime still held by `holder`"""
+        return await self.release_holds(
+            [(showtime_id, seat_id, holder) for seat_id in seat_ids]
+        )
+
+    async def release_holds(self, holds: List[Tuple[str, str, str]]) -> int:
+        """Release many (showtime_id, seat_id, holder) holds in one round trip"""
+        if not holds:
+            return 0
+        keys = [
+            key
+            for showtime_id, _, _ in holds
+            for key in (self.key(showtime_id), self.log_key(showtime_id))
+        ]
+        args = [self.log_size, self.log_ttl * 1000] + [
+            value
+            for showtime_id, seat_id, holder in holds
+            for value in (seat_id, holder, self.channel(showtime_id))
+        ]
+        return int(await self._release(keys=keys, args=args))
+
+    async def holds(self, showtime_id: str) -> Dict[str, Tuple[str, int]]:
+        """All live holds of a showtime as {seat_id: (holder, expires_at_ms)}"""
+        now_ms = int(time.time() * 1000)
+        holds = {}
+        for seat_id, value in (await self.redis.hgetall(self.key(showtime_id))).items():
+            holder, _, expires = value.rpartition("|")
+            if int(expires) > now_ms:
+                holds[seat_id] = (holder, int(expires))
+        return holds
+
+    async def held_seats(self, showtime_id: str) -> Set[str]:
+        return set(await self.holds(showtime_id))
+
+    @staticmethod
+    def _expiries(values: Dict[str, str]) -> Dict[str, int]:
+        return {
+            seat_id: int(value.rpartition("|")[2]) for seat_id, value in values.items()
+        }
+
+    async def snapshot(self, showtime_id: str) -> Tuple[Set[str], int, int]:
+        """
+        Held seats of a showtime, the version they reflect and the next expiry
+
+        Holds lapse without changing the version, so the version alone does
+        not identify the seat list; together with the earliest expiry of the
+        live holds (0 if none) it does. Read atomically.
+        """
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.hgetall(self.key(showtime_id))
+        pipe.zrevrange(self.log_key(showtime_id), 0, 0, withscores=True)
+        values, last = await pipe.execute()
+        now_ms = int(time.time() * 1000)
+        live = {s: e for s, e in self._expiries(values).items() if e > now_ms}
+        return set(live), int(last[0][1]) if last else 0, min(live.values(), default=0)
+
+    async def changes_since(
+        self, showtime_id: str, version: int
+    ) -> Tuple[int, Optional[Dict[str, bool]], int]:
+        """
+        Net seat changes after `version` as {seat_id: held}
+
+        Returned with the current version and next expiry, as from
+        `snapshot`. The changes are None when the log no longer reaches back
+        to `version` (trimmed, expired, or a version this showtime never had);
+        the caller should then fall back to a full snapshot. A hold that
+        lapsed after `version` (versions are Redis time in ms, like expiries)
+        counts as released even though the log has no entry for it.
+        """
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.zrangebyscore(self.log_key(showtime_id), f"({version}", "+inf")
+        pipe.zrevrange(self.log_key(showtime_id), 0, 0, withscores=True)
+        pipe.hgetall(self.key(showtime_id))
+        entries, last, values = await pipe.execute()
+        current = int(last[0][1]) if last else 0
+        now_ms = int(time.time() * 1000)
+        expiries = self._expiries(values)
+        next_expiry = min((e for e in expiries.values() if e > now_ms), default=0)
+
+        if not entries and current != version:
+            return current, None, next_expiry
+
+        changes: Dict[str, bool] = {}
+        for i, entry in enumerate(entries):
+            change = json.loads(entry)
+            if i == 0 and change["previous"] != version:
+                return current, None, next_expiry
+            for seat_id in change.get("held", ()):
+                changes[seat_id] = True
+            for seat_id in change.get("released", ()):
+                changes[seat_id] = False
+        for seat_id, expires in expiries.items():
+            if version < expires <= now_ms:
+                changes[seat_id] = False
+        return current, changes, next_expiry
+
+    async def memory_usage(self, showtime_id: str) -> int:
+        """Bytes Redis uses for this showtime's seat map (0 if none held)"""
+        return int(await self.redis.memory_usage(self.key(showtime_id)) or 0)
+
+
+class SeatMapEvents:
+    """
+    Fans seat-map deltas out to any number of local subscribers
+
+    The process holds a single pattern subscription to every showtime's
+    events channel and hands each delta to the bounded queues of that
+    showtime's subscribers. A subscriber that falls behind, or any
+    subscriber while the upstream subscription is being re-established,
+    receives None instead of the missed deltas: it should re-read the seat
+    map and carry on from there.
+
+    Usage:
+        events = SeatMapEvents(redis_client)
+        await events.start()
+        queue = events.subscribe(showtime_id)
+        try:
+            delta = await queue.get()  # {"held": [...]} / {"released": [...]}
+        finally:
+            events.unsubscribe(showtime_id, queue)
+    """
+
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        queue_size: int = 256,
+        reconnect_delay: float = 1.0,
+    ):
+        self.redis = redis_client
+        self.queue_size = queue_size
+        self.reconnect_delay = reconnect_delay
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, showtime_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(showtime_id, set()).add(queue)
+        seat_stream_subscribers.inc()
+        return queue
+
+    def unsubscribe(self, showtime_id: str, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(showtime_id)
+        if queues is None or queue not in queues:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[showtime_id]
+        seat_stream_subscribers.dec()
+
+    def subscriber_count(self, showtime_id: Optional[str] = None) -> int:
+        if showtime_id is not None:
+            return len(self._subscribers.get(showtime_id, ()))
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    def publish_local(self, showtime_id: str, delta: Optional[dict]) -> None:
+        """Hand one delta (or a None resync marker) to a showtime's subscribers"""
+        for queue in self._subscribers.get(showtime_id, ()):
+            if delta is not None and not queue.full():
+                queue.put_nowait(delta)
+                seat_stream_events_counter.labels(result="delivered").inc()
+                continue
+            # Too far behind to catch up delta by delta: replace the backlog
+            # with a single resync marker
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(None)
+            seat_stream_events_counter.labels(result="resync").inc()
+
+    def resync_all(self) -> None:
+        for showtime_id in list(self._subscribers):
+            self.publish_local(showtime_id, None)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        prefix = f"{SeatMap.EVENTS_PREFIX}:"
+        skip = len(prefix)
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.psubscribe(f"{prefix}*")
+                # Deltas published while we were not listening are lost
+                self.resync_all()
+                async for message in pubsub.listen():
+                    if message["type"] != "pmessage":
+                        continue
+                    showtime_id = message["channel"][skip:]
+                    try:
+                        delta = json.loads(message["data"])
+                    except ValueError:
+                        logger.warning(f"Malformed seat-map event for {showtime_id}")
+                        continue
+                    self.publish_local(showtime_id, delta)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Seat-map event subscription failed: {e}")
+                await asyncio.sleep(self.reconnect_delay)
+            finally:
+                try:
+                    await pubsub.close()
+                except Exception:
+                    pass
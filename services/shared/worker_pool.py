@@ -0,0 +1,106 @@
+"""
+Shared Worker Pool Module
+Bounded thread pool for blocking CPU work called from async handlers
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from prometheus_client import Counter, Gauge, Histogram
+
+T = TypeVar("T")
+
+worker_pool_queued = Gauge(
+    "worker_pool_queued", "Jobs waiting for a worker thread", ["pool"]
+)
+worker_pool_wait_seconds = Histogram(
+    "worker_pool_wait_seconds",
+    "Time jobs waited for a worker thread",
+    ["pool"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+worker_pool_run_seconds = Histogram(
+    "worker_pool_run_seconds",
+    "Time jobs ran on a worker thread",
+    ["pool", "operation"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 1),
+)
+worker_pool_rejected = Counter(
+    "worker_pool_rejected_total", "Jobs refused because the queue was full", ["pool"]
+)
+
+
+class WorkerPoolFull(RuntimeError):
+    """Raised when a job is submitted while `max_pending` jobs are outstanding"""
+
+    pass
+
+
+class WorkerPool:
+    """
+    Runs blocking calls on a fixed set of threads, off the event loop
+
+    Meant for CPU-bound work that releases the GIL (bcrypt, hashlib), so a
+    burst of it costs the event loop nothing and other requests keep being
+    served. At most `max_pending` jobs are queued or running; beyond that
+    `run` raises WorkerPoolFull at once rather than letting callers wait
+    behind an ever longer queue.
+
+    Queue depth, time waiting for a thread and time running are exported
+    per pool (and per operation for the run time).
+
+    Usage:
+        hashing = WorkerPool("password_hash", max_workers=2, max_pending=32)
+        ok = await hashing.run(pwd_context.verify, password, stored_hash,
+                               operation="verify")
+    """
+
+    def __init__(self, name: str, max_workers: int = 2, max_pending: int = 32):
+        self.name = name
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=name
+        )
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        """Jobs queued or running"""
+        return self._pending
+
+    async def run(self, fn: Callable[..., T], *args: Any, operation: str = "run") -> T:
+        if self._pending >= self.max_pending:
+            worker_pool_rejected.labels(pool=self.name).inc()
+            raise WorkerPoolFull(f"{self.name}: {self._pending} jobs pending")
+
+        queued = worker_pool_queued.labels(pool=self.name)
+        submitted = time.perf_counter()
+
+        def job() -> T:
+            started = time.perf_counter()
+            queued.dec()
+            worker_pool_wait_seconds.labels(pool=self.name).observe(started - submitted)
+            try:
+                return fn(*args)
+            finally:
+                worker_pool_run_seconds.labels(
+                    pool=self.name, operation=operation
+                ).observe(time.perf_counter() - started)
+
+        self._pending += 1
+        queued.inc()
+        future = self._executor.submit(job)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # A job that never started never decrements the queue gauge
+            if future.cancel():
+                queued.dec()
+            raise
+        finally:
+            self._pending -= 1
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Login Storm Benchmark for Auth Service
+Measures token verification latency while logins hash passwords
+
+Runs an event loop the way auth-service does: --logins concurrent clients
+log in back to back (one bcrypt verify each) while a probe verifies a token
+every --interval ms, as /verify does for every authenticated request. The
+storm runs twice, with bcrypt called inline on the event loop (as login did
+before) and on the bounded password worker pool (as it does now), and the
+probe's latency percentiles and the logins completed are reported for each.
+
+No services are needed; bcrypt uses passlib's default cost, as auth-service.
+
+Usage:
+    python tests/benchmark_login_storm.py --logins 20 --seconds 5
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+from jose import jwt
+from passlib.context import CryptContext
+
+SERVICES_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "services"
+)
+sys.path.insert(0, SERVICES_DIR)
+
+from shared.worker_pool import WorkerPool, WorkerPoolFull  # noqa: E402
+
+SECRET = "benchmark-secret"
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def storm(mode, args, password_hash, token):
+    pool = WorkerPool("password_hash", args.workers, args.max_pending)
+    deadline = time.perf_counter() + args.seconds
+    latencies = []
+    logins = 0
+    shed = 0
+
+    async def login():
+        nonlocal logins, shed
+        while time.perf_counter() < deadline:
+            if mode == "inline":
+                pwd_context.verify("secret", password_hash)
+            else:
+                try:
+                    await pool.run(pwd_context.verify, "secret", password_hash)
+                except WorkerPoolFull:
+                    shed += 1
+                    await asyncio.sleep(0.01)
+                    continue
+            logins += 1
+            await asyncio.sleep(0)
+
+    async def probe():
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            # Yield once, as a request does on its way in, then verify
+            await asyncio.sleep(0)
+            jwt.decode(token, SECRET, algorithms=["HS256"])
+            latencies.append((time.perf_counter() - started) * 1000)
+            await asyncio.sleep(args.interval / 1000)
+
+    await asyncio.gather(probe(), *(login() for _ in range(args.logins)))
+    pool.shutdown()
+    return latencies, logins, shed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=20, help="Concurrent logins")
+    parser.add_argument("--seconds", type=float, default=5, help="Storm length")
+    parser.add_argument("--interval", type=float, default=5, help="Probe gap, ms")
+    parser.add_argument("--workers", type=int, default=2, help="Pool threads")
+    parser.add_argument("--max-pending", type=int, default=32, help="Pool queue cap")
+    args = parser.parse_args()
+
+    password_hash = pwd_context.hash("secret")
+    token = jwt.encode({"sub": "alice"}, SECRET, algorithm="HS256")
+
+    print(
+        f"{'bcrypt':<8}{'verify p50 ms':>15}{'p99 ms':>10}{'max ms':>10}"
+        f"{'logins/s':>10}{'shed':>7}"
+    )
+    for mode in ("inline", "pool"):
+        latencies, logins, shed = await storm(mode, args, password_hash, token)
+        print(
+            f"{mode:<8}{statistics.median(latencies):>15.2f}"
+            f"{percentile(latencies, 0.99):>10.2f}{max(latencies):>10.2f}"
+            f"{logins / args.seconds:>10.1f}{shed:>7}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
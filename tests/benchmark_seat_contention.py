@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Seat Contention Benchmark for Booking Service
+Compares the old showtime-wide lock against the per-seat atomic reservation
+
+Every buyer books its own seats of ONE showtime, so the only contention is
+the reservation mechanism itself. The simulated "work" stands in for the
+booking INSERT/COMMIT: with the showtime lock it runs while the lock is held,
+with per-seat reservation it runs after the seats are claimed.
+
+Usage:
+    REDIS_URL=redis://:redis123@localhost:6379/15 \\
+        python tests/benchmark_seat_contention.py --concurrency 1 10 100
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+
+import redis.asyncio as redis
+
+SERVICES_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "services"
+)
+sys.path[:0] = [os.path.join(SERVICES_DIR, "booking-service"), SERVICES_DIR]
+
+from app.main import SeatReservationEngine  # noqa: E402
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/15")
+
+
+async def book_with_showtime_lock(client, showtime_id, seat_ids, work_s):
+    """Previous implementation: one lock per showtime, 5 retries 0.5s apart"""
+    lock_key = f"lock:showtime:{showtime_id}"
+    for _ in range(5):
+        if await client.set(lock_key, "locked", nx=True, ex=10):
+            try:
+                for seat_id in seat_ids:
+                    if await client.get(f"seat:{showtime_id}:{seat_id}"):
+                        return False
+                await asyncio.sleep(work_s)
+                holder = str(uuid.uuid4())
+                for seat_id in seat_ids:
+                    await client.setex(f"seat:{showtime_id}:{seat_id}", 900, holder)
+                return True
+            finally:
+                await client.delete(lock_key)
+        await asyncio.sleep(0.5)
+    return False
+
+
+async def book_with_seat_reservation(engine, showtime_id, seat_ids, work_s):
+    """Current implementation: atomic claim of all seats, work outside any lock"""
+    conflict = await engine.reserve(showtime_id, seat_ids, str(uuid.uuid4()))
+    if conflict:
+        return False
+    await asyncio.sleep(work_s)
+    return True
+
+
+async def run_round(strategy, client, engine, concurrency, seats_per_buyer, work_s):
+    showtime_id = str(uuid.uuid4())
+    latencies = []
+
+    async def buyer(index):
+        seat_ids = [f"{index}-{n}" for n in range(seats_per_buyer)]
+        started = time.perf_counter()
+        if strategy == "showtime-lock":
+            ok = await book_with_showtime_lock(client, showtime_id, seat_ids, work_s)
+        else:
+            ok = await book_with_seat_reservation(engine, showtime_id, seat_ids, work_s)
+        latencies.append(time.perf_counter() - started)
+        return ok
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(buyer(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    # Clean up the keys written by this round
+    async for key in client.scan_iter(match=f"seat:{showtime_id}:*"):
+        await client.delete(key)
+    await client.delete(SeatReservationEngine.key(showtime_id))
+
+    succeeded = sum(1 for ok in results if ok)
+    latencies.sort()
+    return {
+        "strategy": strategy,
+        "concurrency": concurrency,
+        "succeeded": succeeded,
+        "failed": concurrency - succeeded,
+        "elapsed": elapsed,
+        "throughput": succeeded / elapsed if elapsed else 0.0,
+        "p50": statistics.median(latencies) * 1000,
+        "p95": latencies[max(0, int(len(latencies) * 0.95) - 1)] * 1000,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--seats", type=int, default=2, help="Seats per buyer")
+    parser.add_argument(
+        "--work-ms", type=float, default=20.0, help="Simulated booking write time"
+    )
+    args = parser.parse_args()
+
+    client = redis.from_url(REDIS_URL, decode_responses=True)
+    engine = SeatReservationEngine(client)
+    work_s = args.work_ms / 1000
+
+    print(
+        f"{'strategy':<18}{'buyers':>8}{'ok':>6}{'failed':>8}"
+        f"{'elapsed s':>11}{'bookings/s':>12}{'p50 ms':>9}{'p95 ms':>9}"
+    )
+    try:
+        for concurrency in args.concurrency:
+            for strategy in ("showtime-lock", "seat-reservation"):
+                r = await run_round(
+                    strategy, client, engine, concurrency, args.seats, work_s
+                )
+                print(
+                    f"{r['strategy']:<18}{r['concurrency']:>8}{r['succeeded']:>6}"
+                    f"{r['failed']:>8}{r['elapsed']:>11.3f}{r['throughput']:>12.1f}"
+                    f"{r['p50']:>9.1f}{r['p95']:>9.1f}"
+                )
+    finally:
+        await client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Seat Map Benchmark for Booking/Movie Services
+Compares one Redis key per seat against the per-showtime seat map hash
+
+For a hall of --seats seats with --held of them held, reports the Redis
+memory used by the showtime's seat state and the time to read it: one GET per
+seat (old available-seats endpoint) versus one HGETALL of the seat map.
+
+Usage:
+    REDIS_URL=redis://:redis123@localhost:6379/15 \\
+        python tests/benchmark_seat_map.py --seats 300 --held 120
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+
+import redis.asyncio as redis
+
+SERVICES_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "services"
+)
+sys.path.insert(0, SERVICES_DIR)
+
+from shared.seat_map import SeatMap  # noqa: E402
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/15")
+
+
+async def timed(fn, reads):
+    samples = []
+    for _ in range(reads):
+        started = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seats", type=int, default=300, help="Seats in the hall")
+    parser.add_argument("--held", type=int, default=120, help="Seats currently held")
+    parser.add_argument("--reads", type=int, default=50, help="Reads to time")
+    args = parser.parse_args()
+
+    client = redis.from_url(REDIS_URL, decode_responses=True)
+    seat_map = SeatMap(client, hold_ttl=900)
+    showtime_id = str(uuid.uuid4())
+    seat_ids = [str(uuid.uuid4()) for _ in range(args.seats)]
+    held = seat_ids[: args.held]
+    holder = str(uuid.uuid4())
+
+    per_seat_keys = [f"seat:{showtime_id}:{seat_id}" for seat_id in held]
+    try:
+        for key in per_seat_keys:
+            await client.set(key, holder, ex=900)
+        await seat_map.reserve(showtime_id, held, holder)
+
+        per_seat_bytes = 0
+        for key in per_seat_keys:
+            per_seat_bytes += await client.memory_usage(key) or 0
+        seat_map_bytes = await seat_map.memory_usage(showtime_id)
+
+        async def read_per_seat():
+            for seat_id in seat_ids:
+                await client.get(f"seat:{showtime_id}:{seat_id}")
+
+        async def read_seat_map():
+            await seat_map.held_seats(showtime_id)
+
+        per_seat_ms = await timed(read_per_seat, args.reads)
+        seat_map_ms = await timed(read_seat_map, args.reads)
+    finally:
+        if per_seat_keys:
+            await client.delete(*per_seat_keys)
+        await client.delete(SeatMap.key(showtime_id), SeatMap.log_key(showtime_id))
+        await client.close()
+
+    print(f"{'layout':<16}{'keys':>8}{'memory bytes':>15}{'read p50 ms':>14}")
+    print(
+        f"{'key per seat':<16}{len(per_seat_keys):>8}{per_seat_bytes:>15}{per_seat_ms:>14.2f}"
+    )
+    print(f"{'seat map hash':<16}{1:>8}{seat_map_bytes:>15}{seat_map_ms:>14.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())